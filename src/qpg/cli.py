@@ -1,47 +1,50 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import fcntl
 import json
+import os
 import signal
+import socket
 import sqlite3
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import batched
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, TextIO
+from typing import TYPE_CHECKING, Any, TextIO
 
 from qpg.config import ensure_dirs, get_paths
-from qpg.context_generate import (
-    ContextGenerationError,
-    ContextGenerationResult,
-    generate_table_context_text,
-    list_table_context_candidates,
-)
 from qpg.contexts import (
     ContextSourceNotFoundError,
     InvalidContextTarget,
     add_context,
     list_contexts,
     remove_context,
+    replace_contexts,
 )
 from qpg.db_pg import PostgresDependencyError, connect_pg
-from qpg.db_sqlite import connect_sqlite, ensure_schema
-from qpg.get import ObjectNotFoundError, get_object_payload
+from qpg.db_sqlite import connect_sqlite, ensure_schema, load_sqlite_vec
+from qpg.get import ObjectNotFoundError, get_object_payload, get_object_payloads
 from qpg.index.build import update_source_index
-from qpg.index.fts import rebuild_fts, search_fts
+from qpg.index.fts import iter_search_fts, rebuild_fts, search_fts
 from qpg.index.vec import (
     VectorModelNotInitializedError,
     init_vector_model,
     require_vector_model,
     vector_search,
 )
-from qpg.mcp.server_http import serve_http
-from qpg.mcp.server_stdio import serve_stdio
 from qpg.query.expand import expand_query
 from qpg.query.rerank import RerankHookError, rerank_with_hook
-from qpg.query.rrf import reciprocal_rank_fusion
-from qpg.schema.introspect import apply_filters, introspect_schema
-from qpg.schema.privilege_check import check_privileges, format_privilege_report
-from qpg.settings import config_yaml_path, resolve_openai_settings
+from qpg.schema.introspect import IntrospectionBundle, apply_filters, introspect_schema
+from qpg.schema.privilege_check import PrivilegeReport, check_privileges, format_privilege_report
 from qpg.sources import (
     SourceExistsError,
     SourceNotFoundError,
@@ -56,26 +59,78 @@ from qpg.sources import (
 from qpg.util.pg_dsn import dsn_has_password, dsn_with_password
 from qpg.util.redaction import redact_dsn, redact_secret
 
+if TYPE_CHECKING:
+    from qpg.context_generate import ContextGenerationResult, TableContextCandidate
+
+# Subsystems that only one command family needs (LLM context generation, MCP servers,
+# NumPy-backed fusion) are imported inside their handlers to keep CLI startup fast.
+
+
+def _dump_json(payload: Any) -> str:
+    # Payloads are plain rows from SQLite, so the encoder's cycle check is pure overhead.
+    return json.dumps(payload, indent=2, sort_keys=True, check_circular=False)
+
 
 def _print_json(payload: Any) -> None:
-    print(json.dumps(payload, indent=2, sort_keys=True))
+    sys.stdout.write(_dump_json(payload) + "\n")
 
 
-def _with_db(*, check_same_thread: bool = True) -> sqlite3.Connection:
-    paths = ensure_dirs(get_paths())
-    conn = connect_sqlite(paths.index_db, check_same_thread=check_same_thread)
+_STREAM_BATCH_SIZE = 50
+
+
+def _print_json_stream(items: Iterable[Any]) -> None:
+    # Emits the same text as _print_json(list(items)) without holding the list.
+    out = sys.stdout
+    count = 0
+    for batch in batched(items, _STREAM_BATCH_SIZE, strict=False):
+        for item in batch:
+            encoded = _dump_json(item).replace("\n", "\n  ")
+            out.write(("[\n  " if count == 0 else ",\n  ") + encoded)
+            count += 1
+        out.flush()
+    out.write("[]\n" if count == 0 else "\n]\n")
+    out.flush()
+
+
+_DB_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=4)
+def _open_index_db(db_path: Path, check_same_thread: bool) -> sqlite3.Connection:
+    conn = connect_sqlite(db_path, check_same_thread=check_same_thread)
     ensure_schema(conn)
+    atexit.register(conn.close)
     return conn
 
 
-def _format_rows(rows: list[dict[str, Any]], *, files: bool = False) -> None:
-    for row in rows:
+def _with_db(*, check_same_thread: bool = True) -> sqlite3.Connection:
+    # The index connection is shared for the life of the process so repeated
+    # commands (and MCP tool calls) skip reopening SQLite and re-running DDL.
+    # Callers must not close it; they roll back any uncommitted work instead.
+    paths = ensure_dirs(get_paths())
+    with _DB_LOCK:
+        return _open_index_db(paths.index_db, check_same_thread)
+
+
+_ROW_IDENTITY = itemgetter("object_id", "fqname")
+
+
+def _row_line(row: dict[str, Any]) -> str:
+    object_id, fqname = _ROW_IDENTITY(row)
+    score = float(row["score"] if "score" in row else row.get("rrf_score", 0.0))
+    return (
+        f"{object_id}\t{fqname}\t{row.get('object_type', '?')}\t"
+        f"{row.get('source_name', '?')}\t{score:.4f}\n"
+    )
+
+
+def _format_rows(rows: Iterable[dict[str, Any]], *, files: bool = False) -> None:
+    for batch in batched(rows, _STREAM_BATCH_SIZE, strict=False):
         if files:
-            print(row["fqname"])
-            continue
-        score = float(row.get("score", row.get("rrf_score", 0.0)))
-        source = row.get("source_name", "?")
-        print(f"{row['object_id']}\t{row['fqname']}\t{row.get('object_type', '?')}\t{source}\t{score:.4f}")
+            sys.stdout.write("".join(f"{row['fqname']}\n" for row in batch))
+        else:
+            sys.stdout.write("".join(map(_row_line, batch)))
+        sys.stdout.flush()
 
 
 def _short_description(payload: dict[str, Any]) -> str:
@@ -89,22 +144,19 @@ def _short_description(payload: dict[str, Any]) -> str:
     return f"{kind} schema object"
 
 
+def _column_definition(column: dict[str, Any]) -> str:
+    not_null = "" if column.get("nullable", True) else " NOT NULL"
+    default = column.get("default")
+    return f"  {column['name']} {column['type']}{not_null}{f' DEFAULT {default}' if default else ''}"
+
+
 def _table_definition_from_payload(payload: dict[str, Any]) -> str:
     fqname = str(payload.get("fqname", "unknown_table"))
     columns = payload.get("columns", [])
     if not isinstance(columns, list) or not columns:
         return f"CREATE TABLE {fqname} ();"
 
-    lines: list[str] = []
-    for column in columns:
-        parts = [f"{column['name']} {column['type']}"]
-        if not bool(column.get("nullable", True)):
-            parts.append("NOT NULL")
-        default = column.get("default")
-        if default:
-            parts.append(f"DEFAULT {default}")
-        lines.append("  " + " ".join(parts))
-    return "CREATE TABLE " + fqname + " (\n" + ",\n".join(lines) + "\n);"
+    return f"CREATE TABLE {fqname} (\n" + ",\n".join(map(_column_definition, columns)) + "\n);"
 
 
 def _definition_text(payload: dict[str, Any]) -> str:
@@ -116,21 +168,27 @@ def _definition_text(payload: dict[str, Any]) -> str:
     return f"-- No definition available for {payload.get('fqname', 'object')}"
 
 
-def _format_search_rows_detailed(conn: sqlite3.Connection, rows: list[dict[str, Any]]) -> None:
-    if not rows:
-        print("no matching objects found")
-        return
+def _format_search_rows_detailed(conn: sqlite3.Connection, rows: Iterable[dict[str, Any]]) -> None:
+    seen = False
+    for batch in batched(rows, _STREAM_BATCH_SIZE, strict=False):
+        seen = True
+        payloads = get_object_payloads(conn, [str(row["object_id"]) for row in batch])
+        chunk: list[str] = []
+        for row in batch:
+            payload = payloads.get(str(row["object_id"]))
+            if payload is None:
+                continue
+            score = float(row.get("score", 0.0))
+            chunk.append(
+                f"{payload['fqname']} ({payload['kind']}) [{payload['source']}] score={score:.4f}\n"
+                f"description: {_short_description(payload)}\n"
+                f"definition:\n{_definition_text(payload)}\n\n"
+            )
+        sys.stdout.write("".join(chunk))
+        sys.stdout.flush()
 
-    for row in rows:
-        payload = get_object_payload(conn, str(row["fqname"]), source=row.get("source_name"))
-        description = _short_description(payload)
-        definition = _definition_text(payload)
-        score = float(row.get("score", 0.0))
-        print(f"{payload['fqname']} ({payload['kind']}) [{payload['source']}] score={score:.4f}")
-        print(f"description: {description}")
-        print("definition:")
-        print(definition)
-        print()
+    if not seen:
+        print("no matching objects found")
 
 
 def _collect_sources(conn: sqlite3.Connection, source_name: str | None) -> list[Any]:
@@ -232,12 +290,57 @@ def cmd_source(args: argparse.Namespace) -> int:
         print(str(exc), file=sys.stderr)
         return 2
     finally:
-        conn.close()
+        conn.rollback()
 
     return 1
 
 
+_CONTEXT_WRITE_CHUNK = 100
+
+
+class _WorkerConnections:
+    """One index connection per worker thread, reused across tasks and closed together."""
+
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened: list[sqlite3.Connection] = []
+
+    def get(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only this thread uses it; close() runs on the owning command's thread.
+            conn = connect_sqlite(self._db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._opened.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            opened, self._opened = self._opened, []
+        for conn in opened:
+            conn.close()
+
+
+def _generate_on_worker_connection(
+    connections: _WorkerConnections,
+    candidate: TableContextCandidate,
+    **kwargs: Any,
+) -> ContextGenerationResult:
+    from qpg.context_generate import generate_table_context_text
+
+    return generate_table_context_text(connections.get(), candidate, **kwargs)
+
+
 def cmd_context(args: argparse.Namespace) -> int:
+    from qpg.context_generate import (
+        ContextGenerationError,
+        flush_cache,
+        list_table_context_candidates,
+    )
+
     conn = _with_db(check_same_thread=not getattr(args, "http", False))
     try:
         if args.context_cmd == "add":
@@ -270,6 +373,9 @@ def cmd_context(args: argparse.Namespace) -> int:
             return 0
 
         if args.context_cmd == "generate":
+            # pydantic-settings is only needed by the two commands that read OpenAI config.
+            from qpg.settings import resolve_openai_settings
+
             openai = resolve_openai_settings(
                 api_key_override=args.api_key,
                 base_url_override=args.base_url,
@@ -291,6 +397,9 @@ def cmd_context(args: argparse.Namespace) -> int:
             if args.limit is not None and args.limit <= 0:
                 print("--limit must be a positive integer", file=sys.stderr)
                 return 2
+            if args.concurrency <= 0:
+                print("--concurrency must be a positive integer", file=sys.stderr)
+                return 2
 
             candidates = list_table_context_candidates(
                 conn,
@@ -319,74 +428,92 @@ def cmd_context(args: argparse.Namespace) -> int:
             skipped_existing = 0
             skipped_inference = 0
             results: list[dict[str, Any]] = []
-            for candidate in candidates:
-                if candidate.has_existing_context and not args.overwrite:
-                    skipped_existing += 1
-                    results.append({"target_uri": candidate.target_uri, "status": "skipped_existing"})
-                    if not args.json:
-                        print(f"skipped existing context: {candidate.target_uri}")
-                    continue
-
-                generated_result = generate_table_context_text(
-                    conn,
-                    candidate,
-                    api_key=api_key,
-                    model=model,
-                    base_url=base_url,
-                )
-                if isinstance(generated_result, ContextGenerationResult):
-                    context_text = (
-                        generated_result.context_text.strip()
-                        if isinstance(generated_result.context_text, str)
-                        else None
-                    )
-                    skip_reason = (
-                        generated_result.reason.strip()
-                        if isinstance(generated_result.reason, str)
-                        else None
-                    )
-                elif isinstance(generated_result, str):
-                    context_text = generated_result.strip() or None
-                    skip_reason = None
-                else:
-                    context_text = None
-                    skip_reason = None
-
-                if not args.dry_run and args.overwrite:
-                    conn.execute("DELETE FROM contexts WHERE target_uri = ?", (candidate.target_uri,))
-
-                if context_text:
-                    if not args.dry_run:
-                        add_context(conn, candidate.target_uri, context_text)
-
-                    generated += 1
-                    results.append(
-                        {
-                            "target_uri": candidate.target_uri,
-                            "status": "generated",
-                            "body": context_text,
-                        }
+            # Context and llm_cache writes are queued and committed in chunks instead of once per table.
+            pending_clear: list[str] = []
+            pending_entries: list[tuple[str, str]] = []
+            pending_cache: list[tuple[str, str]] = []
+            # OpenAI calls overlap on worker threads, each with its own index connection
+            # for llm_cache lookups; results are consumed and written here in candidate order.
+            pool = ThreadPoolExecutor(max_workers=args.concurrency)
+            worker_connections = _WorkerConnections(get_paths().index_db)
+            try:
+                futures = [
+                    None
+                    if candidate.has_existing_context and not args.overwrite
+                    else pool.submit(
+                        _generate_on_worker_connection,
+                        worker_connections,
+                        candidate,
+                        api_key=api_key,
+                        model=model,
+                        base_url=base_url,
                     )
+                    for candidate in candidates
+                ]
+                for candidate, future in zip(candidates, futures, strict=True):
+                    if len(pending_clear) + len(pending_entries) + len(pending_cache) >= _CONTEXT_WRITE_CHUNK:
+                        flush_cache(conn, pending_cache)
+                        pending_cache.clear()
+                        replace_contexts(conn, pending_entries, clear_uris=pending_clear)
+                        pending_clear.clear()
+                        pending_entries.clear()
+
+                    if future is None:
+                        skipped_existing += 1
+                        results.append({"target_uri": candidate.target_uri, "status": "skipped_existing"})
+                        if not args.json:
+                            print(f"skipped existing context: {candidate.target_uri}")
+                        continue
+
+                    generated_result = future.result()
+                    if generated_result.cache_entry is not None:
+                        pending_cache.append(generated_result.cache_entry)
+                    context_text = (generated_result.context_text or "").strip() or None
+                    skip_reason = generated_result.reason
+
+                    if not args.dry_run and args.overwrite:
+                        pending_clear.append(candidate.target_uri)
+
+                    if context_text:
+                        if not args.dry_run:
+                            pending_entries.append((candidate.target_uri, context_text))
+
+                        generated += 1
+                        results.append(
+                            {
+                                "target_uri": candidate.target_uri,
+                                "status": "generated",
+                                "body": context_text,
+                            }
+                        )
+                        if not args.json:
+                            if args.dry_run:
+                                print(f"generated (dry-run): {candidate.target_uri}")
+                            else:
+                                print(f"generated context: {candidate.target_uri}")
+                        continue
+
+                    skipped_inference += 1
+                    result_payload = {
+                        "target_uri": candidate.target_uri,
+                        "status": "skipped_inference",
+                    }
+                    if skip_reason:
+                        result_payload["reason"] = skip_reason
+                    results.append(result_payload)
                     if not args.json:
-                        if args.dry_run:
-                            print(f"generated (dry-run): {candidate.target_uri}")
+                        if skip_reason:
+                            print(f"skipped inference: {candidate.target_uri} ({skip_reason})")
                         else:
-                            print(f"generated context: {candidate.target_uri}")
-                    continue
-
-                skipped_inference += 1
-                result_payload = {
-                    "target_uri": candidate.target_uri,
-                    "status": "skipped_inference",
-                }
-                if skip_reason:
-                    result_payload["reason"] = skip_reason
-                results.append(result_payload)
-                if not args.json:
-                    if skip_reason:
-                        print(f"skipped inference: {candidate.target_uri} ({skip_reason})")
-                    else:
-                        print(f"skipped inference: {candidate.target_uri}")
+                            print(f"skipped inference: {candidate.target_uri}")
+            finally:
+                pool.shutdown(cancel_futures=True)
+                worker_connections.close()
+                # Keep already-paid-for LLM results and the contexts reported as
+                # generated even when a later table fails.
+                flush_cache(conn, pending_cache)
+                if pending_clear or pending_entries:
+                    replace_contexts(conn, pending_entries, clear_uris=pending_clear)
 
             payload = {
                 "model": model,
@@ -409,19 +536,29 @@ def cmd_context(args: argparse.Namespace) -> int:
         print(str(exc), file=sys.stderr)
         return 2
     finally:
-        conn.close()
+        conn.rollback()
 
     return 1
 
 
+_MAX_SOURCE_WORKERS = 8
+
+
+def _source_pool(sources: list[Any]) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=min(len(sources), _MAX_SOURCE_WORKERS))
+
+
+def _check_source_privileges(source: Any, *, allow_execute: bool) -> PrivilegeReport:
+    with connect_pg(source.dsn) as pg_conn:
+        return check_privileges(pg_conn, allow_execute=allow_execute)
+
+
 def _run_privilege_check(
-    conn: Any,
+    report: PrivilegeReport,
     *,
     allow_extra_privileges: bool,
-    allow_execute: bool,
     json_output: bool,
 ) -> int:
-    report = check_privileges(conn, allow_execute=allow_execute)
     if json_output:
         _print_json(
             {
@@ -448,7 +585,7 @@ def _run_privilege_check(
 
 
 def cmd_auth_check(args: argparse.Namespace) -> int:
-    conn = _with_db(check_same_thread=not args.http)
+    conn = _with_db()
     try:
         try:
             sources = _collect_sources(conn, args.source)
@@ -460,29 +597,46 @@ def cmd_auth_check(args: argparse.Namespace) -> int:
             return 2
 
         exit_code = 0
-        for source in sources:
-            print(f"== auth check: {source.name} ==")
-            try:
-                with connect_pg(source.dsn) as pg_conn:
-                    code = _run_privilege_check(
-                        pg_conn,
-                        allow_extra_privileges=args.allow_extra_privileges,
-                        allow_execute=args.allow_execute,
-                        json_output=args.json,
-                    )
-            except PostgresDependencyError as exc:
-                print(str(exc), file=sys.stderr)
-                return 2
-            except Exception as exc:
-                print(f"connection failed for '{source.name}': {exc}", file=sys.stderr)
-                exit_code = 4
-                continue
+        # Sources are checked concurrently; reports are printed in source order.
+        with _source_pool(sources) as pool:
+            futures = [
+                pool.submit(_check_source_privileges, source, allow_execute=args.allow_execute)
+                for source in sources
+            ]
+            for source, future in zip(sources, futures, strict=True):
+                print(f"== auth check: {source.name} ==")
+                try:
+                    report = future.result()
+                except PostgresDependencyError as exc:
+                    print(str(exc), file=sys.stderr)
+                    return 2
+                except Exception as exc:
+                    print(f"connection failed for '{source.name}': {exc}", file=sys.stderr)
+                    exit_code = 4
+                    continue
 
-            if code != 0:
-                exit_code = code
+                code = _run_privilege_check(
+                    report,
+                    allow_extra_privileges=args.allow_extra_privileges,
+                    json_output=args.json,
+                )
+                if code != 0:
+                    exit_code = code
         return exit_code
     finally:
-        conn.close()
+        conn.rollback()
+
+
+def _introspect_source(source: Any, *, include_functions: bool) -> IntrospectionBundle:
+    with connect_pg(source.dsn) as pg_conn:
+        bundle = introspect_schema(
+            pg_conn,
+            include_functions=include_functions,
+            include_schemas=source.include_schemas,
+        )
+    # Schemas are filtered in the catalog queries; fnmatch skip patterns have no
+    # exact SQL equivalent and are applied here.
+    return apply_filters(bundle, skip_patterns=source.skip_patterns)
 
 
 def cmd_update(args: argparse.Namespace) -> int:
@@ -506,48 +660,49 @@ def cmd_update(args: argparse.Namespace) -> int:
 
         ctx_rows = list_contexts(conn)
 
-        for source in sources:
-            print(f"== update: {source.name} ==")
-            try:
-                with connect_pg(source.dsn) as pg_conn:
-                    bundle = introspect_schema(pg_conn, include_functions=not args.skip_functions)
-                    bundle = apply_filters(
-                        bundle,
-                        include_schemas=source.include_schemas,
-                        skip_patterns=source.skip_patterns,
-                    )
-            except PostgresDependencyError as exc:
-                print(str(exc), file=sys.stderr)
-                return 2
-            except Exception as exc:
-                message = f"failed introspection: {exc}"
-                mark_source_error(conn, source.id, message)
-                print(message, file=sys.stderr)
-                exit_code = 4
-                continue
+        # Introspection fans out across sources; indexing stays on this thread so
+        # SQLite writes are serialized and output keeps source order.
+        with _source_pool(sources) as pool:
+            futures = [
+                pool.submit(_introspect_source, source, include_functions=not args.skip_functions)
+                for source in sources
+            ]
+            for source, future in zip(sources, futures, strict=True):
+                print(f"== update: {source.name} ==")
+                try:
+                    bundle = future.result()
+                except PostgresDependencyError as exc:
+                    print(str(exc), file=sys.stderr)
+                    return 2
+                except Exception as exc:
+                    message = f"failed introspection: {exc}"
+                    mark_source_error(conn, source.id, message)
+                    print(message, file=sys.stderr)
+                    exit_code = 4
+                    continue
 
-            for warning in bundle.warnings:
-                print(f"warning: {warning}", file=sys.stderr)
+                for warning in bundle.warnings:
+                    print(f"warning: {warning}", file=sys.stderr)
 
-            try:
-                stats = update_source_index(conn, source=source, bundle=bundle, contexts=ctx_rows)
-                mark_source_indexed(conn, source.id)
-                print(
-                    "indexed "
-                    f"objects={stats.objects} columns={stats.columns} "
-                    f"constraints={stats.constraints} indexes={stats.indexes} "
-                    f"dependencies={stats.dependencies} vectors={stats.vectors}"
-                )
-            except Exception as exc:
-                message = f"failed indexing: {exc}"
-                mark_source_error(conn, source.id, message)
-                print(message, file=sys.stderr)
-                exit_code = 4
-                continue
+                try:
+                    stats = update_source_index(conn, source=source, bundle=bundle, contexts=ctx_rows)
+                    mark_source_indexed(conn, source.id)
+                    print(
+                        "indexed "
+                        f"objects={stats.objects} columns={stats.columns} "
+                        f"constraints={stats.constraints} indexes={stats.indexes} "
+                        f"dependencies={stats.dependencies} vectors={stats.vectors}"
+                    )
+                except Exception as exc:
+                    message = f"failed indexing: {exc}"
+                    mark_source_error(conn, source.id, message)
+                    print(message, file=sys.stderr)
+                    exit_code = 4
+                    continue
 
         return exit_code
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def cmd_init(args: argparse.Namespace) -> int:
@@ -569,6 +724,8 @@ def cmd_init(args: argparse.Namespace) -> int:
 
 
 def cmd_config(args: argparse.Namespace) -> int:
+    from qpg.settings import config_yaml_path, resolve_openai_settings
+
     openai = resolve_openai_settings()
     yaml_path = config_yaml_path()
     payload = {
@@ -598,7 +755,6 @@ def cmd_config(args: argparse.Namespace) -> int:
 
 def _status_payload(conn: sqlite3.Connection) -> dict[str, Any]:
     sources = list_sources(conn)
-    total_objects = conn.execute("SELECT COUNT(*) AS count FROM db_objects").fetchone()["count"]
     by_kind_rows = conn.execute(
         """
         SELECT object_type, COUNT(*) AS count
@@ -607,20 +763,20 @@ def _status_payload(conn: sqlite3.Connection) -> dict[str, Any]:
         ORDER BY count DESC, object_type ASC
         """
     ).fetchall()
+    total_objects = sum(row["count"] for row in by_kind_rows)
+    counts_by_source = dict(
+        conn.execute("SELECT source_id, COUNT(*) AS count FROM db_objects GROUP BY source_id").fetchall()
+    )
 
     source_rows = []
     for source in sources:
-        count = conn.execute(
-            "SELECT COUNT(*) AS count FROM db_objects WHERE source_id = ?",
-            (source.id,),
-        ).fetchone()["count"]
         source_rows.append(
             {
                 "name": source.name,
                 "dsn": redact_dsn(source.dsn),
                 "include_schemas": source.include_schemas,
                 "skip_patterns": source.skip_patterns,
-                "objects": count,
+                "objects": counts_by_source.get(source.id, 0),
                 "last_indexed_at": source.last_indexed_at,
                 "last_error": source.last_error,
             }
@@ -651,10 +807,26 @@ def cmd_status(args: argparse.Namespace) -> int:
             )
         return 0
     finally:
-        conn.close()
+        conn.rollback()
+
 
+# Full VACUUM rewrites the whole file; without --full it runs once to convert
+# indexes that predate incremental auto-vacuum, and afterwards only when this
+# share of pages is free.
+_FULL_VACUUM_FREE_RATIO = 0.25
 
-def cmd_cleanup(_: argparse.Namespace) -> int:
+
+def _needs_full_vacuum(conn: sqlite3.Connection) -> bool:
+    # incremental_vacuum is a no-op unless the file is already in incremental
+    # mode, and only a full VACUUM converts an older index to it.
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return True
+    page_count = int(conn.execute("PRAGMA page_count").fetchone()[0])
+    freelist_count = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+    return page_count > 0 and freelist_count / page_count >= _FULL_VACUUM_FREE_RATIO
+
+
+def cmd_cleanup(args: argparse.Namespace) -> int:
     conn = _with_db()
     try:
         conn.execute(
@@ -663,12 +835,18 @@ def cmd_cleanup(_: argparse.Namespace) -> int:
             WHERE expires_at IS NOT NULL AND expires_at <= strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
             """
         )
-        conn.execute("VACUUM")
         conn.commit()
+        if args.full or _needs_full_vacuum(conn):
+            # Switching to incremental mode only takes effect through a full VACUUM.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+            conn.commit()
         print("cleanup complete")
         return 0
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def cmd_repair(_: argparse.Namespace) -> int:
@@ -683,7 +861,7 @@ def cmd_repair(_: argparse.Namespace) -> int:
         print("repair complete")
         return 0
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def _search_common(
@@ -707,10 +885,25 @@ def _search_common(
     )
 
 
+def _search_on_own_connection(
+    search: Callable[..., list[dict[str, Any]]],
+    **kwargs: Any,
+) -> list[dict[str, Any]]:
+    # sqlite3 connections must not be shared across threads; each worker opens
+    # its own reader against the WAL-mode index file.
+    conn = connect_sqlite(get_paths().index_db)
+    try:
+        load_sqlite_vec(conn)
+        return search(conn, **kwargs)
+    finally:
+        conn.close()
+
+
 def cmd_search(args: argparse.Namespace) -> int:
     conn = _with_db()
     try:
-        rows = _search_common(
+        # Rows are consumed lazily so `--all` output starts before the scan ends.
+        rows = iter_search_fts(
             conn,
             query=args.text,
             source=args.source,
@@ -721,14 +914,14 @@ def cmd_search(args: argparse.Namespace) -> int:
         )
 
         if args.json:
-            _print_json(rows)
+            _print_json_stream(rows)
         elif args.files:
             _format_rows(rows, files=True)
         else:
             _format_search_rows_detailed(conn, rows)
         return 0
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def cmd_vsearch(args: argparse.Namespace) -> int:
@@ -755,10 +948,12 @@ def cmd_vsearch(args: argparse.Namespace) -> int:
             _format_rows(rows, files=args.files)
         return 0
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def cmd_query(args: argparse.Namespace) -> int:
+    from qpg.query.rrf import apply_position_bonus, reciprocal_rank_fusion
+
     try:
         require_vector_model()
     except VectorModelNotInitializedError as exc:
@@ -768,38 +963,24 @@ def cmd_query(args: argparse.Namespace) -> int:
     conn = _with_db()
     try:
         expanded = expand_query(args.text)
-        fts_lists = [
-            _search_common(
-                conn,
-                query=text,
-                source=args.source,
-                schema=args.schema,
-                kind=args.kind,
-                limit=(args.n if not args.all else 10_000),
-                min_score=None,
-            )
-            for text in expanded
-        ]
-
-        ranked_lists = fts_lists
-        ranked_lists.append(
-            vector_search(
-                conn,
-                query=args.text,
-                source=args.source,
-                schema=args.schema,
-                kind=args.kind,
-                limit=(args.n if not args.all else 10_000),
-                min_score=None,
+        filters: dict[str, Any] = {
+            "source": args.source,
+            "schema": args.schema,
+            "kind": args.kind,
+            "limit": (args.n if not args.all else 10_000),
+            "min_score": None,
+        }
+        with ThreadPoolExecutor(max_workers=len(expanded) + 1) as pool:
+            futures = [
+                pool.submit(_search_on_own_connection, _search_common, query=text, **filters)
+                for text in expanded
+            ]
+            futures.append(
+                pool.submit(_search_on_own_connection, vector_search, query=args.text, **filters)
             )
-        )
-
-        fused = reciprocal_rank_fusion(ranked_lists, k=60, top_rank_bonus=0.02)
-        for idx, row in enumerate(fused, start=1):
-            row["position_bonus"] = 1.0 / (idx + 1)
-            row["score"] = row["rrf_score"] + 0.1 * row["position_bonus"]
+            ranked_lists = [future.result() for future in futures]
 
-        fused.sort(key=lambda item: item["score"], reverse=True)
+        fused = apply_position_bonus(reciprocal_rank_fusion(ranked_lists, k=60, top_rank_bonus=0.02))
         try:
             fused = rerank_with_hook(args.text, fused)
         except RerankHookError as exc:
@@ -817,7 +998,7 @@ def cmd_query(args: argparse.Namespace) -> int:
             _format_rows(fused, files=args.files)
         return 0
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def cmd_get(args: argparse.Namespace) -> int:
@@ -854,7 +1035,7 @@ def cmd_get(args: argparse.Namespace) -> int:
         print(str(exc), file=sys.stderr)
         return 2
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def _schema_objects_query(source: str | None = None) -> tuple[str, list[Any]]:
@@ -894,8 +1075,9 @@ def cmd_schema(args: argparse.Namespace) -> int:
 
         if args.json:
             payload: list[dict[str, Any]] = []
+            items = get_object_payloads(conn, [row["object_id"] for row in rows])
             for row in rows:
-                item = get_object_payload(conn, row["fqname"], source=row["source_name"])
+                item = items[row["object_id"]]
                 item["definition"] = _definition_text(item)
                 item["description"] = _short_description(item)
                 payload.append(item)
@@ -907,32 +1089,55 @@ def cmd_schema(args: argparse.Namespace) -> int:
             return 0
 
         current_source: str | None = None
-        for row in rows:
-            source_name = str(row["source_name"])
-            if current_source != source_name:
-                if current_source is not None:
-                    print()
-                print(f"== source: {source_name} ==")
-                current_source = source_name
-
-            item = get_object_payload(conn, row["fqname"], source=source_name)
-            print(f"\n-- {item['fqname']} ({item['kind']})")
-            print(f"-- { _short_description(item) }")
-            print(_definition_text(item))
+        for batch in batched(rows, _STREAM_BATCH_SIZE, strict=False):
+            items = get_object_payloads(conn, [row["object_id"] for row in batch])
+            chunk: list[str] = []
+            for row in batch:
+                source_name = str(row["source_name"])
+                if current_source != source_name:
+                    if current_source is not None:
+                        chunk.append("\n")
+                    chunk.append(f"== source: {source_name} ==\n")
+                    current_source = source_name
+
+                item = items[row["object_id"]]
+                chunk.append(
+                    f"\n-- {item['fqname']} ({item['kind']})\n"
+                    f"-- {_short_description(item)}\n"
+                    f"{_definition_text(item)}\n"
+                )
+            sys.stdout.write("".join(chunk))
         return 0
     finally:
-        conn.close()
+        conn.rollback()
 
 
-def _write_pid_file(pid_file: Path, pid: int) -> None:
+def _write_pid_file(pid_file: Path, pid: int, *, exclusive: bool = False) -> None:
+    # Write a sibling temp file first so readers never see a partial pid. The
+    # final rename is atomic; `exclusive` links instead, failing with
+    # FileExistsError when another process already holds the pid file.
     pid_file.parent.mkdir(parents=True, exist_ok=True)
-    pid_file.write_text(str(pid), encoding="utf-8")
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=pid_file.parent, prefix=f".{pid_file.name}.", delete=False
+    ) as tf:
+        tf.write(str(pid))
+        tf.flush()
+        os.fsync(tf.fileno())
+    tmp_path = Path(tf.name)
+    try:
+        if exclusive:
+            os.link(tmp_path, pid_file)
+        else:
+            os.replace(tmp_path, pid_file)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
 
 def _read_pid_file(pid_file: Path) -> int | None:
-    if not pid_file.exists():
+    try:
+        text = pid_file.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
         return None
-    text = pid_file.read_text(encoding="utf-8").strip()
     if not text:
         return None
     try:
@@ -941,6 +1146,47 @@ def _read_pid_file(pid_file: Path) -> int | None:
         return None
 
 
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_PID_CLAIM_ATTEMPTS = 3
+
+
+class _PidFileClaimError(RuntimeError):
+    pass
+
+
+def _claim_pid_file(pid_file: Path, pid: int) -> int | None:
+    """Claim `pid_file` for `pid`; return the live owner's pid if another daemon holds it."""
+    pid_file.parent.mkdir(parents=True, exist_ok=True)
+    # Removing a stale pid file is check-then-act, so concurrent starters take
+    # turns under an flock on the pid file's directory; that leaves no lock file
+    # behind.
+    dir_fd = os.open(pid_file.parent, os.O_RDONLY)
+    try:
+        fcntl.flock(dir_fd, fcntl.LOCK_EX)
+        for _ in range(_PID_CLAIM_ATTEMPTS):
+            try:
+                _write_pid_file(pid_file, pid, exclusive=True)
+                return None
+            except FileExistsError:
+                existing = _read_pid_file(pid_file)
+                if existing is not None and _pid_alive(existing):
+                    return existing
+                # Stale pid file left by a daemon that is gone.
+                pid_file.unlink(missing_ok=True)
+    finally:
+        os.close(dir_fd)
+    raise _PidFileClaimError(f"could not claim mcp daemon pid file {pid_file}")
+
+
 def _mcp_stop(paths_pid: Path) -> int:
     pid = _read_pid_file(paths_pid)
     if pid is None:
@@ -960,11 +1206,28 @@ def _mcp_stop(paths_pid: Path) -> int:
 
 
 def os_kill(pid: int, sig: signal.Signals) -> None:
-    import os
-
     os.kill(pid, sig)
 
 
+_DAEMON_READY_TIMEOUT_SECONDS = 10.0
+_DAEMON_READY_POLL_SECONDS = 0.05
+
+
+def _wait_for_daemon(proc: subprocess.Popen[bytes], host: str, port: int) -> bool:
+    """Wait until the daemon accepts connections; False if it exits first."""
+    deadline = time.monotonic() + _DAEMON_READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((host, port), timeout=_DAEMON_READY_POLL_SECONDS):
+                return True
+        except OSError:
+            time.sleep(_DAEMON_READY_POLL_SECONDS)
+    # Still starting after the timeout; leave it running and report it as started.
+    return proc.poll() is None
+
+
 def cmd_mcp(args: argparse.Namespace) -> int:
     paths = ensure_dirs(get_paths())
 
@@ -972,7 +1235,11 @@ def cmd_mcp(args: argparse.Namespace) -> int:
         return _mcp_stop(paths.mcp_pid_file)
 
     if args.http and args.daemon:
-        existing = _read_pid_file(paths.mcp_pid_file)
+        try:
+            existing = _claim_pid_file(paths.mcp_pid_file, os.getpid())
+        except _PidFileClaimError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
         if existing is not None:
             print(f"mcp daemon already running (pid={existing})", file=sys.stderr)
             return 2
@@ -988,8 +1255,16 @@ def cmd_mcp(args: argparse.Namespace) -> int:
             "--port",
             str(args.port),
         ]
-        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except BaseException:
+            paths.mcp_pid_file.unlink(missing_ok=True)
+            raise
         _write_pid_file(paths.mcp_pid_file, proc.pid)
+        if not _wait_for_daemon(proc, args.host, args.port):
+            paths.mcp_pid_file.unlink(missing_ok=True)
+            print(f"mcp daemon exited during startup (code={proc.returncode})", file=sys.stderr)
+            return 1
         print(f"started mcp daemon pid={proc.pid} host={args.host} port={args.port}")
         print("codex/claude-code integration: configure MCP command as `qpg mcp --http --host "
               f"{args.host} --port {args.port}`")
@@ -998,16 +1273,20 @@ def cmd_mcp(args: argparse.Namespace) -> int:
     conn = _with_db(check_same_thread=not args.http)
     try:
         if args.http:
+            from qpg.mcp.server_http import serve_http
+
             print(f"qpg MCP HTTP server listening on http://{args.host}:{args.port}")
             print("health endpoint: GET /health, rpc endpoint: POST /mcp")
             print("codex/claude-code integration: set MCP server command to "
                   f"`qpg mcp --http --host {args.host} --port {args.port}`")
             return serve_http(conn, host=args.host, port=args.port)
+        from qpg.mcp.server_stdio import serve_stdio
+
         print("qpg MCP stdio server started", file=sys.stderr)
         print("codex/claude-code integration: set MCP server command to `qpg mcp`", file=sys.stderr)
         return serve_stdio(conn)
     finally:
-        conn.close()
+        conn.rollback()
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -1099,6 +1378,12 @@ def build_parser() -> argparse.ArgumentParser:
             "(falls back to QPG_OPENAI_BASE_URL/OPENAI_BASE_URL or https://api.openai.com/v1)"
         ),
     )
+    context_generate.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="number of tables to generate in parallel (default: 8)",
+    )
     context_generate.add_argument("--overwrite", action="store_true")
     context_generate.add_argument("--dry-run", action="store_true")
     context_generate.add_argument("--json", action="store_true")
@@ -1125,6 +1410,11 @@ def build_parser() -> argparse.ArgumentParser:
     status_parser.set_defaults(func=cmd_status)
 
     cleanup_parser = subparsers.add_parser("cleanup", help="cleanup local cache")
+    cleanup_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="rewrite the whole index with VACUUM instead of reclaiming free pages incrementally",
+    )
     cleanup_parser.set_defaults(func=cmd_cleanup)
 
     repair_parser = subparsers.add_parser("repair", help="repair local index")
@@ -1170,8 +1460,15 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
+@lru_cache(maxsize=1)
+def _cached_parser() -> argparse.ArgumentParser:
+    # argparse parsers cannot be pickled (they hold local functions), so the
+    # parser is built once per process and reused by repeated main() calls.
+    return build_parser()
+
+
 def main(argv: list[str] | None = None) -> int:
-    parser = build_parser()
+    parser = _cached_parser()
     args = parser.parse_args(argv)
     func = getattr(args, "func", None)
     if func is None:
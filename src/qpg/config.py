@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 APP_NAME = "qpg"
@@ -18,17 +19,16 @@ class Paths:
     mcp_pid_file: Path
 
 
-def _xdg_or_default(env_name: str, default: Path) -> Path:
-    value = os.environ.get(env_name)
+def _xdg_or_default(value: str | None, default: Path) -> Path:
     if value:
         return Path(value).expanduser().resolve()
     return default.expanduser().resolve()
 
 
-def get_paths() -> Paths:
-    home = Path.home()
-    cache_home = _xdg_or_default("XDG_CACHE_HOME", home / ".cache")
-    state_home = _xdg_or_default("XDG_STATE_HOME", home / ".local" / "state")
+@lru_cache(maxsize=8)
+def _paths_for(home: Path, cache_env: str | None, state_env: str | None) -> Paths:
+    cache_home = _xdg_or_default(cache_env, home / ".cache")
+    state_home = _xdg_or_default(state_env, home / ".local" / "state")
     cache_dir = cache_home / APP_NAME
     state_dir = state_home / APP_NAME
     return Paths(
@@ -40,9 +40,23 @@ def get_paths() -> Paths:
     )
 
 
+def get_paths() -> Paths:
+    return _paths_for(
+        Path.home(),
+        os.environ.get("XDG_CACHE_HOME"),
+        os.environ.get("XDG_STATE_HOME"),
+    )
+
+
+_ENSURED: set[Paths] = set()
+
+
 def ensure_dirs(paths: Paths | None = None) -> Paths:
     resolved = paths or get_paths()
+    if resolved in _ENSURED:
+        return resolved
     resolved.cache_dir.mkdir(parents=True, exist_ok=True)
     resolved.state_dir.mkdir(parents=True, exist_ok=True)
     resolved.models_dir.mkdir(parents=True, exist_ok=True)
+    _ENSURED.add(resolved)
     return resolved
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 import hashlib
+import http.client
 import json
 import sqlite3
-from dataclasses import dataclass
-from typing import Any
-from urllib import error, request
-
-
-@dataclass(frozen=True)
-class ColumnSummary:
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import cached_property
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
+
+
+class ColumnSummary(NamedTuple):
+    # A tuple rather than a dataclass: one is built per column of every candidate table.
     name: str
     data_type: str
     nullable: bool
@@ -29,7 +36,7 @@ class TableContextCandidate:
     columns: list[ColumnSummary]
     has_existing_context: bool
 
-    @property
+    @cached_property
     def target_uri(self) -> str:
         return f"qpg://{self.source_name}/{self.fqname}"
 
@@ -42,6 +49,8 @@ class ContextGenerationError(RuntimeError):
 class ContextGenerationResult:
     context_text: str | None
     reason: str | None = None
+    # (key, value_json) for the llm_cache row to persist with flush_cache; None when served from cache.
+    cache_entry: tuple[str, str] | None = field(default=None, compare=False, repr=False)
 
 
 def list_table_context_candidates(
@@ -60,6 +69,9 @@ def list_table_context_candidates(
     if schema:
         filters.append("o.schema_name = ?")
         params.append(schema)
+    if not include_with_existing:
+        # Filtered in SQL so LIMIT counts only tables that still need context.
+        filters.append("NOT has_existing_context")
 
     limit_clause = ""
     if limit is not None:
@@ -75,7 +87,11 @@ def list_table_context_candidates(
             o.schema_name AS schema_name,
             o.object_name AS object_name,
             o.definition AS definition,
-            o.comment AS comment
+            o.comment AS comment,
+            EXISTS (
+                SELECT 1 FROM contexts c
+                WHERE c.target_uri = 'qpg://' || s.name || '/' || o.fqname
+            ) AS has_existing_context
         FROM db_objects o
         JOIN sources s ON s.id = o.source_id
         WHERE {' AND '.join(filters)}
@@ -84,52 +100,57 @@ def list_table_context_candidates(
         """,
         params,
     ).fetchall()
+    # Rows are unpacked positionally in projection order; TEXT NOT NULL columns need no coercion.
+    columns_by_object = _column_summaries(conn, [row[1] for row in rows])
+    return [
+        TableContextCandidate(
+            source_name=source_name,
+            object_id=object_id,
+            fqname=fqname,
+            schema_name=schema_name,
+            object_name=object_name,
+            definition=definition,
+            comment=comment,
+            columns=columns_by_object.get(object_id, []),
+            has_existing_context=bool(has_existing_context),
+        )
+        for (
+            source_name,
+            object_id,
+            fqname,
+            schema_name,
+            object_name,
+            definition,
+            comment,
+            has_existing_context,
+        ) in rows
+    ]
 
-    candidates: list[TableContextCandidate] = []
-    for row in rows:
-        fqname = str(row["fqname"])
-        target_uri = f"qpg://{row['source_name']}/{fqname}"
-        existing = conn.execute(
-            "SELECT 1 FROM contexts WHERE target_uri = ? LIMIT 1",
-            (target_uri,),
-        ).fetchone()
-        has_existing_context = existing is not None
-        if has_existing_context and not include_with_existing:
-            continue
 
+_COLUMN_BATCH_SIZE = 500
+
+
+def _column_summaries(conn: sqlite3.Connection, object_ids: list[str]) -> dict[str, list[ColumnSummary]]:
+    grouped: dict[str, list[ColumnSummary]] = {}
+    for start in range(0, len(object_ids), _COLUMN_BATCH_SIZE):
+        batch = object_ids[start : start + _COLUMN_BATCH_SIZE]
+        placeholders = ", ".join("?" for _ in batch)
         col_rows = conn.execute(
-            """
-            SELECT column_name, data_type, is_nullable, default_expr, comment
+            f"""
+            SELECT object_id, column_name, data_type, is_nullable, default_expr, comment
             FROM columns
-            WHERE object_id = ?
-            ORDER BY ordinal_position ASC
+            WHERE object_id IN ({placeholders})
+            ORDER BY object_id, ordinal_position ASC
             """,
-            (row["object_id"],),
+            batch,
         ).fetchall()
-        columns = [
-            ColumnSummary(
-                name=str(col["column_name"]),
-                data_type=str(col["data_type"]),
-                nullable=bool(col["is_nullable"]),
-                default_expr=str(col["default_expr"]) if col["default_expr"] is not None else None,
-                comment=str(col["comment"]) if col["comment"] is not None else None,
-            )
-            for col in col_rows
-        ]
-        candidates.append(
-            TableContextCandidate(
-                source_name=str(row["source_name"]),
-                object_id=str(row["object_id"]),
-                fqname=fqname,
-                schema_name=str(row["schema_name"]) if row["schema_name"] is not None else None,
-                object_name=str(row["object_name"]),
-                definition=str(row["definition"]) if row["definition"] is not None else None,
-                comment=str(row["comment"]) if row["comment"] is not None else None,
-                columns=columns,
-                has_existing_context=has_existing_context,
-            )
-        )
-    return candidates
+        # Rows arrive ordered by object_id, so each table's columns form one run.
+        for object_id, group in groupby(col_rows, key=itemgetter(0)):
+            grouped[object_id] = [
+                ColumnSummary(name, data_type, bool(is_nullable), default_expr, comment)
+                for _, name, data_type, is_nullable, default_expr, comment in group
+            ]
+    return grouped
 
 
 def _clip(value: str, limit: int) -> str:
@@ -181,7 +202,7 @@ def _cache_lookup(conn: sqlite3.Connection, key: str) -> ContextGenerationResult
     if row is None:
         return None
     try:
-        payload = json.loads(str(row["value_json"]))
+        payload = json.loads(row[0])
     except json.JSONDecodeError:
         return None
     decision = str(payload.get("decision", "")).strip().lower()
@@ -197,7 +218,7 @@ def _cache_lookup(conn: sqlite3.Connection, key: str) -> ContextGenerationResult
     return None
 
 
-def _cache_store(conn: sqlite3.Connection, key: str, result: ContextGenerationResult) -> None:
+def _cache_entry(key: str, result: ContextGenerationResult) -> tuple[str, str]:
     payload_obj: dict[str, str] = {}
     if result.context_text:
         payload_obj["decision"] = "generate"
@@ -207,22 +228,112 @@ def _cache_store(conn: sqlite3.Connection, key: str, result: ContextGenerationRe
         payload_obj["context"] = ""
     if result.reason:
         payload_obj["reason"] = result.reason
-    payload = json.dumps(payload_obj, sort_keys=True)
-    conn.execute(
-        """
-        INSERT INTO llm_cache(key, value_json)
-        VALUES(?, ?)
-        ON CONFLICT(key) DO UPDATE SET
-            value_json = excluded.value_json
-        """,
-        (key, payload),
-    )
+    return key, json.dumps(payload_obj, sort_keys=True)
+
+
+def flush_cache(conn: sqlite3.Connection, entries: Sequence[tuple[str, str]]) -> None:
+    """Upsert `(key, value_json)` llm_cache entries in one transaction."""
+    if not entries:
+        return
+    try:
+        conn.executemany(
+            """
+            INSERT INTO llm_cache(key, value_json)
+            VALUES(?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value_json = excluded.value_json
+            """,
+            entries,
+        )
+    except Exception:
+        conn.rollback()
+        raise
     conn.commit()
 
 
 def _cache_key(*, model: str, prompt: str) -> str:
-    digest = hashlib.sha256(f"{model}\n{prompt}".encode()).hexdigest()
-    return f"context-gen:{digest}"
+    # Non-cryptographic use: blake2b-128 is several times faster than sha256.
+    digest = hashlib.blake2b(model.encode(), digest_size=16)
+    digest.update(b"\n")
+    digest.update(prompt.encode())
+    return f"context-gen2:{digest.hexdigest()}"
+
+
+def _legacy_cache_key(*, model: str, prompt: str) -> str:
+    # sha256 keys written before context-gen2; only consulted on a cache miss.
+    digest = hashlib.sha256(model.encode())
+    digest.update(b"\n")
+    digest.update(prompt.encode())
+    return f"context-gen:{digest.hexdigest()}"
+
+
+_HTTP_TIMEOUT_SECONDS = 30
+# Compact, non-escaped request bodies from one reusable encoder.
+_REQUEST_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_HTTP_CONNECTIONS = threading.local()
+
+
+def _http_connection(scheme: str, host: str, port: int | None) -> http.client.HTTPConnection:
+    # One keep-alive connection per endpoint and thread: generation workers
+    # reuse their TCP/TLS session across tables without sharing a socket.
+    pool: dict[tuple[str, str, int | None], http.client.HTTPConnection] | None = getattr(
+        _HTTP_CONNECTIONS, "pool", None
+    )
+    if pool is None:
+        pool = {}
+        _HTTP_CONNECTIONS.pool = pool
+    key = (scheme, host, port)
+    conn = pool.get(key)
+    if conn is None:
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = conn_cls(host, port, timeout=_HTTP_TIMEOUT_SECONDS)
+        pool[key] = conn
+    return conn
+
+
+def _post_keepalive(
+    scheme: str,
+    host: str,
+    port: int | None,
+    path: str,
+    body: bytes,
+    headers: dict[str, str],
+) -> tuple[int, str | None, bytes]:
+    for attempt in range(2):
+        conn = _http_connection(scheme, host, port)
+        reused = conn.sock is not None
+        try:
+            conn.request("POST", path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+            conn.close()
+            # A pooled socket may have been closed by the server while idle;
+            # retry once on a fresh connection before giving up.
+            if reused and attempt == 0:
+                continue
+            raise
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        return resp.status, resp.getheader("Retry-After"), data
+    raise AssertionError("unreachable")
+
+
+_THROTTLE_STATUSES = frozenset({429, 503})
+_THROTTLE_RETRIES = 3
+_THROTTLE_MAX_DELAY_SECONDS = 30.0
+
+
+def _throttle_delay(retry_after: str | None, attempt: int) -> float:
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0.0), _THROTTLE_MAX_DELAY_SECONDS)
+        except ValueError:
+            pass
+    return min(2.0**attempt, _THROTTLE_MAX_DELAY_SECONDS)
 
 
 def _call_openai_chat(
@@ -243,29 +354,34 @@ def _call_openai_chat(
             {"role": "user", "content": prompt},
         ],
     }
-    encoded = json.dumps(payload).encode("utf-8")
-    endpoint = base_url.rstrip("/") + "/chat/completions"
-    req = request.Request(
-        endpoint,
-        data=encoded,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
-    try:
-        with request.urlopen(req, timeout=30) as resp:
-            body = resp.read()
-    except error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace").strip()
-        raise ContextGenerationError(f"OpenAI API error ({exc.code}): {detail}") from exc
-    except error.URLError as exc:
-        raise ContextGenerationError(f"OpenAI request failed: {exc}") from exc
+    encoded = _REQUEST_ENCODER.encode(payload).encode("utf-8")
+    endpoint = urlsplit(base_url.rstrip("/") + "/chat/completions")
+    if endpoint.scheme not in {"http", "https"} or not endpoint.hostname:
+        raise ContextGenerationError(f"OpenAI request failed: unsupported base URL {base_url!r}")
+    path = endpoint.path + (f"?{endpoint.query}" if endpoint.query else "")
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    # Concurrent workers can outrun the provider's rate limit; back off on
+    # throttling responses (honoring Retry-After) instead of failing the run.
+    for attempt in range(_THROTTLE_RETRIES + 1):
+        try:
+            status, retry_after, body = _post_keepalive(
+                endpoint.scheme, endpoint.hostname, endpoint.port, path, encoded, headers
+            )
+        except (OSError, http.client.HTTPException) as exc:
+            raise ContextGenerationError(f"OpenAI request failed: {exc}") from exc
+        if status not in _THROTTLE_STATUSES or attempt == _THROTTLE_RETRIES:
+            break
+        time.sleep(_throttle_delay(retry_after, attempt))
+    if status >= 400:
+        detail = body.decode("utf-8", errors="replace").strip()
+        raise ContextGenerationError(f"OpenAI API error ({status}): {detail}")
 
     try:
-        data = json.loads(body.decode("utf-8"))
-    except json.JSONDecodeError as exc:
+        data = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
         raise ContextGenerationError("OpenAI response was not valid JSON") from exc
 
     choices = data.get("choices")
@@ -284,9 +400,11 @@ def _call_openai_chat(
 def _extract_json_text(text: str) -> str:
     trimmed = text.strip()
     if trimmed.startswith("```"):
-        lines = trimmed.splitlines()
-        if len(lines) >= 3:
-            inner = "\n".join(lines[1:-1]).strip()
+        # Drop the opening fence line and the closing fence line without splitting every line.
+        start = trimmed.find("\n")
+        end = trimmed.rfind("\n")
+        if 0 <= start < end:
+            inner = trimmed[start + 1 : end].strip()
             if inner:
                 return inner
     return trimmed
@@ -326,7 +444,7 @@ def _parse_generation_output(text: str) -> ContextGenerationResult:
     raise ContextGenerationError("OpenAI response missing valid decision ('generate' or 'skip')")
 
 
-_BOILERPLATE_COLUMN_NAMES = {
+_BOILERPLATE_COLUMN_NAMES = frozenset({
     "id",
     "created_at",
     "updated_at",
@@ -335,7 +453,7 @@ _BOILERPLATE_COLUMN_NAMES = {
     "modified_at",
     "created_on",
     "updated_on",
-}
+})
 
 
 def _has_reasonable_signal(candidate: TableContextCandidate) -> tuple[bool, str]:
@@ -344,10 +462,7 @@ def _has_reasonable_signal(candidate: TableContextCandidate) -> tuple[bool, str]
     if candidate.definition and candidate.definition.strip():
         return True, "table definition present"
 
-    non_boilerplate = [
-        col for col in candidate.columns if col.name.strip().lower() not in _BOILERPLATE_COLUMN_NAMES
-    ]
-    if non_boilerplate:
+    if any(col.name.strip().lower() not in _BOILERPLATE_COLUMN_NAMES for col in candidate.columns):
         return True, "non-boilerplate columns present"
     return False, "only boilerplate fields available"
 
@@ -360,11 +475,20 @@ def generate_table_context_text(
     model: str,
     base_url: str,
 ) -> ContextGenerationResult:
+    """Generate context for one table; new results carry a `cache_entry` for `flush_cache`."""
     prompt = _build_prompt(candidate)
     key = _cache_key(model=model, prompt=prompt)
     cached = _cache_lookup(conn, key)
     if cached is not None:
         return cached
+    legacy = _cache_lookup(conn, _legacy_cache_key(model=model, prompt=prompt))
+    if legacy is not None:
+        # Re-store under the current key so the fallback is needed only once.
+        return ContextGenerationResult(
+            context_text=legacy.context_text,
+            reason=legacy.reason,
+            cache_entry=_cache_entry(key, legacy),
+        )
 
     has_signal, signal_reason = _has_reasonable_signal(candidate)
     if not has_signal:
@@ -372,15 +496,16 @@ def generate_table_context_text(
             context_text=None,
             reason=f"skipped: {signal_reason}",
         )
-        _cache_store(conn, key, result)
-        return result
-
-    text = _call_openai_chat(
-        api_key=api_key,
-        model=model,
-        base_url=base_url,
-        prompt=prompt,
+    else:
+        text = _call_openai_chat(
+            api_key=api_key,
+            model=model,
+            base_url=base_url,
+            prompt=prompt,
+        )
+        result = _parse_generation_output(text)
+    return ContextGenerationResult(
+        context_text=result.context_text,
+        reason=result.reason,
+        cache_entry=_cache_entry(key, result),
     )
-    result = _parse_generation_output(text)
-    _cache_store(conn, key, result)
-    return result
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import sqlite3
-from dataclasses import dataclass
-from urllib.parse import urlsplit
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 
 
 @dataclass
@@ -20,6 +21,11 @@ class ContextScope:
     object_name: str | None = None
     object_id: str | None = None
 
+    @cached_property
+    def child_prefix(self) -> str | None:
+        # Child synthetic object names are stored as "<parent>.<child>".
+        return f"{self.object_name}." if self.object_name else None
+
 
 @dataclass(frozen=True)
 class ObjectRef:
@@ -29,6 +35,10 @@ class ObjectRef:
     object_id: str
 
 
+# INSERT ... RETURNING needs SQLite 3.35+.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
 class InvalidContextTarget(ValueError):
     pass
 
@@ -42,21 +52,32 @@ def add_context(conn: sqlite3.Connection, target_uri: str, body: str) -> Context
     source_row = conn.execute("SELECT 1 FROM sources WHERE name = ?", (scope.source,)).fetchone()
     if source_row is None:
         raise ContextSourceNotFoundError(f"source '{scope.source}' not found")
-    conn.execute(
-        """
-        INSERT INTO contexts(target_uri, body)
-        VALUES(?, ?)
-        """,
-        (target_uri, body),
-    )
-    conn.commit()
-    row = conn.execute(
-        """
-        SELECT id, target_uri, body, created_at
-        FROM contexts
-        WHERE rowid = last_insert_rowid()
-        """
-    ).fetchone()
+    if _HAS_RETURNING:
+        row = conn.execute(
+            """
+            INSERT INTO contexts(target_uri, body)
+            VALUES(?, ?)
+            RETURNING id, target_uri, body, created_at
+            """,
+            (target_uri, body),
+        ).fetchone()
+        conn.commit()
+    else:
+        conn.execute(
+            """
+            INSERT INTO contexts(target_uri, body)
+            VALUES(?, ?)
+            """,
+            (target_uri, body),
+        )
+        conn.commit()
+        row = conn.execute(
+            """
+            SELECT id, target_uri, body, created_at
+            FROM contexts
+            WHERE rowid = last_insert_rowid()
+            """
+        ).fetchone()
     assert row is not None
     return ContextRecord(
         id=row["id"],
@@ -66,23 +87,45 @@ def add_context(conn: sqlite3.Connection, target_uri: str, body: str) -> Context
     )
 
 
+def replace_contexts(
+    conn: sqlite3.Connection,
+    entries: Sequence[tuple[str, str]],
+    *,
+    clear_uris: Sequence[str] = (),
+) -> None:
+    """Delete contexts for `clear_uris`, then insert `(target_uri, body)` entries, in one transaction."""
+    sources = {parse_context_target(target_uri).source for target_uri, _ in entries}
+    for source in sorted(sources):
+        if conn.execute("SELECT 1 FROM sources WHERE name = ?", (source,)).fetchone() is None:
+            raise ContextSourceNotFoundError(f"source '{source}' not found")
+    try:
+        conn.executemany("DELETE FROM contexts WHERE target_uri = ?", [(uri,) for uri in clear_uris])
+        conn.executemany(
+            """
+            INSERT INTO contexts(target_uri, body)
+            VALUES(?, ?)
+            """,
+            entries,
+        )
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
 def list_contexts(conn: sqlite3.Connection) -> list[ContextRecord]:
-    rows = conn.execute(
+    # Plain tuples on this cursor skip sqlite3.Row construction; the columns line
+    # up with ContextRecord's fields.
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(
         """
         SELECT id, target_uri, body, created_at
         FROM contexts
         ORDER BY id ASC
         """
-    ).fetchall()
-    return [
-        ContextRecord(
-            id=row["id"],
-            target_uri=row["target_uri"],
-            body=row["body"],
-            created_at=row["created_at"],
-        )
-        for row in rows
-    ]
+    )
+    return [ContextRecord(*row) for row in cursor.fetchall()]
 
 
 def remove_context(conn: sqlite3.Connection, key: str) -> int:
@@ -94,19 +137,23 @@ def remove_context(conn: sqlite3.Connection, key: str) -> int:
     return cursor.rowcount
 
 
+@lru_cache(maxsize=1024)
 def parse_context_target(target_uri: str) -> ContextScope:
-    parsed = urlsplit(target_uri)
-    if parsed.scheme != "qpg":
+    # Hand-rolled split of qpg://<source>/<path>?<query>#<object_id>; only the
+    # fixed scheme is accepted, so a general URL parser is not needed.
+    if target_uri[:6].lower() != "qpg://":
         raise InvalidContextTarget("context target must begin with qpg://")
-    if not parsed.netloc:
+    rest, _, fragment = target_uri[6:].partition("#")
+    rest = rest.partition("?")[0]
+    source, _, path = rest.partition("/")
+    if not source:
         raise InvalidContextTarget("context target must include a source name")
 
-    source = parsed.netloc
-    fragment = parsed.fragment.strip()
+    fragment = fragment.strip()
     if fragment:
         return ContextScope(source=source, object_id=fragment)
 
-    path = parsed.path.strip("/")
+    path = path.strip("/")
     if not path:
         return ContextScope(source=source)
 
@@ -135,27 +182,94 @@ def context_applies(scope: ContextScope, obj: ObjectRef) -> bool:
         return False
     if scope.schema and scope.schema != (obj.schema or ""):
         return False
-    if scope.object_name:
+    prefix = scope.child_prefix
+    if prefix:
         if scope.object_name == obj.object_name:
             return True
-        # Child synthetic object names are stored as "<parent>.<child>".
         # Treat parent object context as inherited by its children.
-        return obj.object_name.startswith(f"{scope.object_name}.")
+        return obj.object_name.startswith(prefix)
     return True
 
 
-def resolve_effective_context(
-    contexts: list[ContextRecord],
-    obj: ObjectRef,
-) -> str:
-    lines: list[str] = []
-    for ctx in contexts:
+def _scope_admits(scope: ContextScope, obj: ObjectRef) -> bool:
+    # context_applies minus the source and object-name checks, which the
+    # ContextIndex buckets have already settled.
+    if scope.object_id and scope.object_id != obj.object_id:
+        return False
+    return not scope.schema or scope.schema == (obj.schema or "")
+
+
+@dataclass(frozen=True)
+class ContextIndex:
+    """Contexts parsed once and bucketed for repeated per-object resolution."""
+
+    # (position, scope, body) entries; position keeps the original context order.
+    by_source: dict[str, list[tuple[int, ContextScope, str]]]
+    by_object_name: dict[tuple[str, str], list[tuple[int, ContextScope, str]]]
+    # Sources with "#<object_id>" targets, whose results also depend on the object id.
+    id_scoped_sources: frozenset[str] = frozenset()
+    # Objects that hit the same buckets with the same schema (e.g. a table's
+    # columns) resolve to the same text, so results are memoized per bucket set.
+    resolved: dict[tuple[str | None, ...], str] = field(default_factory=dict, compare=False, repr=False)
+
+
+def build_context_index(contexts: Sequence[ContextRecord]) -> ContextIndex:
+    by_source: dict[str, list[tuple[int, ContextScope, str]]] = {}
+    by_object_name: dict[tuple[str, str], list[tuple[int, ContextScope, str]]] = {}
+    id_scoped_sources: set[str] = set()
+    for position, ctx in enumerate(contexts):
         try:
             scope = parse_context_target(ctx.target_uri)
         except InvalidContextTarget:
             continue
-        if context_applies(scope, obj):
-            value = ctx.body.strip()
-            if value and value not in lines:
-                lines.append(value)
-    return "\n".join(lines)
+        value = ctx.body.strip()
+        if not value:
+            continue
+        if scope.object_name:
+            by_object_name.setdefault((scope.source, scope.object_name), []).append((position, scope, value))
+        else:
+            by_source.setdefault(scope.source, []).append((position, scope, value))
+            if scope.object_id:
+                id_scoped_sources.add(scope.source)
+    return ContextIndex(
+        by_source=by_source,
+        by_object_name=by_object_name,
+        id_scoped_sources=frozenset(id_scoped_sources),
+    )
+
+
+def resolve_indexed_context(index: ContextIndex, obj: ObjectRef) -> str:
+    # An object-name scope applies to the object itself and to children named
+    # "<parent>.<child>", so look up the full name and each dotted prefix of it.
+    matched_names: list[str] = []
+    name = obj.object_name
+    end = len(name)
+    while end > 0:
+        if (obj.source, name[:end]) in index.by_object_name:
+            matched_names.append(name[:end])
+        end = name.rfind(".", 0, end)
+    general = index.by_source.get(obj.source)
+    if not general and not matched_names:
+        return ""
+
+    object_id = obj.object_id if obj.source in index.id_scoped_sources else None
+    key = (obj.source, obj.schema or "", object_id, *matched_names)
+    cached = index.resolved.get(key)
+    if cached is not None:
+        return cached
+
+    candidates = list(general or ())
+    for matched in matched_names:
+        candidates.extend(index.by_object_name[(obj.source, matched)])
+    if len(candidates) > len(general or ()):
+        candidates.sort(key=lambda entry: entry[0])
+    lines = dict.fromkeys(value for _, scope, value in candidates if _scope_admits(scope, obj))
+    text = index.resolved[key] = "\n".join(lines)
+    return text
+
+
+def resolve_effective_context(
+    contexts: list[ContextRecord],
+    obj: ObjectRef,
+) -> str:
+    return resolve_indexed_context(build_context_index(contexts), obj)
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from collections.abc import Iterator, Sequence
+import atexit
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
 from contextlib import contextmanager
 from typing import Any
 
-import psycopg
-from psycopg.rows import dict_row
-
 from qpg.util.pg_dsn import enforce_readonly_dsn
 
 
@@ -14,6 +14,16 @@ class PostgresDependencyError(RuntimeError):
     pass
 
 
+# Connections are kept open between connect_pg calls in the same process, so
+# repeated introspection of a source skips the connect handshake and the session
+# guard round-trips. Idle connections older than _POOL_MAX_IDLE_SECONDS are
+# dropped rather than probed, since the server may have closed them.
+_POOL_MAX_IDLE = 4
+_POOL_MAX_IDLE_SECONDS = 60.0
+_POOL_LOCK = threading.Lock()
+_IDLE_CONNECTIONS: dict[tuple[str, str, str], list[tuple[Any, float]]] = {}
+
+
 @contextmanager
 def connect_pg(
     dsn: str,
@@ -21,6 +31,26 @@ def connect_pg(
     statement_timeout: str = "5s",
     idle_in_transaction_timeout: str = "10s",
 ) -> Iterator[Any]:
+    key = (dsn, statement_timeout, idle_in_transaction_timeout)
+    conn = _checkout(key)
+    if conn is None:
+        conn = _open_connection(
+            dsn,
+            statement_timeout=statement_timeout,
+            idle_in_transaction_timeout=idle_in_transaction_timeout,
+        )
+    try:
+        yield conn
+    except BaseException:
+        conn.close()
+        raise
+    _checkin(key, conn)
+
+
+def _open_connection(dsn: str, *, statement_timeout: str, idle_in_transaction_timeout: str) -> Any:
+    import psycopg
+    from psycopg.rows import dict_row
+
     conn = psycopg.connect(
         enforce_readonly_dsn(dsn),
         autocommit=True,
@@ -32,31 +62,126 @@ def connect_pg(
             statement_timeout=statement_timeout,
             idle_in_transaction_timeout=idle_in_transaction_timeout,
         )
-        yield conn
-    finally:
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _checkout(key: tuple[str, str, str]) -> Any | None:
+    stale: list[Any] = []
+    found = None
+    deadline = time.monotonic() - _POOL_MAX_IDLE_SECONDS
+    with _POOL_LOCK:
+        idle = _IDLE_CONNECTIONS.get(key, [])
+        while idle:
+            conn, returned_at = idle.pop()
+            if conn.closed or returned_at < deadline:
+                stale.append(conn)
+                continue
+            found = conn
+            break
+    for conn in stale:
+        conn.close()
+    return found
+
+
+def _checkin(key: tuple[str, str, str], conn: Any) -> None:
+    from psycopg.pq import TransactionStatus
+
+    if not conn.closed and conn.info.transaction_status == TransactionStatus.IDLE:
+        with _POOL_LOCK:
+            idle = _IDLE_CONNECTIONS.setdefault(key, [])
+            if len(idle) < _POOL_MAX_IDLE:
+                idle.append((conn, time.monotonic()))
+                return
+    conn.close()
+
+
+def close_pg_connections() -> None:
+    """Close every idle pooled Postgres connection."""
+    with _POOL_LOCK:
+        idle = [conn for entries in _IDLE_CONNECTIONS.values() for conn, _ in entries]
+        _IDLE_CONNECTIONS.clear()
+    for conn in idle:
         conn.close()
 
 
+atexit.register(close_pg_connections)
+
+
 def apply_session_guards(
     conn: Any,
     *,
     statement_timeout: str = "5s",
     idle_in_transaction_timeout: str = "10s",
 ) -> None:
-    with conn.cursor() as cur:
-        cur.execute("SELECT set_config('default_transaction_read_only', 'on', false)")
-        cur.execute("SELECT set_config('statement_timeout', %s, false)", (statement_timeout,))
-        cur.execute(
-            "SELECT set_config('idle_in_transaction_session_timeout', %s, false)",
-            (idle_in_transaction_timeout,),
-        )
+    # One statement, one round-trip: psycopg cannot bind parameters into a
+    # multi-statement SET batch, but set_config() takes them as arguments.
+    conn.execute(
+        """
+        SELECT set_config('default_transaction_read_only', 'on', false),
+               set_config('statement_timeout', %s, false),
+               set_config('idle_in_transaction_session_timeout', %s, false)
+        """,
+        (statement_timeout, idle_in_transaction_timeout),
+    )
 
 
 def fetch_all(conn: Any, sql: str, params: Sequence[Any] | None = None) -> list[dict[str, Any]]:
+    # connect_pg connections use dict_row, so rows are already dicts.
     with conn.cursor() as cur:
         cur.execute(sql, params or ())
-        rows = cur.fetchall()
-    return [dict(row) for row in rows]
+        rows: list[dict[str, Any]] = cur.fetchall()
+    return rows
+
+
+def fetch_many(conn: Any, sqls: Sequence[str], *, makers: Sequence[Callable[..., Any]]) -> list[list[Any]]:
+    """Run parameterless statements in a single round-trip, returning one row list per statement.
+
+    Each statement's rows are built by calling the matching maker with the row's
+    columns as positional arguments, so no intermediate dict is allocated.
+    """
+    from psycopg.rows import args_row
+
+    # Without parameters psycopg uses the simple query protocol, which accepts
+    # several statements and exposes each result through nextset().
+    results: list[list[Any]] = []
+    with conn.cursor() as cur:
+        cur.execute(";\n".join(sqls))
+        for position, maker in enumerate(makers):
+            if position and not cur.nextset():
+                raise RuntimeError(f"expected {len(makers)} result sets, got {position}")
+            cur.row_factory = args_row(maker)
+            results.append(cur.fetchall())
+    return results
+
+
+_STREAM_ITERSIZE = 2000
+
+
+def fetch_iter(
+    conn: Any,
+    sql: str,
+    params: Sequence[Any] | None = None,
+    *,
+    maker: Callable[..., Any] | None = None,
+) -> Iterator[Any]:
+    """Stream rows through a server-side cursor, fetching _STREAM_ITERSIZE rows per round-trip.
+
+    With ``maker``, each row is built by calling it with the columns as positional
+    arguments instead of as a dict.
+    """
+    options: dict[str, Any] = {}
+    if maker is not None:
+        from psycopg.rows import args_row
+
+        options["row_factory"] = args_row(maker)
+    # Server-side cursors live inside a transaction; the connection is autocommit.
+    with conn.transaction(), conn.cursor(name="qpg_stream", **options) as cur:
+        cur.itersize = _STREAM_ITERSIZE
+        cur.execute(sql, params or ())
+        yield from cur
 
 
 def fetch_one(conn: Any, sql: str, params: Sequence[Any] | None = None) -> dict[str, Any] | None:
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import sqlite3
+import struct
+import weakref
 from collections.abc import Iterable
 from contextlib import suppress
+from datetime import UTC, datetime
 from pathlib import Path
 
-import sqlite_vec  # type: ignore[import-untyped]
-
 from qpg.config import ensure_dirs
 
 
@@ -14,13 +15,67 @@ def now_expr() -> str:
     return "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
 
 
+def now_timestamp() -> str:
+    """The current time in `now_expr()` format, for binding one value across many rows."""
+    now = datetime.now(UTC)
+    return f"{now:%Y-%m-%dT%H:%M:%S}.{now.microsecond // 1000:03d}Z"
+
+
+# The index is read-mostly and rebuilt in discrete batches: WAL lets readers run
+# alongside a writer, and NORMAL sync is durable in WAL mode short of power loss.
+# auto_vacuum must precede the WAL switch to apply to a new file; existing indexes
+# move to incremental mode via `qpg cleanup --full`.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+# Shared with rebuild_fts, which recreates the table for full rebuilds.
+OBJECTS_FTS_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS objects_fts USING fts5(
+        object_id UNINDEXED,
+        source_name UNINDEXED,
+        schema_name UNINDEXED,
+        kind UNINDEXED,
+        name_col,
+        comment_col,
+        defs_col,
+        context_col,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """
+
+
+class _IndexConnection(sqlite3.Connection):
+    """sqlite3 connection that supports weak references, so per-connection facts can be cached."""
+
+
+# Keyed weakly so entries go away with their connection instead of outliving it
+# under a reused id().
+_VEC_PROBE = struct.pack("<2f", 0.0, 1.0)
+_VEC_FUNCTIONS: weakref.WeakKeyDictionary[sqlite3.Connection, bool] = weakref.WeakKeyDictionary()
+
+
 def connect_sqlite(path: Path | None = None, *, check_same_thread: bool = True) -> sqlite3.Connection:
     paths = ensure_dirs()
     db_path = path or paths.index_db
-    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    # Room for every statement of a source rebuild plus the query paths.
+    conn = sqlite3.connect(
+        db_path,
+        check_same_thread=check_same_thread,
+        cached_statements=256,
+        factory=_IndexConnection,
+    )
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    conn.execute("PRAGMA journal_mode = WAL")
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
@@ -29,9 +84,28 @@ def _executescript(conn: sqlite3.Connection, statements: Iterable[str]) -> None:
         conn.execute(statement)
 
 
+_READY_SCHEMA_VERSIONS: dict[str, int] = {}
+
+
+def _database_file(conn: sqlite3.Connection) -> str:
+    for row in conn.execute("PRAGMA database_list").fetchall():
+        if row[1] == "main":
+            return str(row[2] or "")
+    return ""
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA schema_version").fetchone()[0])
+
+
 def ensure_schema(conn: sqlite3.Connection) -> bool:
     vec_loaded = load_sqlite_vec(conn)
 
+    # In-memory databases have no file to key on and always get the full DDL.
+    db_file = _database_file(conn)
+    if db_file and _READY_SCHEMA_VERSIONS.get(db_file) == _schema_version(conn):
+        return vec_loaded
+
     ddl = [
         f"""
         CREATE TABLE IF NOT EXISTS sources (
@@ -135,6 +209,10 @@ def ensure_schema(conn: sqlite3.Connection) -> bool:
             created_at TEXT NOT NULL DEFAULT ({now_expr()})
         )
         """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_contexts_target_uri
+        ON contexts(target_uri)
+        """,
         f"""
         CREATE TABLE IF NOT EXISTS object_context_effective (
             object_id TEXT PRIMARY KEY REFERENCES db_objects(id) ON DELETE CASCADE,
@@ -153,25 +231,15 @@ def ensure_schema(conn: sqlite3.Connection) -> bool:
             updated_at TEXT NOT NULL DEFAULT ({now_expr()})
         )
         """,
-        """
-        CREATE VIRTUAL TABLE IF NOT EXISTS objects_fts USING fts5(
-            object_id UNINDEXED,
-            source_name UNINDEXED,
-            schema_name UNINDEXED,
-            kind UNINDEXED,
-            name_col,
-            comment_col,
-            defs_col,
-            context_col,
-            tokenize = 'unicode61 remove_diacritics 2'
-        )
-        """,
+        OBJECTS_FTS_DDL,
         f"""
         CREATE TABLE IF NOT EXISTS object_vectors (
             object_id TEXT PRIMARY KEY REFERENCES db_objects(id) ON DELETE CASCADE,
             embedding BLOB NOT NULL,
             model TEXT NOT NULL DEFAULT 'codebert-base-v1',
-            updated_at TEXT NOT NULL DEFAULT ({now_expr()})
+            updated_at TEXT NOT NULL DEFAULT ({now_expr()}),
+            content_hash TEXT,
+            scale REAL
         )
         """,
         """
@@ -190,7 +258,10 @@ def ensure_schema(conn: sqlite3.Connection) -> bool:
 
     _executescript(conn, ddl)
     _ensure_sources_columns(conn)
+    _ensure_object_vectors_columns(conn)
     conn.commit()
+    if db_file:
+        _READY_SCHEMA_VERSIONS[db_file] = _schema_version(conn)
     return vec_loaded
 
 
@@ -202,7 +273,17 @@ def _ensure_sources_columns(conn: sqlite3.Connection) -> None:
         conn.execute("ALTER TABLE sources ADD COLUMN skip_patterns_json TEXT")
 
 
+def _ensure_object_vectors_columns(conn: sqlite3.Connection) -> None:
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(object_vectors)").fetchall()}
+    if "content_hash" not in columns:
+        conn.execute("ALTER TABLE object_vectors ADD COLUMN content_hash TEXT")
+    if "scale" not in columns:
+        conn.execute("ALTER TABLE object_vectors ADD COLUMN scale REAL")
+
+
 def load_sqlite_vec(conn: sqlite3.Connection) -> bool:
+    import sqlite_vec  # type: ignore[import-untyped]
+
     try:
         conn.enable_load_extension(True)
         sqlite_vec.load(conn)
@@ -211,4 +292,21 @@ def load_sqlite_vec(conn: sqlite3.Connection) -> bool:
     finally:
         with suppress(Exception):
             conn.enable_load_extension(False)
+    with suppress(TypeError):
+        _VEC_FUNCTIONS[conn] = True
     return True
+
+
+def has_vec_functions(conn: sqlite3.Connection) -> bool:
+    """Whether sqlite-vec's SQL functions are callable on this connection, probed once per connection."""
+    with suppress(KeyError, TypeError):
+        return _VEC_FUNCTIONS[conn]
+    # Probe with a float32 blob: that is the form vectors are written and queried in.
+    try:
+        available = bool(conn.execute("SELECT vec_length(vec_f32(?))", (_VEC_PROBE,)).fetchone()[0] == 2)
+    except sqlite3.DatabaseError:
+        available = False
+    # Plain sqlite3.Connection objects cannot be weakly referenced; they are probed every time.
+    with suppress(TypeError):
+        _VEC_FUNCTIONS[conn] = available
+    return available
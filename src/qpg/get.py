@@ -2,19 +2,104 @@ from __future__ import annotations
 
 import json
 import sqlite3
-from typing import Any, cast
+from collections.abc import Sequence
+from typing import Any
 
 
 class ObjectNotFoundError(RuntimeError):
     pass
 
 
-def _resolve_object_row(
+# Each related table is folded into one JSON array per object, already shaped like
+# the payload, so objects load in one statement and Python does one json.loads per
+# subtree instead of building dicts row by row.
+_JSON_LIST_EXPR = (
+    "CASE WHEN json_valid({col}) THEN "
+    "CASE WHEN json_type({col}) = 'array' THEN json({col}) ELSE json('[]') END "
+    "ELSE json('[]') END"
+)
+_RELATED_JSON_SELECT = f"""
+    (SELECT json_group_array(json_object(
+                'name', column_name,
+                'type', data_type,
+                'nullable', json(CASE WHEN is_nullable THEN 'true' ELSE 'false' END),
+                'ordinal', ordinal_position,
+                'default', default_expr,
+                'comment', comment))
+     FROM (SELECT * FROM columns WHERE object_id = o.id ORDER BY ordinal_position ASC)) AS columns_json,
+    (SELECT json_group_array(json_object(
+                'name', constraint_name,
+                'type', constraint_type,
+                'definition', COALESCE(definition, ''),
+                'columns', {_JSON_LIST_EXPR.format(col="columns_json")}))
+     FROM (SELECT * FROM constraints WHERE object_id = o.id ORDER BY constraint_name ASC)) AS constraints_json,
+    (SELECT json_group_array(json_object(
+                'name', index_name,
+                'definition', COALESCE(definition, ''),
+                'is_unique', json(CASE WHEN is_unique THEN 'true' ELSE 'false' END),
+                'is_primary', json(CASE WHEN is_primary THEN 'true' ELSE 'false' END),
+                'columns', {_JSON_LIST_EXPR.format(col="columns_json")}))
+     FROM (SELECT * FROM indexes WHERE object_id = o.id ORDER BY index_name ASC)) AS indexes_json,
+    (SELECT json_group_array(json_object(
+                'type', dependency_type,
+                'object_id', depends_on_object_id,
+                'fqname', depends_on_fqname))
+     FROM (
+        SELECT d.dependency_type, d.depends_on_object_id, t.fqname AS depends_on_fqname
+        FROM dependencies d
+        LEFT JOIN db_objects t ON t.id = d.depends_on_object_id
+        WHERE d.object_id = o.id
+        ORDER BY d.id ASC
+     )) AS dependencies_json,
+    (SELECT context_text FROM object_context_effective WHERE object_id = o.id) AS context_text
+"""
+
+
+_BATCH_SIZE = 500
+
+_OBJECT_SELECT = f"""
+    SELECT o.id,
+           o.fqname,
+           o.schema_name,
+           o.object_name,
+           o.object_type,
+           o.definition,
+           o.comment,
+           o.signature,
+           o.owner,
+           s.name AS source_name,
+           {_RELATED_JSON_SELECT}
+    FROM db_objects o
+    JOIN sources s ON s.id = o.source_id
+"""
+
+
+def _payload_from_row(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "object_id": row["id"],
+        "source": row["source_name"],
+        "fqname": row["fqname"],
+        "schema": row["schema_name"],
+        "name": row["object_name"],
+        "kind": row["object_type"],
+        "definition": row["definition"] or "",
+        "comment": row["comment"] or "",
+        "signature": row["signature"],
+        "owner": row["owner"],
+        "columns": json.loads(row["columns_json"]),
+        "constraints": json.loads(row["constraints_json"]),
+        "indexes": json.loads(row["indexes_json"]),
+        "dependencies": json.loads(row["dependencies_json"]),
+        "context": row["context_text"] or "",
+    }
+
+
+def get_object_payload(
     conn: sqlite3.Connection,
     ref: str,
     *,
     source: str | None = None,
-) -> sqlite3.Row:
+) -> dict[str, Any]:
     params: list[Any] = []
     where_parts: list[str] = []
 
@@ -31,18 +116,7 @@ def _resolve_object_row(
 
     row = conn.execute(
         f"""
-        SELECT o.id,
-               o.fqname,
-               o.schema_name,
-               o.object_name,
-               o.object_type,
-               o.definition,
-               o.comment,
-               o.signature,
-               o.owner,
-               s.name AS source_name
-        FROM db_objects o
-        JOIN sources s ON s.id = o.source_id
+        {_OBJECT_SELECT}
         WHERE {' AND '.join(where_parts)}
         ORDER BY o.fqname ASC
         LIMIT 1
@@ -52,129 +126,21 @@ def _resolve_object_row(
 
     if row is None:
         raise ObjectNotFoundError(f"object '{ref}' not found")
-    return cast(sqlite3.Row, row)
+    return _payload_from_row(row)
 
 
-def _decode_json_list(value: str | None) -> list[Any]:
-    if not value:
-        return []
-    try:
-        parsed = json.loads(value)
-    except json.JSONDecodeError:
-        return []
-    return parsed if isinstance(parsed, list) else []
-
-
-def get_object_payload(
+def get_object_payloads(
     conn: sqlite3.Connection,
-    ref: str,
-    *,
-    source: str | None = None,
-) -> dict[str, Any]:
-    row = _resolve_object_row(conn, ref, source=source)
-    object_id = row["id"]
-
-    columns = conn.execute(
-        """
-        SELECT column_name, data_type, is_nullable, ordinal_position, default_expr, comment
-        FROM columns
-        WHERE object_id = ?
-        ORDER BY ordinal_position ASC
-        """,
-        (object_id,),
-    ).fetchall()
-
-    constraints = conn.execute(
-        """
-        SELECT constraint_name, constraint_type, definition, columns_json
-        FROM constraints
-        WHERE object_id = ?
-        ORDER BY constraint_name ASC
-        """,
-        (object_id,),
-    ).fetchall()
-
-    indexes = conn.execute(
-        """
-        SELECT index_name, definition, is_unique, is_primary, columns_json
-        FROM indexes
-        WHERE object_id = ?
-        ORDER BY index_name ASC
-        """,
-        (object_id,),
-    ).fetchall()
-
-    dependencies = conn.execute(
-        """
-        SELECT d.dependency_type,
-               d.depends_on_object_id,
-               o.fqname AS depends_on_fqname
-        FROM dependencies d
-        LEFT JOIN db_objects o ON o.id = d.depends_on_object_id
-        WHERE d.object_id = ?
-        ORDER BY d.id ASC
-        """,
-        (object_id,),
-    ).fetchall()
-
-    context = conn.execute(
-        """
-        SELECT context_text
-        FROM object_context_effective
-        WHERE object_id = ?
-        """,
-        (object_id,),
-    ).fetchone()
-
-    payload = {
-        "object_id": object_id,
-        "source": row["source_name"],
-        "fqname": row["fqname"],
-        "schema": row["schema_name"],
-        "name": row["object_name"],
-        "kind": row["object_type"],
-        "definition": row["definition"] or "",
-        "comment": row["comment"] or "",
-        "signature": row["signature"],
-        "owner": row["owner"],
-        "columns": [
-            {
-                "name": col["column_name"],
-                "type": col["data_type"],
-                "nullable": bool(col["is_nullable"]),
-                "ordinal": col["ordinal_position"],
-                "default": col["default_expr"],
-                "comment": col["comment"],
-            }
-            for col in columns
-        ],
-        "constraints": [
-            {
-                "name": con["constraint_name"],
-                "type": con["constraint_type"],
-                "definition": con["definition"] or "",
-                "columns": _decode_json_list(con["columns_json"]),
-            }
-            for con in constraints
-        ],
-        "indexes": [
-            {
-                "name": idx["index_name"],
-                "definition": idx["definition"] or "",
-                "is_unique": bool(idx["is_unique"]),
-                "is_primary": bool(idx["is_primary"]),
-                "columns": _decode_json_list(idx["columns_json"]),
-            }
-            for idx in indexes
-        ],
-        "dependencies": [
-            {
-                "type": dep["dependency_type"],
-                "object_id": dep["depends_on_object_id"],
-                "fqname": dep["depends_on_fqname"],
-            }
-            for dep in dependencies
-        ],
-        "context": context["context_text"] if context else "",
-    }
-    return payload
+    object_ids: Sequence[str],
+) -> dict[str, dict[str, Any]]:
+    """Load payloads for many objects with one query per batch, keyed by object id."""
+    unique_ids = list(dict.fromkeys(object_ids))
+    payloads: dict[str, dict[str, Any]] = {}
+
+    for start in range(0, len(unique_ids), _BATCH_SIZE):
+        batch = unique_ids[start : start + _BATCH_SIZE]
+        placeholders = ", ".join("?" for _ in batch)
+        for row in conn.execute(f"{_OBJECT_SELECT} WHERE o.id IN ({placeholders})", batch):
+            payloads[row["id"]] = _payload_from_row(row)
+
+    return payloads
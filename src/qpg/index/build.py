@@ -4,13 +4,132 @@ import json
 import sqlite3
 from dataclasses import dataclass
 
-from qpg.contexts import ContextRecord, ObjectRef, resolve_effective_context
+from qpg.contexts import ContextRecord, ObjectRef, build_context_index, resolve_indexed_context
+from qpg.db_sqlite import now_timestamp
 from qpg.index.fts import rebuild_fts
-from qpg.index.vec import upsert_embedding
+from qpg.index.vec import embedding_content_hash, upsert_embeddings, vector_storage_model
 from qpg.schema.introspect import IntrospectionBundle
-from qpg.schema.normalize import normalize_object
+from qpg.schema.normalize import NormalizedObject, normalize_object
 from qpg.sources import SourceRecord
 
+# Compact encoder for the per-row column lists, built once and called directly
+# rather than going through json.dumps' keyword handling on every row.
+_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+# Rebuild statements, shared by every source so sqlite3's per-connection
+# statement cache (keyed by SQL text) keeps them prepared across rebuilds.
+_UPSERT_OBJECT_SQL = """
+    INSERT INTO db_objects(
+        id,
+        source_id,
+        schema_name,
+        object_name,
+        object_type,
+        fqname,
+        definition,
+        comment,
+        signature,
+        owner,
+        is_system,
+        updated_at
+    ) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        source_id = excluded.source_id,
+        schema_name = excluded.schema_name,
+        object_name = excluded.object_name,
+        object_type = excluded.object_type,
+        fqname = excluded.fqname,
+        definition = excluded.definition,
+        comment = excluded.comment,
+        signature = excluded.signature,
+        owner = excluded.owner,
+        is_system = excluded.is_system,
+        updated_at = excluded.updated_at
+    """
+
+_INSERT_COLUMN_SQL = """
+    INSERT INTO columns(
+        object_id,
+        column_name,
+        data_type,
+        is_nullable,
+        ordinal_position,
+        default_expr,
+        comment,
+        updated_at
+    ) VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+_INSERT_CONSTRAINT_SQL = """
+    INSERT INTO constraints(
+        object_id,
+        constraint_name,
+        constraint_type,
+        definition,
+        columns_json,
+        updated_at
+    ) VALUES(?, ?, ?, ?, ?, ?)
+    """
+
+_INSERT_INDEX_SQL = """
+    INSERT INTO indexes(
+        object_id,
+        index_name,
+        definition,
+        is_unique,
+        is_primary,
+        columns_json,
+        updated_at
+    ) VALUES(?, ?, ?, ?, ?, ?, ?)
+    """
+
+_INSERT_DEPENDENCY_SQL = """
+    INSERT INTO dependencies(
+        object_id,
+        depends_on_object_id,
+        dependency_type,
+        updated_at
+    ) VALUES(?, ?, ?, ?)
+    """
+
+_CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE _qpg_lexical_staging (
+        object_id TEXT PRIMARY KEY,
+        source_id INTEGER NOT NULL,
+        name_col TEXT NOT NULL,
+        comment_col TEXT NOT NULL,
+        defs_col TEXT NOT NULL,
+        context_col TEXT NOT NULL
+    )
+    """
+
+_INSERT_STAGING_SQL = """
+    INSERT INTO _qpg_lexical_staging(object_id, source_id, name_col, comment_col, defs_col, context_col)
+    VALUES(?, ?, ?, ?, ?, ?)
+    """
+
+_UPSERT_CONTEXT_FROM_STAGING_SQL = """
+    INSERT INTO object_context_effective(object_id, context_text, updated_at)
+    SELECT object_id, context_col, ? FROM _qpg_lexical_staging WHERE context_col != ''
+    ON CONFLICT(object_id) DO UPDATE SET
+        context_text = excluded.context_text,
+        updated_at = excluded.updated_at
+    """
+
+_INSERT_LEXICAL_FROM_STAGING_SQL = """
+    INSERT INTO lexical_docs(
+        object_id,
+        source_id,
+        name_col,
+        comment_col,
+        defs_col,
+        context_col,
+        updated_at
+    )
+    SELECT object_id, source_id, name_col, comment_col, defs_col, context_col, ?
+    FROM _qpg_lexical_staging
+    """
+
 
 @dataclass
 class UpdateStats:
@@ -29,14 +148,50 @@ def update_source_index(
     bundle: IntrospectionBundle,
     contexts: list[ContextRecord],
 ) -> UpdateStats:
-    conn.execute("DELETE FROM db_objects WHERE source_id = ?", (source.id,))
+    # The whole rebuild is one explicit write transaction: the write lock is taken
+    # up front, and a failure leaves the previous index intact instead of letting a
+    # later commit persist a half-written source.
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        stats = _rebuild_source_index(conn, source=source, bundle=bundle, contexts=contexts)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return stats
+
+
+def _rebuild_source_index(
+    conn: sqlite3.Connection,
+    *,
+    source: SourceRecord,
+    bundle: IntrospectionBundle,
+    contexts: list[ContextRecord],
+) -> UpdateStats:
+    # Objects are upserted in place rather than deleted and re-inserted, so the
+    # vectors of unchanged objects survive the rebuild (see the embedding loop).
+    # Per-object detail rows are still rebuilt from scratch.
+    for table in ("columns", "constraints", "indexes", "dependencies"):
+        conn.execute(
+            f"DELETE FROM {table} WHERE object_id IN (SELECT id FROM db_objects WHERE source_id = ?)",
+            (source.id,),
+        )
+    # One timestamp for the whole rebuild keeps every INSERT's SQL text identical,
+    # so each table is written with a single executemany over a reused statement.
+    updated_at = now_timestamp()
+    column_rows: list[tuple[object, ...]] = []
+    constraint_rows: list[tuple[object, ...]] = []
+    index_rows: list[tuple[object, ...]] = []
+    dependency_rows: list[tuple[object, ...]] = []
 
-    root_fqname_to_id: dict[str, str] = {}
-    root_schema_by_fqname: dict[str, str | None] = {}
+    # fqname -> (object_id, schema_name, object name without schema) for root objects,
+    # so child rows resolve their parent with one lookup.
+    root_by_fqname: dict[str, tuple[str, str | None, str]] = {}
+    # Root and synthetic child objects alike, keyed by object id; their db_objects
+    # rows are built from this in one pass once every loop has run.
+    normalized_by_id: dict[str, NormalizedObject] = {}
     defs_map: dict[str, list[str]] = {}
-    comments_map: dict[str, str] = {}
-    object_name_map: dict[str, str] = {}
-    schema_map: dict[str, str | None] = {}
 
     def register_object(
         *,
@@ -48,6 +203,7 @@ def update_source_index(
         signature: str | None = None,
         owner: str | None = None,
         is_system: bool = False,
+        fqname: str | None = None,
     ) -> str:
         normalized = normalize_object(
             source_name=source.name,
@@ -59,42 +215,10 @@ def update_source_index(
             signature=signature,
             owner=owner,
             is_system=is_system,
+            fqname=fqname,
         )
-        conn.execute(
-            """
-            INSERT INTO db_objects(
-                id,
-                source_id,
-                schema_name,
-                object_name,
-                object_type,
-                fqname,
-                definition,
-                comment,
-                signature,
-                owner,
-                is_system,
-                updated_at
-            ) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            """,
-            (
-                normalized.object_id,
-                source.id,
-                normalized.schema_name,
-                normalized.object_name,
-                normalized.object_type,
-                normalized.fqname,
-                normalized.definition,
-                normalized.comment,
-                normalized.signature,
-                normalized.owner,
-                int(normalized.is_system),
-            ),
-        )
+        normalized_by_id[normalized.object_id] = normalized
         defs_map[normalized.object_id] = [normalized.definition]
-        comments_map[normalized.object_id] = normalized.comment
-        object_name_map[normalized.object_id] = normalized.object_name
-        schema_map[normalized.object_id] = normalized.schema_name
         return normalized.object_id
 
     for obj in bundle.objects:
@@ -107,29 +231,21 @@ def update_source_index(
             signature=obj.signature,
             owner=obj.owner,
             is_system=obj.is_system,
+            fqname=obj.fqname,
+        )
+        root_by_fqname[obj.fqname] = (
+            object_id,
+            obj.schema_name,
+            obj.fqname.split(".", 1)[1] if "." in obj.fqname else obj.fqname,
         )
-        root_fqname_to_id[obj.fqname] = object_id
-        root_schema_by_fqname[obj.fqname] = obj.schema_name
 
     col_count = 0
     for column in bundle.columns:
-        parent_object_id = root_fqname_to_id.get(column.parent_fqname)
-        parent_schema = root_schema_by_fqname.get(column.parent_fqname)
-        if parent_object_id is None:
+        parent = root_by_fqname.get(column.parent_fqname)
+        if parent is None:
             continue
-        conn.execute(
-            """
-            INSERT INTO columns(
-                object_id,
-                column_name,
-                data_type,
-                is_nullable,
-                ordinal_position,
-                default_expr,
-                comment,
-                updated_at
-            ) VALUES(?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            """,
+        parent_object_id, parent_schema, parent_object_name = parent
+        column_rows.append(
             (
                 parent_object_id,
                 column.column_name,
@@ -138,17 +254,13 @@ def update_source_index(
                 column.ordinal_position,
                 column.default_expr,
                 column.comment,
-            ),
+                updated_at,
+            )
         )
         col_count += 1
         default_part = f" default={column.default_expr}" if column.default_expr else ""
         defs_map[parent_object_id].append(f"column {column.column_name} {column.data_type}{default_part}")
 
-        parent_object_name = (
-            column.parent_fqname.split(".", 1)[1]
-            if "." in column.parent_fqname
-            else column.parent_fqname
-        )
         register_object(
             schema_name=parent_schema,
             object_name=f"{parent_object_name}.{column.column_name}",
@@ -160,39 +272,25 @@ def update_source_index(
 
     constraint_count = 0
     for constraint in bundle.constraints:
-        parent_object_id = root_fqname_to_id.get(constraint.parent_fqname)
-        parent_schema = root_schema_by_fqname.get(constraint.parent_fqname)
-        if parent_object_id is None:
+        parent = root_by_fqname.get(constraint.parent_fqname)
+        if parent is None:
             continue
-        conn.execute(
-            """
-            INSERT INTO constraints(
-                object_id,
-                constraint_name,
-                constraint_type,
-                definition,
-                columns_json,
-                updated_at
-            ) VALUES(?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            """,
+        parent_object_id, parent_schema, parent_object_name = parent
+        constraint_rows.append(
             (
                 parent_object_id,
                 constraint.constraint_name,
                 constraint.constraint_type,
                 constraint.definition,
-                json.dumps(constraint.columns),
-            ),
+                _JSON_ENCODER.encode(constraint.columns),
+                updated_at,
+            )
         )
         constraint_count += 1
         defs_map[parent_object_id].append(
             f"constraint {constraint.constraint_name} {constraint.definition}"
         )
 
-        parent_object_name = (
-            constraint.parent_fqname.split(".", 1)[1]
-            if "." in constraint.parent_fqname
-            else constraint.parent_fqname
-        )
         register_object(
             schema_name=parent_schema,
             object_name=f"{parent_object_name}.{constraint.constraint_name}",
@@ -204,39 +302,24 @@ def update_source_index(
 
     index_count = 0
     for index in bundle.indexes:
-        parent_object_id = root_fqname_to_id.get(index.parent_fqname)
-        parent_schema = root_schema_by_fqname.get(index.parent_fqname)
-        if parent_object_id is None:
+        parent = root_by_fqname.get(index.parent_fqname)
+        if parent is None:
             continue
-        conn.execute(
-            """
-            INSERT INTO indexes(
-                object_id,
-                index_name,
-                definition,
-                is_unique,
-                is_primary,
-                columns_json,
-                updated_at
-            ) VALUES(?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            """,
+        parent_object_id, parent_schema, parent_object_name = parent
+        index_rows.append(
             (
                 parent_object_id,
                 index.index_name,
                 index.definition,
                 int(index.is_unique),
                 int(index.is_primary),
-                json.dumps(index.columns),
-            ),
+                _JSON_ENCODER.encode(index.columns),
+                updated_at,
+            )
         )
         index_count += 1
         defs_map[parent_object_id].append(f"index {index.index_name} {index.definition}")
 
-        parent_object_name = (
-            index.parent_fqname.split(".", 1)[1]
-            if "." in index.parent_fqname
-            else index.parent_fqname
-        )
         register_object(
             schema_name=parent_schema,
             object_name=f"{parent_object_name}.{index.index_name}",
@@ -248,23 +331,44 @@ def update_source_index(
 
     dep_count = 0
     for dep in bundle.dependencies:
-        dep_object_id = root_fqname_to_id.get(dep.parent_fqname)
-        depends_on_id = root_fqname_to_id.get(dep.depends_on_fqname)
-        if dep_object_id is None or depends_on_id is None:
+        dep_parent = root_by_fqname.get(dep.parent_fqname)
+        depends_on = root_by_fqname.get(dep.depends_on_fqname)
+        if dep_parent is None or depends_on is None:
             continue
-        conn.execute(
-            """
-            INSERT INTO dependencies(
-                object_id,
-                depends_on_object_id,
-                dependency_type,
-                updated_at
-            ) VALUES(?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            """,
-            (dep_object_id, depends_on_id, dep.dependency_type),
-        )
+        dependency_rows.append((dep_parent[0], depends_on[0], dep.dependency_type, updated_at))
         dep_count += 1
 
+    # Objects that disappeared from the source go first (cascading to their vectors),
+    # then db_objects is written before the child tables that reference it.
+    conn.execute(
+        "DELETE FROM db_objects WHERE source_id = ? AND id NOT IN (SELECT value FROM json_each(?))",
+        (source.id, _JSON_ENCODER.encode(list(normalized_by_id))),
+    )
+    conn.executemany(
+        _UPSERT_OBJECT_SQL,
+        [
+            (
+                normalized.object_id,
+                source.id,
+                normalized.schema_name,
+                normalized.object_name,
+                normalized.object_type,
+                normalized.fqname,
+                normalized.definition,
+                normalized.comment,
+                normalized.signature,
+                normalized.owner,
+                int(normalized.is_system),
+                updated_at,
+            )
+            for normalized in normalized_by_id.values()
+        ],
+    )
+    conn.executemany(_INSERT_COLUMN_SQL, column_rows)
+    conn.executemany(_INSERT_CONSTRAINT_SQL, constraint_rows)
+    conn.executemany(_INSERT_INDEX_SQL, index_rows)
+    conn.executemany(_INSERT_DEPENDENCY_SQL, dependency_rows)
+
     conn.execute(
         "DELETE FROM object_context_effective WHERE object_id IN (SELECT id FROM db_objects WHERE source_id = ?)",
         (source.id,),
@@ -272,55 +376,60 @@ def update_source_index(
     conn.execute("DELETE FROM lexical_docs WHERE source_id = ?", (source.id,))
 
     vector_count = 0
+    context_index = build_context_index(contexts)
+    embedded_hashes: dict[str, str] = dict(
+        conn.execute(
+            """
+            SELECT v.object_id, v.content_hash
+            FROM object_vectors v
+            JOIN db_objects o ON o.id = v.object_id
+            WHERE o.source_id = ? AND v.content_hash IS NOT NULL AND v.model = ?
+            """,
+            (source.id, vector_storage_model(conn)),
+        ).fetchall()
+    )
+    staging_rows: list[tuple[object, ...]] = []
+    embedding_rows: list[tuple[str, str, str]] = []
 
-    for object_id, obj_name in object_name_map.items():
-        schema: str | None = schema_map[object_id]
+    for object_id, normalized in normalized_by_id.items():
+        schema = normalized.schema_name
+        obj_name = normalized.object_name
         obj_ref = ObjectRef(
             source=source.name,
             schema=schema,
             object_name=obj_name,
             object_id=object_id,
         )
-        context_text = resolve_effective_context(contexts, obj_ref)
-        if context_text:
-            conn.execute(
-                """
-                INSERT INTO object_context_effective(object_id, context_text, updated_at)
-                VALUES(?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-                ON CONFLICT(object_id) DO UPDATE SET
-                    context_text = excluded.context_text,
-                    updated_at = excluded.updated_at
-                """,
-                (object_id, context_text),
-            )
+        context_text = resolve_indexed_context(context_index, obj_ref)
 
-        comment_text = comments_map.get(object_id, "")
+        comment_text = normalized.comment
         defs_text = "\n".join(part for part in defs_map.get(object_id, []) if part)
         name_col = obj_name if schema is None else f"{schema}.{obj_name}"
-        conn.execute(
-            """
-            INSERT INTO lexical_docs(
-                object_id,
-                source_id,
-                name_col,
-                comment_col,
-                defs_col,
-                context_col,
-                updated_at
-            ) VALUES(?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            """,
-            (object_id, source.id, name_col, comment_text, defs_text, context_text),
-        )
+        staging_rows.append((object_id, source.id, name_col, comment_text, defs_text, context_text))
 
         vector_text = "\n".join(part for part in [name_col, comment_text, defs_text, context_text] if part)
-        upsert_embedding(conn, object_id=object_id, text=vector_text)
+        # Embedding dominates rebuild time; skip it when the input text is unchanged.
+        content_hash = embedding_content_hash(vector_text)
+        if embedded_hashes.get(object_id) != content_hash:
+            embedding_rows.append((object_id, vector_text, content_hash))
         vector_count += 1
 
+    upsert_embeddings(conn, embedding_rows, updated_at=updated_at)
+
+    # Effective context and lexical docs share most of their columns, so each row is
+    # bound once into a temp staging table and both tables are filled set-based from
+    # it. The temp table is created inside the rebuild transaction, so a rollback
+    # discards it along with everything else.
+    conn.execute(_CREATE_STAGING_SQL)
+    conn.executemany(_INSERT_STAGING_SQL, staging_rows)
+    conn.execute(_UPSERT_CONTEXT_FROM_STAGING_SQL, (updated_at,))
+    conn.execute(_INSERT_LEXICAL_FROM_STAGING_SQL, (updated_at,))
+    conn.execute("DROP TABLE temp._qpg_lexical_staging")
+
     rebuild_fts(conn, source_id=source.id)
-    conn.commit()
 
     return UpdateStats(
-        objects=len(object_name_map),
+        objects=len(normalized_by_id),
         columns=col_count,
         constraints=constraint_count,
         indexes=index_count,
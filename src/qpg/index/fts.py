@@ -2,94 +2,119 @@ from __future__ import annotations
 
 import re
 import sqlite3
+from collections.abc import Iterator
+from functools import lru_cache
 from typing import Any
 
+from qpg.db_sqlite import OBJECTS_FTS_DDL
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
+
 
 def _sanitize_tokens(text: str) -> list[str]:
-    return re.findall(r"[A-Za-z0-9_]+", text)
+    return _TOKEN_RE.findall(text)
 
 
 def make_match_query(text: str) -> str:
     tokens = _sanitize_tokens(text)
     if not tokens:
         return '""'
-    return " OR ".join(f'"{token}"' for token in tokens)
+    return " OR ".join([f'"{token}"' for token in tokens])
+
+
+_INSERT_FTS_SQL = """
+    INSERT INTO objects_fts(
+        object_id,
+        source_name,
+        schema_name,
+        kind,
+        name_col,
+        comment_col,
+        defs_col,
+        context_col
+    )
+    SELECT ld.object_id,
+           s.name,
+           o.schema_name,
+           o.object_type,
+           ld.name_col,
+           ld.comment_col,
+           ld.defs_col,
+           ld.context_col
+    FROM lexical_docs ld
+    JOIN db_objects o ON o.id = ld.object_id
+    JOIN sources s ON s.id = ld.source_id
+    """
 
 
 def rebuild_fts(conn: sqlite3.Connection, *, source_id: int | None = None) -> None:
+    # Rows are copied inside SQLite with one INSERT ... SELECT; none pass through Python.
     if source_id is None:
-        conn.execute("DELETE FROM objects_fts")
-        rows = conn.execute(
-            """
-            SELECT ld.object_id,
-                   s.name AS source_name,
-                   o.schema_name,
-                   o.object_type,
-                   ld.name_col,
-                   ld.comment_col,
-                   ld.defs_col,
-                   ld.context_col
-            FROM lexical_docs ld
-            JOIN db_objects o ON o.id = ld.object_id
-            JOIN sources s ON s.id = ld.source_id
-            """
-        ).fetchall()
-    else:
-        conn.execute(
-            """
-            DELETE FROM objects_fts
-            WHERE object_id IN (
-                SELECT object_id FROM lexical_docs WHERE source_id = ?
-            )
-            """,
-            (source_id,),
+        # Deleting from a content-storing FTS5 table re-tokenizes every row to remove
+        # its terms; dropping and recreating it is far cheaper. 'optimize' then merges
+        # the freshly written segments into one b-tree for querying.
+        conn.execute("DROP TABLE IF EXISTS objects_fts")
+        conn.execute(OBJECTS_FTS_DDL)
+        conn.execute(_INSERT_FTS_SQL)
+        conn.execute("INSERT INTO objects_fts(objects_fts) VALUES('optimize')")
+        return
+
+    conn.execute(
+        """
+        DELETE FROM objects_fts
+        WHERE object_id IN (
+            SELECT object_id FROM lexical_docs WHERE source_id = ?
         )
-        rows = conn.execute(
-            """
-            SELECT ld.object_id,
-                   s.name AS source_name,
-                   o.schema_name,
+        """,
+        (source_id,),
+    )
+    conn.execute(f"{_INSERT_FTS_SQL} WHERE ld.source_id = ?", (source_id,))
+
+
+@lru_cache(maxsize=8)
+def _search_sql(has_source: bool, has_schema: bool, has_kind: bool) -> str:
+    # One SQL string per filter combination, so the connection's statement cache
+    # always hits and the query text is never rebuilt.
+    filters = ["objects_fts MATCH ?"]
+    if has_source:
+        filters.append("s.name = ?")
+    if has_schema:
+        filters.append("o.schema_name = ?")
+    if has_kind:
+        filters.append("o.object_type = ?")
+    where_clause = " AND ".join(filters)
+    # The score transform and min_score cut run in SQL. Score falls as bm25 rises,
+    # so filtering before LIMIT keeps the same rows as filtering after it.
+    return f"""
+        WITH scored AS (
+            SELECT o.id AS object_id,
+                   o.fqname,
                    o.object_type,
-                   ld.name_col,
-                   ld.comment_col,
-                   ld.defs_col,
-                   ld.context_col
-            FROM lexical_docs ld
-            JOIN db_objects o ON o.id = ld.object_id
-            JOIN sources s ON s.id = ld.source_id
-            WHERE ld.source_id = ?
-            """,
-            (source_id,),
-        ).fetchall()
-
-    for row in rows:
-        conn.execute(
-            """
-            INSERT INTO objects_fts(
-                object_id,
-                source_name,
-                schema_name,
-                kind,
-                name_col,
-                comment_col,
-                defs_col,
-                context_col
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                row["object_id"],
-                row["source_name"],
-                row["schema_name"],
-                row["object_type"],
-                row["name_col"],
-                row["comment_col"],
-                row["defs_col"],
-                row["context_col"],
-            ),
+                   s.name AS source_name,
+                   bm25(objects_fts, 3.5, 1.5, 1.1, 5.0) AS bm25,
+                   snippet(objects_fts, 4, '[', ']', '...', 8) AS name_snippet,
+                   snippet(objects_fts, 7, '[', ']', '...', 12) AS context_snippet
+            FROM objects_fts
+            JOIN db_objects o ON o.id = objects_fts.object_id
+            JOIN sources s ON s.id = o.source_id
+            WHERE {where_clause}
         )
+        SELECT object_id,
+               fqname,
+               object_type,
+               source_name,
+               1.0 / (1.0 + max(bm25, 0.0)) AS score,
+               bm25,
+               name_snippet,
+               context_snippet
+        FROM scored
+        WHERE ? IS NULL OR 1.0 / (1.0 + max(bm25, 0.0)) >= ?
+        ORDER BY bm25 ASC
+        LIMIT ?
+        """
 
 
-def search_fts(
+def iter_search_fts(
     conn: sqlite3.Connection,
     *,
     query: str,
@@ -98,59 +123,41 @@ def search_fts(
     schema: str | None = None,
     kind: str | None = None,
     min_score: float | None = None,
-) -> list[dict[str, Any]]:
-    match_query = make_match_query(query)
-    filters: list[str] = ["objects_fts MATCH ?"]
-    params: list[Any] = [match_query]
-
+) -> Iterator[dict[str, Any]]:
+    params: list[Any] = [make_match_query(query)]
     if source:
-        filters.append("s.name = ?")
         params.append(source)
     if schema:
-        filters.append("o.schema_name = ?")
         params.append(schema)
     if kind:
-        filters.append("o.object_type = ?")
         params.append(kind)
+    params.extend([min_score, min_score, limit])
 
-    where_clause = " AND ".join(filters)
-    params.append(limit)
-
-    rows = conn.execute(
-        f"""
-        SELECT o.id AS object_id,
-               o.fqname,
-               o.object_type,
-               s.name AS source_name,
-               bm25(objects_fts, 3.5, 1.5, 1.1, 5.0) AS bm25_score,
-               snippet(objects_fts, 4, '[', ']', '...', 8) AS name_snippet,
-               snippet(objects_fts, 7, '[', ']', '...', 12) AS context_snippet
-        FROM objects_fts
-        JOIN db_objects o ON o.id = objects_fts.object_id
-        JOIN sources s ON s.id = o.source_id
-        WHERE {where_clause}
-        ORDER BY bm25_score ASC
-        LIMIT ?
-        """,
-        params,
-    ).fetchall()
-
-    result: list[dict[str, Any]] = []
-    for row in rows:
-        bm25_score = float(row["bm25_score"])
-        score = 1.0 / (1.0 + max(bm25_score, 0.0))
-        if min_score is not None and score < min_score:
-            continue
-        result.append(
-            {
-                "object_id": row["object_id"],
-                "fqname": row["fqname"],
-                "object_type": row["object_type"],
-                "source_name": row["source_name"],
-                "score": score,
-                "bm25": bm25_score,
-                "name_snippet": row["name_snippet"],
-                "context_snippet": row["context_snippet"],
-            }
+    cursor = conn.execute(_search_sql(bool(source), bool(schema), bool(kind)), params)
+    cursor.row_factory = None
+    columns = [description[0] for description in cursor.description]
+    for row in cursor:
+        yield dict(zip(columns, row, strict=True))
+
+
+def search_fts(
+    conn: sqlite3.Connection,
+    *,
+    query: str,
+    limit: int = 10,
+    source: str | None = None,
+    schema: str | None = None,
+    kind: str | None = None,
+    min_score: float | None = None,
+) -> list[dict[str, Any]]:
+    return list(
+        iter_search_fts(
+            conn,
+            query=query,
+            limit=limit,
+            source=source,
+            schema=schema,
+            kind=kind,
+            min_score=min_score,
         )
-    return result
+    )
@@ -1,34 +1,59 @@
 from __future__ import annotations
 
+import hashlib
 import json
-import math
 import sqlite3
+from collections.abc import Sequence
+from functools import lru_cache
 from pathlib import Path
 from threading import Lock
 from typing import Any
 
-import torch
-import torch.nn.functional as torch_f
-from huggingface_hub import snapshot_download
-from transformers import AutoModel, AutoTokenizer
-
 from qpg.config import ensure_dirs, get_paths
+from qpg.db_sqlite import has_vec_functions
 
 CODE_MODEL_REPO = "microsoft/codebert-base"
 CODE_MODEL_DIRNAME = "microsoft__codebert-base"
 CODE_MODEL_ID = "codebert-base-v1"
 _MAX_TOKENS = 256
+_EMBED_BATCH_SIZE = 64
+_INT8_SUFFIX = ":int8"
 
 
 class VectorModelNotInitializedError(RuntimeError):
     pass
 
 
+def snapshot_download(*, repo_id: str, local_dir: str) -> str:
+    from huggingface_hub import snapshot_download as hf_snapshot_download
+
+    return str(hf_snapshot_download(repo_id=repo_id, local_dir=local_dir))
+
+
+def _load_pretrained(model_dir: Path) -> tuple[Any, Any]:
+    # transformers/torch take seconds to import; only commands that embed pay for them.
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    # The Rust tokenizer; the pure-Python one is many times slower on long definitions.
+    tokenizer = AutoTokenizer.from_pretrained(str(model_dir), local_files_only=True, use_fast=True)
+    model = AutoModel.from_pretrained(str(model_dir), local_files_only=True)
+    # Weights stay float32 everywhere, so vectors written to the index are the
+    # same precision whichever host built it; only query embedding opts into
+    # bfloat16 autocast (see embed()).
+    if torch.cuda.is_available():
+        model = model.to(device="cuda")
+    model.eval()
+    return tokenizer, model
+
+
 class _CodeLabelEmbedder:
     def __init__(self, model_repo: str = CODE_MODEL_REPO) -> None:
         self.model_repo = model_repo
         self._tokenizer: Any | None = None
         self._model: Any | None = None
+        self._load_lock = Lock()
+        self._verified_dirs: set[Path] = set()
 
     def _models_root(self) -> Path:
         return ensure_dirs(get_paths()).models_dir
@@ -38,7 +63,10 @@ class _CodeLabelEmbedder:
 
     def ensure_cached(self, *, download: bool) -> Path:
         model_dir = self._model_dir()
+        if model_dir in self._verified_dirs:
+            return model_dir
         if model_dir.exists() and any(model_dir.iterdir()):
+            self._verified_dirs.add(model_dir)
             return model_dir
 
         if not download:
@@ -54,32 +82,45 @@ class _CodeLabelEmbedder:
         if self._tokenizer is not None and self._model is not None:
             return
 
-        model_dir = self.ensure_cached(download=False)
-        self._tokenizer = AutoTokenizer.from_pretrained(str(model_dir), local_files_only=True)
-        self._model = AutoModel.from_pretrained(str(model_dir), local_files_only=True)
-        self._model.eval()
+        # Server threads may embed concurrently; load the weights exactly once.
+        with self._load_lock:
+            if self._tokenizer is not None and self._model is not None:
+                return
+            self._tokenizer, self._model = _load_pretrained(self.ensure_cached(download=False))
 
     def embed(self, text: str) -> list[float]:
+        # Query vectors are never stored, so on a GPU they may use bfloat16
+        # autocast, which halves activation bandwidth.
+        return self.embed_batch([text], autocast=True)[0]
+
+    def embed_batch(self, texts: Sequence[str], *, autocast: bool = False) -> list[list[float]]:
+        import torch
+        import torch.nn.functional as torch_f
+
         self._ensure_loaded()
         assert self._tokenizer is not None
         assert self._model is not None
 
         encoded = self._tokenizer(
-            text,
+            list(texts),
             return_tensors="pt",
+            padding=True,
             truncation=True,
             max_length=_MAX_TOKENS,
-        )
-        with torch.no_grad():
+        ).to(self._model.device)
+        use_bf16 = autocast and self._model.device.type == "cuda"
+        with torch.inference_mode(), torch.autocast("cuda", dtype=torch.bfloat16, enabled=use_bf16):
             output = self._model(**encoded)
 
-        hidden = output.last_hidden_state
-        mask = encoded["attention_mask"].unsqueeze(-1)
-        summed = (hidden * mask).sum(dim=1)
-        denom = mask.sum(dim=1).clamp(min=1)
+        # Padding positions are masked out, so batched vectors match one-at-a-time ones; the
+        # masked sum is a batched matmul rather than a materialized (batch, tokens, hidden) product.
+        hidden = output.last_hidden_state.float()
+        mask = encoded["attention_mask"].to(hidden.dtype).unsqueeze(1)
+        summed = torch.bmm(mask, hidden).squeeze(1)
+        denom = mask.sum(dim=2).clamp(min=1)
         pooled = summed / denom
         normalized = torch_f.normalize(pooled, p=2, dim=1)
-        return [float(value) for value in normalized[0].tolist()]
+        return normalized.tolist()
 
 
 _EMBEDDER_LOCK = Lock()
@@ -106,10 +147,11 @@ def require_vector_model() -> Path:
     return _embedder().ensure_cached(download=False)
 
 
-def _has_vec_functions(conn: sqlite3.Connection) -> bool:
+def warm_vector_model() -> bool:
+    """Load the cached model into memory ahead of the first query; False if not initialized."""
     try:
-        conn.execute("SELECT vec_f32('[0.0, 1.0]')").fetchone()
-    except sqlite3.DatabaseError:
+        _embedder()._ensure_loaded()
+    except VectorModelNotInitializedError:
         return False
     return True
 
@@ -117,11 +159,94 @@ def _has_vec_functions(conn: sqlite3.Connection) -> bool:
 def embed_text(text: str) -> list[float]:
     if not text.strip():
         return [0.0] * 768
-    return _embedder().embed(text)
+    return _embed_query(_embedder(), text)
+
+
+# Keyed by embedder too, so a reloaded model never serves another model's vectors.
+# Callers only read the returned list.
+@lru_cache(maxsize=256)
+def _embed_query(embedder: _CodeLabelEmbedder, text: str) -> list[float]:
+    return embedder.embed(text)
+
+
+def _pack_f32(vector: list[float]) -> bytes:
+    """Little-endian float32 bytes, the blob form sqlite-vec's vec_f32() accepts."""
+    import numpy as np
+
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def embedding_content_hash(text: str, model: str = CODE_MODEL_ID) -> str:
+    """Fingerprint of an embedding's input, so unchanged objects can keep their vector."""
+    return hashlib.blake2b(f"{model}\n{text}".encode(), digest_size=16).hexdigest()
+
 
+def embed_texts(texts: Sequence[str]) -> list[list[float]]:
+    """Embed several texts with one model call; blank texts map to zero vectors."""
+    vectors = [[0.0] * 768 for _ in texts]
+    pending = [index for index, text in enumerate(texts) if text.strip()]
+    if pending:
+        # Identical texts (e.g. the same column in many tables) are embedded once.
+        unique = list(dict.fromkeys(texts[index] for index in pending))
+        embedded = dict(zip(unique, _embedder().embed_batch(unique), strict=True))
+        for index in pending:
+            vectors[index] = embedded[texts[index]]
+    return vectors
 
-def _to_json_vector(vector: list[float]) -> str:
-    return json.dumps([round(v, 8) for v in vector], separators=(",", ":"))
+
+def vector_storage_model(conn: sqlite3.Connection, model: str = CODE_MODEL_ID) -> str:
+    """Model id as stored in object_vectors.model; locally scored vectors are int8-quantized."""
+    return model if has_vec_functions(conn) else f"{model}{_INT8_SUFFIX}"
+
+
+def _quantize_int8(vector: list[float]) -> tuple[bytes, float]:
+    import numpy as np
+
+    values = np.asarray(vector, dtype=np.float32)
+    peak = float(np.abs(values).max()) if values.size else 0.0
+    scale = peak / 127 if peak else 1.0
+    return np.round(values / scale).astype(np.int8).tobytes(), scale
+
+
+def upsert_embeddings(
+    conn: sqlite3.Connection,
+    items: Sequence[tuple[str, str, str]],
+    *,
+    model: str = CODE_MODEL_ID,
+    updated_at: str | None = None,
+    batch_size: int = _EMBED_BATCH_SIZE,
+) -> None:
+    """Embed (object_id, text, content_hash) items in model batches, one executemany per batch."""
+    if not items:
+        return
+
+    use_vec = has_vec_functions(conn)
+    stored_model = vector_storage_model(conn, model)
+    embedding_expr = "vec_f32(?)" if use_vec else "?"
+    sql = f"""
+        INSERT INTO object_vectors(object_id, embedding, model, updated_at, content_hash, scale)
+        VALUES(?, {embedding_expr}, ?, COALESCE(?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now')), ?, ?)
+        ON CONFLICT(object_id) DO UPDATE SET
+            embedding = excluded.embedding,
+            model = excluded.model,
+            updated_at = excluded.updated_at,
+            content_hash = excluded.content_hash,
+            scale = excluded.scale
+    """
+    # Batches are cut from length-sorted items, so each forward pass pads its texts
+    # to a similar length instead of to the longest text in an arbitrary mix.
+    ordered = sorted(items, key=lambda item: len(item[1]))
+    for start in range(0, len(ordered), batch_size):
+        batch = ordered[start : start + batch_size]
+        vectors = embed_texts([text for _, text, _ in batch])
+        rows: list[tuple[Any, ...]] = []
+        for (object_id, _, content_hash), vector in zip(batch, vectors, strict=True):
+            if use_vec:
+                rows.append((object_id, _pack_f32(vector), stored_model, updated_at, content_hash, None))
+            else:
+                blob, scale = _quantize_int8(vector)
+                rows.append((object_id, blob, stored_model, updated_at, content_hash, scale))
+        conn.executemany(sql, rows)
 
 
 def upsert_embedding(
@@ -130,37 +255,23 @@ def upsert_embedding(
     object_id: str,
     text: str,
     model: str = CODE_MODEL_ID,
+    updated_at: str | None = None,
+    content_hash: str | None = None,
 ) -> None:
-    vector = embed_text(text)
-    payload = _to_json_vector(vector)
-
-    if _has_vec_functions(conn):
-        conn.execute(
-            """
-            INSERT INTO object_vectors(object_id, embedding, model, updated_at)
-            VALUES(?, vec_f32(?), ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            ON CONFLICT(object_id) DO UPDATE SET
-                embedding = excluded.embedding,
-                model = excluded.model,
-                updated_at = excluded.updated_at
-            """,
-            (object_id, payload, model),
-        )
-    else:
-        conn.execute(
-            """
-            INSERT INTO object_vectors(object_id, embedding, model, updated_at)
-            VALUES(?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
-            ON CONFLICT(object_id) DO UPDATE SET
-                embedding = excluded.embedding,
-                model = excluded.model,
-                updated_at = excluded.updated_at
-            """,
-            (object_id, payload.encode("utf-8"), model),
-        )
+    if content_hash is None:
+        content_hash = embedding_content_hash(text, model)
+    upsert_embeddings(conn, [(object_id, text, content_hash)], model=model, updated_at=updated_at)
 
 
-def _decode_vector(blob: bytes | str) -> list[float] | None:
+def _decode_vector(blob: bytes | str) -> Any | None:
+    # Rows without a scale are float32 blobs written through sqlite-vec, or JSON
+    # arrays from older indexes.
+    if isinstance(blob, bytes) and not blob.startswith(b"["):
+        if len(blob) % 4:
+            return None
+        import numpy as np
+
+        return np.frombuffer(blob, dtype="<f4")
     if isinstance(blob, bytes):
         try:
             text = blob.decode("utf-8")
@@ -178,15 +289,153 @@ def _decode_vector(blob: bytes | str) -> list[float] | None:
     return [float(item) for item in raw]
 
 
-def _cosine(a: list[float], b: list[float]) -> float:
-    if len(a) != len(b):
-        return 0.0
-    dot = sum(x * y for x, y in zip(a, b, strict=False))
-    na = math.sqrt(sum(x * x for x in a))
-    nb = math.sqrt(sum(y * y for y in b))
-    if na == 0 or nb == 0:
-        return 0.0
-    return dot / (na * nb)
+# Locally scored vectors are kept as one row-normalized float32 matrix per index
+# file, rebuilt only when object_vectors changes, so a search is one matrix-vector
+# product instead of decoding every stored vector again.
+_MATRIX_LOCK = Lock()
+_MATRIX_CACHE: dict[str, tuple[tuple[Any, ...], list[str], Any]] = {}
+
+
+def _index_file(conn: sqlite3.Connection) -> str:
+    for row in conn.execute("PRAGMA database_list").fetchall():
+        if row[1] == "main":
+            return str(row[2] or "")
+    return ""
+
+
+def _load_vector_matrix(conn: sqlite3.Connection, dim: int) -> tuple[list[str], Any]:
+    import numpy as np
+
+    rows = conn.execute(
+        """
+        SELECT ov.object_id, ov.embedding, ov.scale
+        FROM object_vectors ov
+        JOIN db_objects o ON o.id = ov.object_id
+        ORDER BY ov.rowid
+        """
+    ).fetchall()
+    ids: list[str] = []
+    matrix = np.zeros((len(rows), dim), dtype=np.float32)
+    # int8 rows are decoded together from one joined buffer; only legacy JSON rows
+    # are parsed one by one. Vectors of another dimension stay zero rows and score 0.
+    int8_positions: list[int] = []
+    int8_blobs: list[bytes] = []
+    for object_id, blob, scale in rows:
+        if scale is None:
+            decoded = _decode_vector(blob)
+            if decoded is None:
+                continue
+            if len(decoded) == dim:
+                matrix[len(ids)] = decoded
+        elif len(blob) == dim:
+            int8_positions.append(len(ids))
+            int8_blobs.append(blob)
+        ids.append(object_id)
+    if int8_blobs:
+        # Cosine similarity is scale-invariant, so int8 rows need no dequantizing.
+        matrix[int8_positions] = np.frombuffer(b"".join(int8_blobs), dtype=np.int8).reshape(-1, dim)
+    matrix = matrix[: len(ids)]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return ids, matrix
+
+
+def _vector_matrix(conn: sqlite3.Connection, dim: int) -> tuple[list[str], Any]:
+    index_file = _index_file(conn)
+    fingerprint = (dim, *conn.execute("SELECT COUNT(*), MAX(updated_at), MAX(rowid) FROM object_vectors").fetchone())
+    with _MATRIX_LOCK:
+        cached = _MATRIX_CACHE.get(index_file)
+    if index_file and cached is not None and cached[0] == fingerprint:
+        return cached[1], cached[2]
+    ids, matrix = _load_vector_matrix(conn, dim)
+    if index_file:
+        with _MATRIX_LOCK:
+            _MATRIX_CACHE[index_file] = (fingerprint, ids, matrix)
+    return ids, matrix
+
+
+def _local_vector_search(
+    conn: sqlite3.Connection,
+    query_vec: list[float],
+    *,
+    limit: int,
+    where_clause: str,
+    params: list[Any],
+) -> list[dict[str, Any]]:
+    import numpy as np
+
+    ids, matrix = _vector_matrix(conn, len(query_vec))
+    if not ids or limit <= 0:
+        return []
+    query = np.asarray(query_vec, dtype=np.float32)
+    query_norm = float(np.linalg.norm(query))
+    if query_norm > 0:
+        query /= query_norm
+    scores = matrix @ query
+
+    candidates = np.arange(len(ids))
+    if where_clause:
+        allowed = {
+            row[0]
+            for row in conn.execute(
+                f"SELECT o.id FROM db_objects o JOIN sources s ON s.id = o.source_id {where_clause}",
+                params,
+            ).fetchall()
+        }
+        candidates = np.fromiter((i for i, object_id in enumerate(ids) if object_id in allowed), dtype=np.intp)
+    if candidates.size > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    top = candidates[np.lexsort((candidates, -scores[candidates]))]
+    top_ids = [ids[i] for i in top]
+    if not top_ids:
+        return []
+
+    placeholders = ", ".join("?" for _ in top_ids)
+    meta = {
+        row["object_id"]: row
+        for row in conn.execute(
+            f"""
+            SELECT o.id AS object_id,
+                   o.fqname,
+                   o.object_type,
+                   s.name AS source_name
+            FROM db_objects o
+            JOIN sources s ON s.id = o.source_id
+            WHERE o.id IN ({placeholders})
+            """,
+            top_ids,
+        ).fetchall()
+    }
+    return [
+        {
+            "object_id": object_id,
+            "fqname": meta[object_id]["fqname"],
+            "object_type": meta[object_id]["object_type"],
+            "source_name": meta[object_id]["source_name"],
+            "score": float(scores[i]),
+        }
+        for i, object_id in zip(top, top_ids, strict=True)
+        if object_id in meta
+    ]
+
+
+def _has_quantized_vectors(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT EXISTS(SELECT 1 FROM object_vectors WHERE scale IS NOT NULL)").fetchone()
+    return bool(row[0])
+
+
+@lru_cache(maxsize=8)
+def _filter_clause(has_source: bool, has_schema: bool, has_kind: bool) -> str:
+    # One clause string per filter combination, so the SQL built from it is
+    # identical across calls and hits the connection's statement cache.
+    filters = []
+    if has_source:
+        filters.append("s.name = ?")
+    if has_schema:
+        filters.append("o.schema_name = ?")
+    if has_kind:
+        filters.append("o.object_type = ?")
+    return f"WHERE {' AND '.join(filters)}" if filters else ""
 
 
 def vector_search(
@@ -198,24 +447,21 @@ def vector_search(
     schema: str | None = None,
     kind: str | None = None,
     min_score: float | None = None,
+    query_vec: list[float] | None = None,
 ) -> list[dict[str, Any]]:
-    query_vec = embed_text(query)
-
-    filters: list[str] = []
-    params: list[Any] = []
-    if source:
-        filters.append("s.name = ?")
-        params.append(source)
-    if schema:
-        filters.append("o.schema_name = ?")
-        params.append(schema)
-    if kind:
-        filters.append("o.object_type = ?")
-        params.append(kind)
-
-    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-
-    if _has_vec_functions(conn):
+    # A blank query embeds to the zero vector, which scores every row 0: there is
+    # nothing to rank, so skip the scan.
+    if not query.strip():
+        return []
+    if query_vec is None:
+        query_vec = embed_text(query)
+
+    params: list[Any] = [value for value in (source, schema, kind) if value]
+    where_clause = _filter_clause(bool(source), bool(schema), bool(kind))
+
+    # int8 rows (written while sqlite-vec was unavailable) are not float32 vectors
+    # vec_distance_cosine can read; an index holding any is scored locally.
+    if has_vec_functions(conn) and not _has_quantized_vectors(conn):
         sql = f"""
             SELECT o.id AS object_id,
                    o.fqname,
@@ -229,38 +475,10 @@ def vector_search(
             ORDER BY score DESC
             LIMIT ?
         """
-        rows = conn.execute(sql, (_to_json_vector(query_vec), *params, limit)).fetchall()
+        rows = conn.execute(sql, (_pack_f32(query_vec), *params, limit)).fetchall()
         scored = [dict(row) for row in rows]
     else:
-        sql = f"""
-            SELECT o.id AS object_id,
-                   o.fqname,
-                   o.object_type,
-                   s.name AS source_name,
-                   ov.embedding AS embedding
-            FROM object_vectors ov
-            JOIN db_objects o ON o.id = ov.object_id
-            JOIN sources s ON s.id = o.source_id
-            {where_clause}
-        """
-        rows = conn.execute(sql, params).fetchall()
-        scored = []
-        for row in rows:
-            vector = _decode_vector(row["embedding"])
-            if vector is None:
-                continue
-            score = _cosine(query_vec, vector)
-            scored.append(
-                {
-                    "object_id": row["object_id"],
-                    "fqname": row["fqname"],
-                    "object_type": row["object_type"],
-                    "source_name": row["source_name"],
-                    "score": score,
-                }
-            )
-        scored.sort(key=lambda item: item["score"], reverse=True)
-        scored = scored[:limit]
+        scored = _local_vector_search(conn, query_vec, limit=limit, where_clause=where_clause, params=params)
 
     if min_score is not None:
         scored = [row for row in scored if float(row["score"]) >= min_score]
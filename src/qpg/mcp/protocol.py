@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import json
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from qpg import __version__
 from qpg.get import ObjectNotFoundError, get_object_payload
 from qpg.index.fts import search_fts
-from qpg.index.vec import vector_search
+from qpg.index.vec import embed_text, vector_search, warm_vector_model
 from qpg.query.expand import expand_query
 from qpg.query.rerank import rerank_with_hook
-from qpg.query.rrf import reciprocal_rank_fusion
+from qpg.query.rrf import apply_position_bonus, reciprocal_rank_fusion
 from qpg.sources import list_sources
 
 
@@ -18,6 +20,24 @@ class MCPError(RuntimeError):
     pass
 
 
+# Wire messages are compact UTF-8: no ASCII escaping and no separator padding.
+_MESSAGE_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+# tools/call text content keeps json.dumps' default layout; clients show it to users.
+_TEXT_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def encode_message(payload: dict[str, Any]) -> bytes:
+    return _MESSAGE_ENCODER.encode(payload).encode("utf-8")
+
+
+def start_model_warmup() -> threading.Thread:
+    # Servers load the embedding model in the background so the first deep search
+    # does not pay for it; a missing model is left for the tool call to report.
+    thread = threading.Thread(target=warm_vector_model, name="qpg-model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
 SUPPORTED_PROTOCOL_VERSIONS = (
     "2025-11-25",
     "2025-06-18",
@@ -106,39 +126,36 @@ def _negotiate_protocol_version(client_version: Any) -> str:
 
 def _status_payload(conn: sqlite3.Connection) -> dict[str, Any]:
     source_count = conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
-    object_count = conn.execute("SELECT COUNT(*) FROM db_objects").fetchone()[0]
-    by_kind = conn.execute(
-        """
-        SELECT object_type, COUNT(*) AS count
-        FROM db_objects
-        GROUP BY object_type
-        ORDER BY count DESC
-        """
-    ).fetchall()
+    by_kind = [
+        {"kind": row[0], "count": row[1]}
+        for row in conn.execute(
+            """
+            SELECT object_type, COUNT(*) AS count
+            FROM db_objects
+            GROUP BY object_type
+            ORDER BY count DESC
+            """
+        )
+    ]
+    # The per-kind counts partition db_objects, so their sum is the object count.
     return {
         "sources": source_count,
-        "objects": object_count,
-        "by_kind": [{"kind": row[0], "count": row[1]} for row in by_kind],
+        "objects": sum(entry["count"] for entry in by_kind),
+        "by_kind": by_kind,
     }
 
 
 def _deep_search(conn: sqlite3.Connection, query: str, limit: int) -> list[dict[str, Any]]:
-    expansions = expand_query(query)
-    fts_ranked: list[list[dict[str, Any]]] = []
-    for text in expansions:
-        rows = search_fts(conn, query=text, limit=limit)
-        fts_ranked.append(rows)
-
-    ranked_lists = fts_ranked
-    ranked_lists.append(vector_search(conn, query=query, limit=limit))
-
-    fused = reciprocal_rank_fusion(ranked_lists, k=60)
-
-    for idx, row in enumerate(fused, start=1):
-        row["position_bonus"] = 1.0 / (idx + 1)
-        row["score"] = row["rrf_score"] + 0.1 * row["position_bonus"]
-
-    fused.sort(key=lambda item: item["score"], reverse=True)
+    # The query embedding is the slow step; it runs on a worker thread while the FTS
+    # passes use this thread's connection, so no SQLite handle crosses threads.
+    # A blank query has no vector signal and skips the embedding entirely.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        query_vec = pool.submit(embed_text, query) if query.strip() else None
+        ranked_lists = [search_fts(conn, query=text, limit=limit) for text in expand_query(query)]
+        if query_vec is not None:
+            ranked_lists.append(vector_search(conn, query=query, limit=limit, query_vec=query_vec.result()))
+
+    fused = apply_position_bonus(reciprocal_rank_fusion(ranked_lists, k=60))
     fused = rerank_with_hook(query, fused)
     return fused[:limit]
 
@@ -252,7 +269,7 @@ def _handle_mcp_request(conn: sqlite3.Connection, payload: dict[str, Any]) -> di
             return _jsonrpc_result(
                 request_id,
                 {
-                    "content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False)}],
+                    "content": [{"type": "text", "text": _TEXT_ENCODER.encode(result)}],
                     "structuredContent": result,
                     "isError": False,
                 },
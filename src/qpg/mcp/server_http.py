@@ -6,15 +6,26 @@ from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Any, cast
 
-from qpg.mcp.protocol import handle_request
+from qpg.mcp.protocol import encode_message, handle_request, start_model_warmup
 
 
 class MCPHTTPHandler(BaseHTTPRequestHandler):
     server_version = "qpg-mcp/0.1"
+    # Keep-alive: the server starts one thread per connection, so a client that
+    # reuses its connection pays for thread startup and the TCP handshake once.
+    # Every response carries Content-Length, which HTTP/1.1 persistence requires.
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections would otherwise hold their thread forever.
+    timeout = 30
 
     def _read_json(self) -> dict[str, Any] | None:
-        length = int(self.headers.get("Content-Length", "0"))
-        body = self.rfile.read(length)
+        length = self.headers.get("Content-Length", "")
+        if not (length.isascii() and length.isdigit()):
+            # Without a length the body's end is unknown; drop the connection so
+            # unread bytes are never parsed as the next request.
+            self.close_connection = True
+            return None
+        body = self.rfile.read(int(length))
         try:
             payload = json.loads(body.decode("utf-8"))
         except json.JSONDecodeError:
@@ -22,10 +33,12 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         return payload if isinstance(payload, dict) else None
 
     def _write_json(self, status: HTTPStatus, payload: dict[str, Any]) -> None:
-        content = json.dumps(payload).encode("utf-8")
+        content = encode_message(payload)
         self.send_response(status.value)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(content)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
         self.end_headers()
         self.wfile.write(content)
 
@@ -45,6 +58,11 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
             self._write_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
             return
 
+        if "Transfer-Encoding" in self.headers:
+            self.close_connection = True
+            self._write_json(HTTPStatus.LENGTH_REQUIRED, {"error": "Content-Length required"})
+            return
+
         payload = self._read_json()
         if payload is None:
             self._write_json(HTTPStatus.BAD_REQUEST, {"error": "invalid JSON payload"})
@@ -55,6 +73,7 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
 
 
 def serve_http(conn: sqlite3.Connection, *, host: str = "127.0.0.1", port: int = 8765) -> int:
+    start_model_warmup()
     server = ThreadingHTTPServer((host, port), MCPHTTPHandler)
     server.sqlite_conn = conn  # type: ignore[attr-defined]
     try:
@@ -4,39 +4,39 @@ import json
 import sqlite3
 import sys
 
-from qpg.mcp.protocol import handle_request
+from qpg.mcp.protocol import encode_message, handle_request, start_model_warmup
+
+_PARSE_ERROR = encode_message({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+_INVALID_REQUEST = encode_message(
+    {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+)
 
 
 def serve_stdio(conn: sqlite3.Connection) -> int:
-    for raw_line in sys.stdin:
+    start_model_warmup()
+    # Messages go through the binary streams: json.loads takes UTF-8 bytes directly
+    # and responses are written pre-encoded, skipping the text layer both ways.
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    for raw_line in sys.stdin.buffer:
         line = raw_line.strip()
         if not line:
             continue
         try:
             payload = json.loads(line)
-        except json.JSONDecodeError:
-            sys.stdout.write(
-                json.dumps(
-                    {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
-                )
-                + "\n"
-            )
-            sys.stdout.flush()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            out.write(_PARSE_ERROR + b"\n")
+            out.flush()
             continue
 
         if not isinstance(payload, dict):
-            sys.stdout.write(
-                json.dumps(
-                    {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
-                )
-                + "\n"
-            )
-            sys.stdout.flush()
+            out.write(_INVALID_REQUEST + b"\n")
+            out.flush()
             continue
 
         response = handle_request(conn, payload)
         if response is not None:
-            sys.stdout.write(json.dumps(response) + "\n")
-            sys.stdout.flush()
+            out.write(encode_message(response) + b"\n")
+            out.flush()
 
     return 0
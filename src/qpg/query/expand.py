@@ -2,30 +2,36 @@ from __future__ import annotations
 
 import re
 
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
+
 SYNONYMS = {
-    "payment": ["payments", "billing", "charge"],
-    "refund": ["refunds", "reversal", "chargeback"],
-    "subscription": ["subscriptions", "plan", "renewal"],
-    "status": ["state", "lifecycle"],
-    "order": ["orders", "purchase"],
+    "payment": ("payments", "billing", "charge"),
+    "refund": ("refunds", "reversal", "chargeback"),
+    "subscription": ("subscriptions", "plan", "renewal"),
+    "status": ("state", "lifecycle"),
+    "order": ("orders", "purchase"),
 }
 
 
-def expand_query(query: str) -> list[str]:
-    tokens = re.findall(r"[A-Za-z0-9_]+", query.lower())
-    expanded = set(tokens)
-
-    for token in tokens:
-        if token.endswith("s") and len(token) > 3:
-            expanded.add(token[:-1])
-        else:
-            expanded.add(f"{token}s")
+def _inflect(token: str) -> str:
+    if token.endswith("ies") and len(token) > 4:
+        return f"{token[:-3]}y"
+    if token.endswith("s") and len(token) > 3:
+        return token[:-1]
+    return f"{token}s"
 
-        for synonym in SYNONYMS.get(token, []):
-            expanded.add(synonym)
 
-    ordered = sorted(expanded)
-    if not ordered:
+def expand_query(query: str) -> list[str]:
+    # A dict is an insertion-ordered set: the expansion lists query tokens first,
+    # each followed by its inflection and synonyms.
+    expanded: dict[str, None] = {}
+    for token in _TOKEN_RE.findall(query.lower()):
+        expanded[token] = None
+        expanded[_inflect(token)] = None
+        for synonym in SYNONYMS.get(token, ()):
+            expanded[synonym] = None
+
+    if not expanded:
         return [query]
 
-    return [query, " ".join(ordered)]
+    return [query, " ".join(expanded)]
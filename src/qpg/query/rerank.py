@@ -10,6 +10,9 @@ class RerankHookError(RuntimeError):
     pass
 
 
+_PAYLOAD_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
 def rerank_with_hook(query: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     hook = os.environ.get("QPG_RERANK_HOOK")
     if not hook:
@@ -18,7 +21,7 @@ def rerank_with_hook(query: str, rows: list[dict[str, Any]]) -> list[dict[str, A
     payload = {"query": query, "results": rows}
     proc = subprocess.run(
         [hook],
-        input=json.dumps(payload).encode("utf-8"),
+        input=_PAYLOAD_ENCODER.encode(payload).encode("utf-8"),
         capture_output=True,
         check=False,
     )
@@ -26,25 +29,22 @@ def rerank_with_hook(query: str, rows: list[dict[str, Any]]) -> list[dict[str, A
         raise RerankHookError(proc.stderr.decode("utf-8", errors="replace").strip())
 
     try:
-        output = json.loads(proc.stdout.decode("utf-8"))
-    except json.JSONDecodeError as exc:
+        output = json.loads(proc.stdout)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
         raise RerankHookError("rerank hook returned invalid JSON") from exc
 
     if not isinstance(output, list):
         raise RerankHookError("rerank hook output must be a JSON list")
 
-    by_id = {row["object_id"]: row for row in rows}
+    # Ids are compared as strings; each row's key is computed once, and rows leave
+    # `pending` as they are placed, so repeated ids in the hook output are ignored.
+    keys = [str(row["object_id"]) for row in rows]
+    pending = dict(zip(keys, rows, strict=True))
     reordered: list[dict[str, Any]] = []
-    seen: set[str] = set()
-
     for object_id in output:
-        key = str(object_id)
-        if key in by_id:
-            reordered.append(by_id[key])
-            seen.add(key)
-
-    for row in rows:
-        key = str(row["object_id"])
-        if key not in seen:
+        row = pending.pop(str(object_id), None)
+        if row is not None:
             reordered.append(row)
+
+    reordered.extend(row for key, row in zip(keys, rows, strict=True) if key in pending)
     return reordered
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from typing import Any
 
+import numpy as np
+
 
 def reciprocal_rank_fusion(
     ranked_lists: list[list[dict[str, Any]]],
@@ -13,24 +14,46 @@ def reciprocal_rank_fusion(
     if k <= 0:
         raise ValueError("k must be positive")
 
-    merged: dict[str, dict[str, Any]] = {}
-    scores: defaultdict[str, float] = defaultdict(float)
+    # One entry per object: [fused score, first-seen row copy].
+    merged: dict[str, list[Any]] = {}
 
     for ranked in ranked_lists:
         for rank, row in enumerate(ranked, start=1):
             object_id = str(row["object_id"])
-            scores[object_id] += 1.0 / (k + rank)
+            entry = merged.get(object_id)
+            if entry is None:
+                entry = merged[object_id] = [0.0, dict(row)]
+            entry[0] += 1.0 / (k + rank)
             if rank == 1:
-                scores[object_id] += top_rank_bonus
-
-            if object_id not in merged:
-                merged[object_id] = dict(row)
+                entry[0] += top_rank_bonus
 
     result = []
-    for object_id, row in merged.items():
-        fused = dict(row)
-        fused["rrf_score"] = scores[object_id]
+    for score, fused in sorted(merged.values(), key=lambda entry: entry[0], reverse=True):
+        fused["rrf_score"] = score
         result.append(fused)
-
-    result.sort(key=lambda item: item["rrf_score"], reverse=True)
     return result
+
+
+def apply_position_bonus(
+    fused: list[dict[str, Any]],
+    *,
+    weight: float = 0.1,
+) -> list[dict[str, Any]]:
+    """Add `1 / (position + 1)` bonuses to fused rows and return them ordered by final score."""
+    if not fused:
+        return fused
+
+    rrf_scores = np.fromiter((row["rrf_score"] for row in fused), dtype=np.float64, count=len(fused))
+    position_bonus = 1.0 / np.arange(2, len(fused) + 2, dtype=np.float64)
+    scores = rrf_scores + weight * position_bonus
+    order = np.argsort(-scores, kind="stable")
+
+    bonus_values = position_bonus.tolist()
+    score_values = scores.tolist()
+    ranked: list[dict[str, Any]] = []
+    for idx in order.tolist():
+        row = fused[idx]
+        row["position_bonus"] = bonus_values[idx]
+        row["score"] = score_values[idx]
+        ranked.append(row)
+    return ranked
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import hashlib
 from dataclasses import dataclass
+from functools import lru_cache
 
 
-@dataclass
+@dataclass(slots=True)
 class NormalizedObject:
     object_id: str
     source_name: str
@@ -25,10 +26,17 @@ def make_fqname(schema_name: str | None, object_name: str) -> str:
     return object_name
 
 
+@lru_cache(maxsize=32)
+def _object_id_hasher(source_name: str) -> hashlib._Hash:
+    return hashlib.sha256(f"{source_name}:".encode())
+
+
 def make_object_id(source_name: str, object_type: str, fqname: str) -> str:
-    raw = f"{source_name}:{object_type}:{fqname}".encode()
-    digest = hashlib.sha256(raw).hexdigest()
-    return digest[:12]
+    # Copying a hasher primed with the source prefix skips re-hashing it for
+    # every object; the digest is identical to hashing the full string.
+    hasher = _object_id_hasher(source_name).copy()
+    hasher.update(f"{object_type}:{fqname}".encode())
+    return hasher.hexdigest()[:12]
 
 
 def normalize_object(
@@ -42,8 +50,9 @@ def normalize_object(
     signature: str | None = None,
     owner: str | None = None,
     is_system: bool = False,
+    fqname: str | None = None,
 ) -> NormalizedObject:
-    fqname = make_fqname(schema_name, object_name)
+    fqname = fqname or make_fqname(schema_name, object_name)
     object_id = make_object_id(source_name, object_type, fqname)
     return NormalizedObject(
         object_id=object_id,
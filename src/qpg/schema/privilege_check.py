@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
 from typing import Any
 
@@ -19,7 +20,7 @@ WITH RECURSIVE role_tree AS (
 """
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PrivilegeViolation:
     role: str
     scope: str
@@ -27,7 +28,7 @@ class PrivilegeViolation:
     privilege: str
 
 
-@dataclass
+@dataclass(slots=True)
 class PrivilegeReport:
     current_user: str
     inherited_roles: list[str]
@@ -44,9 +45,9 @@ def _rows_to_violations(rows: list[dict[str, Any]]) -> list[PrivilegeViolation]:
         violations.append(
             PrivilegeViolation(
                 role=str(row["role_name"]),
-                scope=str(row["scope"]),
+                scope=sys.intern(str(row["scope"])),
                 object_name=str(row["object_name"]),
-                privilege=str(row["privilege"]),
+                privilege=sys.intern(str(row["privilege"])),
             )
         )
     return violations
@@ -113,10 +114,16 @@ def collect_prohibited_privileges(conn: Any, *, allow_execute: bool = False) ->
         FROM role_tree rt
         JOIN pg_class c ON c.relkind IN ('r', 'p', 'v', 'm', 'f')
         JOIN pg_namespace n ON n.oid = c.relnamespace
-        CROSS JOIN (VALUES ('INSERT'), ('UPDATE'), ('DELETE'), ('TRUNCATE'), ('REFERENCES'), ('TRIGGER')) AS p(privilege)
+        CROSS JOIN LATERAL (
+            SELECT v.privilege
+            FROM (VALUES ('INSERT'), ('UPDATE'), ('DELETE'), ('TRUNCATE'), ('REFERENCES'), ('TRIGGER')) AS v(privilege)
+            WHERE has_table_privilege(rt.rolname, c.oid, v.privilege)
+        ) AS p
         WHERE n.nspname !~ '^pg_'
           AND n.nspname <> 'information_schema'
-          AND has_table_privilege(rt.rolname, c.oid, p.privilege)
+          -- One ACL check per role and table; the per-privilege fan-out above
+          -- only runs for tables that hold at least one of them.
+          AND has_table_privilege(rt.rolname, c.oid, 'INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER')
         """,
         """
         SELECT rt.rolname AS role_name,
@@ -157,22 +164,28 @@ def collect_prohibited_privileges(conn: Any, *, allow_execute: bool = False) ->
 
 
 def list_inherited_roles(conn: Any) -> list[str]:
-    rows = fetch_all(
+    return _session_roles(conn)[1]
+
+
+def _session_roles(conn: Any) -> tuple[str, list[str]]:
+    # Role membership can be granted or revoked mid-session, so this is read
+    # fresh on every check; one query returns both values.
+    row = fetch_one(
         conn,
         f"""
         {ROLE_TREE_CTE}
-        SELECT DISTINCT rolname
+        SELECT current_user AS username,
+               COALESCE(array_agg(DISTINCT rolname ORDER BY rolname)::text[], ARRAY[]::text[]) AS roles
         FROM role_tree
-        ORDER BY rolname
         """,
     )
-    return [str(row["rolname"]) for row in rows]
+    if row is None:
+        return "unknown", []
+    return str(row["username"]), [str(role) for role in row["roles"]]
 
 
 def check_privileges(conn: Any, *, allow_execute: bool = False) -> PrivilegeReport:
-    current = fetch_one(conn, "SELECT current_user AS username")
-    current_user = str(current["username"]) if current else "unknown"
-    roles = list_inherited_roles(conn)
+    current_user, roles = _session_roles(conn)
     rows = collect_prohibited_privileges(conn, allow_execute=allow_execute)
     return build_report_from_rows(
         current_user=current_user,
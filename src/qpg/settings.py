@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic import AliasChoices, Field
@@ -14,22 +15,37 @@ from pydantic_settings import (
 )
 
 
-def config_yaml_path() -> Path:
-    xdg_config_home = os.environ.get("XDG_CONFIG_HOME")
+@lru_cache(maxsize=8)
+def _config_yaml_path_for(home: Path, xdg_config_home: str | None) -> Path:
     if xdg_config_home:
         return Path(xdg_config_home).expanduser().resolve() / "qpg" / "config.yaml"
-    return (Path.home() / ".config" / "qpg" / "config.yaml").expanduser().resolve()
+    return (home / ".config" / "qpg" / "config.yaml").expanduser().resolve()
+
+
+def config_yaml_path() -> Path:
+    return _config_yaml_path_for(Path.home(), os.environ.get("XDG_CONFIG_HOME"))
+
+
+def _config_stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
 
 
-def _looks_like_dotenv(path: Path) -> bool:
-    if not path.exists() or not path.is_file():
+@lru_cache(maxsize=8)
+def _looks_like_dotenv(path: Path, stamp: tuple[int, int] | None) -> bool:
+    if stamp is None or not path.is_file():
         return False
     try:
-        for raw_line in path.read_text().splitlines():
-            line = raw_line.strip()
-            if not line or line.startswith("#"):
-                continue
-            return "=" in line and ":" not in line.split("=", 1)[0]
+        # Only the first meaningful line decides the format.
+        with path.open(encoding="utf-8", errors="replace") as handle:
+            for raw_line in handle:
+                line = raw_line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                return "=" in line and ":" not in line.split("=", 1)[0]
     except OSError:
         return False
     return False
@@ -61,7 +77,7 @@ class QPGSettings(BaseSettings):
         file_secret_settings: PydanticBaseSettingsSource,
     ) -> tuple[PydanticBaseSettingsSource, ...]:
         yaml_path = config_yaml_path()
-        if _looks_like_dotenv(yaml_path):
+        if _looks_like_dotenv(yaml_path, _config_stamp(yaml_path)):
             file_config_settings: PydanticBaseSettingsSource = DotEnvSettingsSource(
                 settings_cls,
                 env_file=yaml_path,
@@ -99,13 +115,44 @@ def _env_value(*names: str) -> str | None:
     return None
 
 
+_SETTINGS_ENV_NAMES = (
+    "QPG_OPENAI_API_KEY",
+    "OPENAI_API_KEY",
+    "QPG_OPENAI_BASE_URL",
+    "OPENAI_BASE_URL",
+    "QPG_OPENAI_MODEL",
+    "OPENAI_MODEL",
+)
+
+
+@lru_cache(maxsize=8)
+def _load_settings(
+    yaml_path: Path,
+    yaml_stamp: tuple[int, int] | None,
+    env: tuple[str | None, ...],
+) -> QPGSettings:
+    return QPGSettings()
+
+
+def _cached_settings() -> QPGSettings:
+    # Re-parse only when the config file or the relevant environment changes.
+    yaml_path = config_yaml_path()
+    env = tuple(os.environ.get(name) for name in _SETTINGS_ENV_NAMES)
+    return _load_settings(yaml_path, _config_stamp(yaml_path), env)
+
+
+def clear_settings_cache() -> None:
+    _load_settings.cache_clear()
+    _looks_like_dotenv.cache_clear()
+
+
 def resolve_openai_settings(
     *,
     api_key_override: str | None = None,
     base_url_override: str | None = None,
     model_override: str | None = None,
 ) -> OpenAISettings:
-    base = QPGSettings()
+    base = _cached_settings()
     api_key = (
         _clean_optional(api_key_override)
         or _env_value("QPG_OPENAI_API_KEY", "OPENAI_API_KEY")
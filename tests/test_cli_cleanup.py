@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import qpg.cli as cli_mod
+
+
+def test_cleanup_reclaims_incrementally_on_new_index(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    conn = cli_mod._with_db()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.executemany(
+        "INSERT INTO llm_cache(key, value_json, expires_at) VALUES(?, ?, '2000-01-01T00:00:00.000Z')",
+        [(f"key-{i}", "x" * 2000) for i in range(200)],
+    )
+    # Live rows keep the freed share under the full-VACUUM threshold.
+    conn.executemany(
+        "INSERT INTO llm_cache(key, value_json) VALUES(?, ?)",
+        [(f"live-{i}", "x" * 2000) for i in range(2000)],
+    )
+    conn.commit()
+
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    assert cli_mod.main(["cleanup"]) == 0
+    conn.set_trace_callback(None)
+
+    assert "cleanup complete" in capsys.readouterr().out
+    assert "VACUUM" not in statements
+    assert conn.execute("SELECT COUNT(*) FROM llm_cache WHERE expires_at IS NOT NULL").fetchone()[0] == 0
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_cleanup_full_converts_legacy_index_to_incremental(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    db_path = tmp_path / "cache" / "qpg" / "index.sqlite"
+    db_path.parent.mkdir(parents=True)
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE legacy_marker(id INTEGER)")
+    legacy.commit()
+    legacy.close()
+
+    conn = cli_mod._with_db()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    assert cli_mod.main(["cleanup", "--full"]) == 0
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_cleanup_converts_legacy_index_without_full_flag(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    db_path = tmp_path / "cache" / "qpg" / "index.sqlite"
+    db_path.parent.mkdir(parents=True)
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE legacy_marker(id INTEGER)")
+    legacy.commit()
+    legacy.close()
+
+    conn = cli_mod._with_db()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    # A few expired rows: far below the free-page threshold.
+    conn.executemany(
+        "INSERT INTO llm_cache(key, value_json, expires_at) VALUES(?, ?, '2000-01-01T00:00:00.000Z')",
+        [(f"key-{i}", "x") for i in range(3)],
+    )
+    conn.commit()
+
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    assert cli_mod.main(["cleanup"]) == 0
+    conn.set_trace_callback(None)
+
+    assert "cleanup complete" in capsys.readouterr().out
+    assert "VACUUM" in statements
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
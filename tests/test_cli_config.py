@@ -157,3 +157,23 @@ def test_config_json_reads_dotenv_style_config_file(monkeypatch, tmp_path: Path,
     assert payload["openai"]["api_key_redacted"] == "sk-...nv"
     assert payload["openai"]["model"] == "gpt-4.1-mini"
     assert payload["openai"]["base_url"] == "https://dotenv.example.test/v1"
+
+
+def test_config_picks_up_yaml_edits_between_calls(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    for name in ("QPG_OPENAI_MODEL", "OPENAI_MODEL"):
+        monkeypatch.delenv(name, raising=False)
+
+    cfg = tmp_path / "config" / "qpg" / "config.yaml"
+    cfg.parent.mkdir(parents=True, exist_ok=True)
+    cfg.write_text("openai_model: gpt-4.1-nano\n")
+
+    assert cli_mod.main(["config", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["openai"]["model"] == "gpt-4.1-nano"
+
+    cfg.write_text("openai_model: gpt-4.1-mini-edited\n")
+
+    assert cli_mod.main(["config", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["openai"]["model"] == "gpt-4.1-mini-edited"
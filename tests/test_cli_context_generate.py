@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import sqlite3
+import threading
 from pathlib import Path
 
+import pytest
+
 import qpg.cli as cli_mod
+import qpg.context_generate as context_generate_mod
+from qpg.context_generate import ContextGenerationError, ContextGenerationResult
 from qpg.db_sqlite import connect_sqlite, ensure_schema
 
 
@@ -61,15 +67,19 @@ def test_context_generate_creates_table_target_context(
 
     calls: list[str] = []
 
-    def fake_generate(conn, candidate, *, api_key: str, model: str, base_url: str) -> str:
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
         assert api_key == "test-key"
         assert model == "fake-model"
         assert candidate.fqname == "public.orders"
         assert len(candidate.columns) == 2
         calls.append(candidate.target_uri)
-        return "Tracks customer order lifecycle and status transitions."
+        return ContextGenerationResult(
+            context_text="Tracks customer order lifecycle and status transitions."
+        )
 
-    monkeypatch.setattr(cli_mod, "generate_table_context_text", fake_generate)
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
 
     code = cli_mod.main(
         [
@@ -110,11 +120,13 @@ def test_context_generate_reads_api_key_and_model_from_settings_env(
 
     calls: list[tuple[str, str, str]] = []
 
-    def fake_generate(conn, candidate, *, api_key: str, model: str, base_url: str) -> str:
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
         calls.append((api_key, model, base_url))
-        return "generated from env settings"
+        return ContextGenerationResult(context_text="generated from env settings")
 
-    monkeypatch.setattr(cli_mod, "generate_table_context_text", fake_generate)
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
 
     code = cli_mod.main(["context", "generate", "--source", "work"])
     assert code == 0
@@ -147,11 +159,13 @@ def test_context_generate_reads_settings_from_yaml_config(
 
     calls: list[tuple[str, str, str]] = []
 
-    def fake_generate(conn, candidate, *, api_key: str, model: str, base_url: str) -> str:
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
         calls.append((api_key, model, base_url))
-        return "generated from yaml settings"
+        return ContextGenerationResult(context_text="generated from yaml settings")
 
-    monkeypatch.setattr(cli_mod, "generate_table_context_text", fake_generate)
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
 
     code = cli_mod.main(["context", "generate", "--source", "work"])
     assert code == 0
@@ -180,12 +194,14 @@ def test_context_generate_skips_existing_unless_overwrite(
 
     calls = 0
 
-    def fake_generate(conn, candidate, *, api_key: str, model: str, base_url: str) -> str:
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
         nonlocal calls
         calls += 1
-        return "new context"
+        return ContextGenerationResult(context_text="new context")
 
-    monkeypatch.setattr(cli_mod, "generate_table_context_text", fake_generate)
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
 
     code = cli_mod.main(
         ["context", "generate", "--source", "work", "--api-key", "test-key", "--model", "fake-model"]
@@ -240,10 +256,12 @@ def test_context_generate_skips_when_no_reasonable_inference(
     monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
     db_path = _prepare_index(tmp_path)
 
-    def fake_generate(conn, candidate, *, api_key: str, model: str, base_url: str):
-        return None
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
+        return ContextGenerationResult(context_text=None)
 
-    monkeypatch.setattr(cli_mod, "generate_table_context_text", fake_generate)
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
 
     code = cli_mod.main(
         [
@@ -281,3 +299,173 @@ def test_context_list_does_not_require_http_flag(
 
     code = cli_mod.main(["context", "list"])
     assert code == 0
+
+
+def test_context_generate_runs_tables_concurrently_and_reports_in_order(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    db_path = _prepare_index(tmp_path)
+
+    conn = connect_sqlite(db_path)
+    try:
+        conn.execute(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            SELECT 'obj_customers', id, 'public', 'customers', 'table', 'public.customers'
+            FROM sources WHERE name = 'work'
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    customers_started = threading.Event()
+
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
+        if candidate.fqname == "public.customers":
+            customers_started.set()
+        else:
+            # Only returns if the other table is generated at the same time.
+            assert customers_started.wait(timeout=5)
+        return ContextGenerationResult(context_text=f"context for {candidate.fqname}")
+
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
+
+    code = cli_mod.main(
+        ["context", "generate", "--source", "work", "--api-key", "test-key", "--concurrency", "2"]
+    )
+    assert code == 0
+
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("generated")]
+    assert lines == [
+        "generated context: qpg://work/public.customers",
+        "generated context: qpg://work/public.orders",
+    ]
+
+
+def test_context_generate_persists_llm_cache_in_one_batch_and_reuses_it(
+    monkeypatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    db_path = _prepare_index(tmp_path)
+
+    prompts: list[str] = []
+
+    def fake_chat(*, api_key: str, model: str, base_url: str, prompt: str) -> str:
+        prompts.append(prompt)
+        return '{"decision": "generate", "context": "Customer orders."}'
+
+    monkeypatch.setattr(context_generate_mod, "_call_openai_chat", fake_chat)
+    flushes: list[int] = []
+    real_flush_cache = context_generate_mod.flush_cache
+
+    def counting_flush_cache(conn, entries) -> None:
+        if entries:
+            flushes.append(len(entries))
+        real_flush_cache(conn, entries)
+
+    monkeypatch.setattr(context_generate_mod, "flush_cache", counting_flush_cache)
+
+    args = ["context", "generate", "--source", "work", "--api-key", "test-key", "--dry-run"]
+    assert cli_mod.main(args) == 0
+    assert cli_mod.main(args) == 0
+
+    assert len(prompts) == 1
+    assert flushes == [1]
+    conn = connect_sqlite(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_context_generate_reuses_one_index_connection_per_worker(
+    monkeypatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    db_path = _prepare_index(tmp_path)
+
+    conn = connect_sqlite(db_path)
+    try:
+        conn.executemany(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            SELECT ?, id, 'public', ?, 'table', ? FROM sources WHERE name = 'work'
+            """,
+            [("obj_a", "a", "public.a"), ("obj_b", "b", "public.b")],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    seen: list[object] = []
+
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
+        seen.append(conn)
+        return ContextGenerationResult(context_text=None)
+
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
+
+    code = cli_mod.main(
+        ["context", "generate", "--source", "work", "--api-key", "test-key", "--concurrency", "1"]
+    )
+    assert code == 0
+    assert len(seen) == 3
+    assert len({id(conn) for conn in seen}) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        seen[0].execute("SELECT 1")
+
+
+def test_context_generate_keeps_contexts_generated_before_a_failure(
+    monkeypatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    db_path = _prepare_index(tmp_path)
+    conn = connect_sqlite(db_path)
+    try:
+        conn.execute(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            SELECT 'obj_accounts', id, 'public', 'accounts', 'table', 'public.accounts' FROM sources
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    def fake_generate(
+        conn, candidate, *, api_key: str, model: str, base_url: str
+    ) -> ContextGenerationResult:
+        if candidate.fqname == "public.orders":
+            raise ContextGenerationError("OpenAI API error (500): upstream failure")
+        return ContextGenerationResult(context_text=f"Context for {candidate.fqname}.")
+
+    monkeypatch.setattr(context_generate_mod, "generate_table_context_text", fake_generate)
+
+    code = cli_mod.main(["context", "generate", "--source", "work", "--api-key", "test-key"])
+    assert code == 2
+
+    conn = connect_sqlite(db_path)
+    try:
+        rows = conn.execute("SELECT target_uri, body FROM contexts").fetchall()
+        assert [tuple(row) for row in rows] == [("qpg://work/public.accounts", "Context for public.accounts.")]
+    finally:
+        conn.close()
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import qpg.cli as cli_mod
+
+
+def test_with_db_reuses_connection_and_runs_schema_once(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    schema_calls: list[sqlite3.Connection] = []
+    real_ensure_schema = cli_mod.ensure_schema
+
+    def counting_ensure_schema(conn: sqlite3.Connection) -> bool:
+        schema_calls.append(conn)
+        return real_ensure_schema(conn)
+
+    monkeypatch.setattr(cli_mod, "ensure_schema", counting_ensure_schema)
+
+    first = cli_mod._with_db()
+    second = cli_mod._with_db()
+
+    assert first is second
+    assert schema_calls == [first]
+
+    assert cli_mod.main(["status"]) == 0
+    assert cli_mod.main(["source", "list"]) == 0
+    assert len(schema_calls) == 1
+    first.execute("SELECT 1").fetchone()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+
+def test_cli_import_defers_heavy_dependencies() -> None:
+    code = (
+        "import json, sys, qpg.cli; "
+        "print(json.dumps(sorted(m for m in "
+        "('torch', 'transformers', 'huggingface_hub', 'psycopg', 'pydantic_settings', "
+        "'numpy', 'qpg.context_generate', 'qpg.mcp.server_http') "
+        "if m in sys.modules)))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == []
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import qpg.cli as cli_mod
+from qpg.config import get_paths
+
+
+def _fake_popen(launched: list[list[str]], *, returncode: int | None = None):
+    def fake_popen(cmd: list[str], **kwargs) -> SimpleNamespace:
+        launched.append(cmd)
+        return SimpleNamespace(pid=424242, returncode=returncode, poll=lambda: returncode)
+
+    return fake_popen
+
+
+def test_mcp_daemon_replaces_stale_pid_file_atomically(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    pid_file = get_paths().mcp_pid_file
+    pid_file.parent.mkdir(parents=True, exist_ok=True)
+    pid_file.write_text("", encoding="utf-8")
+
+    launched: list[list[str]] = []
+    monkeypatch.setattr(subprocess, "Popen", _fake_popen(launched))
+    monkeypatch.setattr(cli_mod, "_pid_alive", lambda pid: False)
+    monkeypatch.setattr(cli_mod, "_wait_for_daemon", lambda proc, host, port: True)
+
+    assert cli_mod.main(["mcp", "--http", "--daemon"]) == 0
+
+    assert len(launched) == 1
+    assert pid_file.read_text(encoding="utf-8") == "424242"
+    assert sorted(p.name for p in pid_file.parent.iterdir()) == [pid_file.name]
+
+
+def test_mcp_daemon_refuses_to_start_while_pid_is_alive(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    pid_file = get_paths().mcp_pid_file
+    pid_file.parent.mkdir(parents=True, exist_ok=True)
+    pid_file.write_text(str(os.getpid()), encoding="utf-8")
+
+    launched: list[list[str]] = []
+    monkeypatch.setattr(subprocess, "Popen", _fake_popen(launched))
+
+    assert cli_mod.main(["mcp", "--http", "--daemon"]) == 2
+
+    assert launched == []
+    assert f"already running (pid={os.getpid()})" in capsys.readouterr().err
+    assert pid_file.read_text(encoding="utf-8") == str(os.getpid())
+
+
+def test_mcp_daemon_reports_child_that_exits_during_startup(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    launched: list[list[str]] = []
+    monkeypatch.setattr(subprocess, "Popen", _fake_popen(launched, returncode=3))
+
+    assert cli_mod.main(["mcp", "--http", "--daemon"]) == 1
+
+    assert len(launched) == 1
+    assert "exited during startup (code=3)" in capsys.readouterr().err
+    assert not get_paths().mcp_pid_file.exists()
+
+
+def test_concurrent_starters_cannot_both_claim_a_stale_pid_file(monkeypatch, tmp_path: Path) -> None:
+    pid_file = tmp_path / "state" / "mcp.pid"
+    pid_file.parent.mkdir(parents=True)
+    pid_file.write_text("999999", encoding="utf-8")
+    results: dict[str, int | None] = {}
+    rival = threading.Thread(target=lambda: results.update(rival=cli_mod._claim_pid_file(pid_file, 2222)))
+
+    def fake_pid_alive(pid: int) -> bool:
+        if pid == 999999 and not rival.is_alive() and "rival" not in results:
+            # A second starter arrives between this read of the stale pid and its unlink.
+            rival.start()
+            time.sleep(0.2)
+        return pid in (1111, 2222)
+
+    monkeypatch.setattr(cli_mod, "_pid_alive", fake_pid_alive)
+
+    assert cli_mod._claim_pid_file(pid_file, 1111) is None
+    rival.join(timeout=5)
+
+    assert results == {"rival": 1111}
+    assert pid_file.read_text(encoding="utf-8") == "1111"
+
+
+def test_mcp_daemon_reports_pid_file_it_cannot_claim(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    def always_exists(pid_file: Path, pid: int, *, exclusive: bool = False) -> None:
+        raise FileExistsError(pid_file)
+
+    launched: list[list[str]] = []
+    monkeypatch.setattr(subprocess, "Popen", _fake_popen(launched))
+    monkeypatch.setattr(cli_mod, "_write_pid_file", always_exists)
+
+    assert cli_mod.main(["mcp", "--http", "--daemon"]) == 1
+
+    assert launched == []
+    err = capsys.readouterr().err
+    assert "could not claim mcp daemon pid file" in err
+    assert "pid=0" not in err
@@ -5,6 +5,7 @@ import sqlite3
 from pathlib import Path
 
 import qpg.cli as cli_mod
+import qpg.mcp.server_http as server_http_mod
 
 
 def test_mcp_http_uses_thread_safe_sqlite_connection(monkeypatch, tmp_path: Path) -> None:
@@ -31,7 +32,7 @@ def test_mcp_http_uses_thread_safe_sqlite_connection(monkeypatch, tmp_path: Path
     monkeypatch.setattr(cli_mod, "connect_sqlite", fake_connect)
     monkeypatch.setattr(cli_mod, "ensure_schema", fake_ensure_schema)
     monkeypatch.setattr(cli_mod, "require_vector_model", lambda: Path("/tmp/model"))
-    monkeypatch.setattr(cli_mod, "serve_http", fake_serve_http)
+    monkeypatch.setattr(server_http_mod, "serve_http", fake_serve_http)
 
     args = argparse.Namespace(http=True, daemon=False, host="127.0.0.1", port=8765, mcp_cmd=None)
     code = cli_mod.cmd_mcp(args)
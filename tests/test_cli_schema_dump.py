@@ -67,3 +67,43 @@ def test_schema_command_prints_entire_table_definition(
     assert "CREATE TABLE public.event_data" in out
     assert "id bigint NOT NULL" in out
     assert "payload jsonb" in out
+
+
+def test_schema_command_groups_objects_by_source(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    db_path = cache / "qpg" / "index.sqlite"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = connect_sqlite(db_path)
+    ensure_schema(conn)
+    try:
+        conn.executemany(
+            "INSERT INTO sources(name, dsn) VALUES(?, ?)",
+            [("alpha", "postgresql://u@h/alpha"), ("beta", "postgresql://u@h/beta")],
+        )
+        conn.execute(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname, definition, comment)
+            SELECT 'obj_' || s.name, s.id, 'public', 'v', 'view', 'public.v', 'SELECT 1', s.name || ' view'
+            FROM sources s
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert main(["schema"]) == 0
+
+    assert capsys.readouterr().out == (
+        "== source: alpha ==\n"
+        "\n-- public.v (view)\n-- alpha view\nSELECT 1\n"
+        "\n== source: beta ==\n"
+        "\n-- public.v (view)\n-- beta view\nSELECT 1\n"
+    )
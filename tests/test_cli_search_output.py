@@ -1,22 +1,15 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
+import qpg.cli as cli_mod
 from qpg.cli import main
 from qpg.db_sqlite import connect_sqlite, ensure_schema
 from qpg.index.fts import rebuild_fts
 
 
-def test_search_prints_definition_and_description(
-    monkeypatch,
-    tmp_path: Path,
-    capsys,
-) -> None:
-    cache = tmp_path / "cache"
-    state = tmp_path / "state"
-    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
-    monkeypatch.setenv("XDG_STATE_HOME", str(state))
-
+def _seed_index(cache: Path) -> None:
     db_path = cache / "qpg" / "index.sqlite"
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -73,6 +66,19 @@ def test_search_prints_definition_and_description(
     finally:
         conn.close()
 
+
+def test_search_prints_definition_and_description(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    cache = tmp_path / "cache"
+    state = tmp_path / "state"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    monkeypatch.setenv("XDG_STATE_HOME", str(state))
+
+    _seed_index(cache)
+
     code = main(["search", "event_data", "--source", "datadb"])
     assert code == 0
 
@@ -81,3 +87,72 @@ def test_search_prints_definition_and_description(
     assert "description: Stores normalized incoming event records" in out
     assert "CREATE TABLE public.event_data" in out
     assert "event_name text NOT NULL" in out
+
+
+def test_query_fuses_parallel_lexical_and_vector_results(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    _seed_index(cache)
+
+    vector_queries: list[str] = []
+
+    def fake_vector_search(conn, *, query: str, **_: object) -> list[dict[str, object]]:
+        vector_queries.append(query)
+        return [
+            {
+                "object_id": "obj_event_data",
+                "fqname": "public.event_data",
+                "object_type": "table",
+                "source_name": "datadb",
+                "score": 0.5,
+            }
+        ]
+
+    monkeypatch.setattr(cli_mod, "require_vector_model", lambda: tmp_path)
+    monkeypatch.setattr(cli_mod, "vector_search", fake_vector_search)
+
+    code = main(["query", "event data", "--source", "datadb"])
+    assert code == 0
+    assert vector_queries == ["event data"]
+
+    out = capsys.readouterr().out
+    assert out.startswith("obj_event_data\tpublic.event_data\ttable\tdatadb\t")
+
+
+def test_search_all_json_streams_same_document_as_buffered_output(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    _seed_index(cache)
+
+    code = main(["search", "event_data", "--all", "--json"])
+    assert code == 0
+    streamed = capsys.readouterr().out
+
+    rows = json.loads(streamed)
+    assert [row["object_id"] for row in rows] == ["obj_event_data"]
+    cli_mod._print_json(rows)
+    assert streamed == capsys.readouterr().out
+
+    code = main(["search", "no_such_token", "--all", "--json"])
+    assert code == 0
+    assert capsys.readouterr().out == "[]\n"
+
+
+def test_search_files_prints_one_fqname_per_line(monkeypatch, tmp_path: Path, capsys) -> None:
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    _seed_index(cache)
+
+    assert main(["search", "event_data", "--files"]) == 0
+    assert capsys.readouterr().out == "public.event_data\n"
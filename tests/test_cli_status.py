@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import qpg.cli as cli_mod
+
+
+def test_status_json_counts_objects_per_source(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    conn = cli_mod._with_db()
+    conn.executemany(
+        "INSERT INTO sources(name, dsn) VALUES(?, ?)",
+        [("alpha", "postgresql://u@h/alpha"), ("beta", "postgresql://u@h/beta")],
+    )
+    alpha_id = conn.execute("SELECT id FROM sources WHERE name = 'alpha'").fetchone()["id"]
+    conn.executemany(
+        """
+        INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+        VALUES(?, ?, 'public', ?, ?, ?)
+        """,
+        [
+            ("obj_a", alpha_id, "a", "table", "public.a"),
+            ("obj_b", alpha_id, "b", "view", "public.b"),
+        ],
+    )
+    conn.commit()
+
+    assert cli_mod.main(["status", "--json"]) == 0
+
+    payload = json.loads(capsys.readouterr().out)
+    assert payload["source_count"] == 2
+    assert payload["object_count"] == 2
+    assert {row["name"]: row["objects"] for row in payload["sources"]} == {"alpha": 2, "beta": 0}
+    assert payload["by_kind"] == [{"kind": "table", "count": 1}, {"kind": "view", "count": 1}]
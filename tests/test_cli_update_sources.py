@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import qpg.cli as cli_mod
+from qpg.index.build import UpdateStats
+from qpg.schema.introspect import IntrospectionBundle
+
+
+def test_update_introspects_sources_concurrently_and_reports_in_order(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    conn = cli_mod._with_db()
+    conn.executemany(
+        "INSERT INTO sources(name, dsn) VALUES(?, ?)",
+        [("alpha", "postgresql://u@h/alpha"), ("beta", "postgresql://u@h/beta"), ("gamma", "postgresql://u@h/gamma")],
+    )
+    conn.commit()
+
+    barrier = threading.Barrier(3, timeout=5)
+
+    @contextmanager
+    def fake_connect_pg(dsn: str):
+        yield dsn
+
+    def fake_introspect_schema(pg_conn: str, *, include_functions: bool, include_schemas) -> IntrospectionBundle:
+        # Every source must be in flight at once for the barrier to release.
+        barrier.wait()
+        if pg_conn.endswith("/beta"):
+            raise RuntimeError("boom")
+        return IntrospectionBundle()
+
+    indexed: list[str] = []
+
+    def fake_update_source_index(conn, *, source, bundle, contexts) -> UpdateStats:
+        indexed.append(source.name)
+        return UpdateStats(objects=1, columns=0, constraints=0, indexes=0, dependencies=0, vectors=0)
+
+    monkeypatch.setattr(cli_mod, "require_vector_model", lambda: tmp_path)
+    monkeypatch.setattr(cli_mod, "connect_pg", fake_connect_pg)
+    monkeypatch.setattr(cli_mod, "introspect_schema", fake_introspect_schema)
+    monkeypatch.setattr(cli_mod, "update_source_index", fake_update_source_index)
+
+    code = cli_mod.main(["update"])
+    assert code == 4
+    assert indexed == ["alpha", "gamma"]
+
+    captured = capsys.readouterr()
+    headers = [line for line in captured.out.splitlines() if line.startswith("== update:")]
+    assert headers == ["== update: alpha ==", "== update: beta ==", "== update: gamma =="]
+    assert "failed introspection: boom" in captured.err
+
+    row = conn.execute("SELECT last_error FROM sources WHERE name = 'beta'").fetchone()
+    assert row["last_error"] == "failed introspection: boom"
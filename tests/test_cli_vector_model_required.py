@@ -5,6 +5,7 @@ from pathlib import Path
 import pytest
 
 import qpg.cli as cli_mod
+import qpg.mcp.server_stdio as server_stdio_mod
 from qpg.index.vec import VectorModelNotInitializedError
 
 
@@ -57,7 +58,7 @@ def test_mcp_starts_without_initialized_model(
         raise VectorModelNotInitializedError("vector model is not initialized. Run `qpg init`.")
 
     monkeypatch.setattr(cli_mod, "require_vector_model", fail_require_model)
-    monkeypatch.setattr(cli_mod, "serve_stdio", lambda _conn: 0)
+    monkeypatch.setattr(server_stdio_mod, "serve_stdio", lambda _conn: 0)
 
     code = cli_mod.main(["mcp"])
     assert code == 0
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from qpg.context_generate import (
+    ColumnSummary,
+    TableContextCandidate,
+    _build_prompt,
+    _cache_key,
+    _legacy_cache_key,
+    flush_cache,
+    generate_table_context_text,
+)
+from qpg.db_sqlite import connect_sqlite, ensure_schema
+
+
+def test_cache_key_formats() -> None:
+    prompt = "Table: public.orders\nColumns:\n- id bigint not null"
+    blake = hashlib.blake2b(f"gpt-4o-mini\n{prompt}".encode(), digest_size=16).hexdigest()
+    sha = hashlib.sha256(f"gpt-4o-mini\n{prompt}".encode()).hexdigest()
+
+    assert _cache_key(model="gpt-4o-mini", prompt=prompt) == f"context-gen2:{blake}"
+    assert _legacy_cache_key(model="gpt-4o-mini", prompt=prompt) == f"context-gen:{sha}"
+
+
+def test_legacy_cache_rows_are_reused_and_rekeyed(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        candidate = TableContextCandidate(
+            source_name="datadb",
+            object_id="obj_orders",
+            fqname="public.orders",
+            schema_name="public",
+            object_name="orders",
+            definition=None,
+            comment="Customer orders",
+            columns=[ColumnSummary("status", "text", False, None, None)],
+            has_existing_context=False,
+        )
+        prompt = _build_prompt(candidate)
+        conn.execute(
+            "INSERT INTO llm_cache(key, value_json) VALUES(?, ?)",
+            (
+                _legacy_cache_key(model="gpt-test", prompt=prompt),
+                '{"context": "Orders placed by customers.", "decision": "generate"}',
+            ),
+        )
+        conn.commit()
+
+        result = generate_table_context_text(
+            conn, candidate, api_key="unused", model="gpt-test", base_url="http://127.0.0.1:9"
+        )
+        assert result.context_text == "Orders placed by customers."
+        assert result.cache_entry is not None
+        assert result.cache_entry[0] == _cache_key(model="gpt-test", prompt=prompt)
+
+        flush_cache(conn, [result.cache_entry])
+        again = generate_table_context_text(
+            conn, candidate, api_key="unused", model="gpt-test", base_url="http://127.0.0.1:9"
+        )
+        assert again.context_text == "Orders placed by customers."
+        assert again.cache_entry is None
+    finally:
+        conn.close()
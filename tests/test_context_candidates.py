@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from qpg.context_generate import TableContextCandidate, list_table_context_candidates
+from qpg.db_sqlite import connect_sqlite, ensure_schema
+
+
+def test_candidates_load_columns_and_existing_context_in_bulk(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES(?, ?)", ("datadb", "postgresql://u@h/db"))
+        source_id = conn.execute("SELECT id FROM sources WHERE name = ?", ("datadb",)).fetchone()["id"]
+        conn.executemany(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            VALUES(?, ?, 'public', ?, 'table', ?)
+            """,
+            [
+                ("obj_users", source_id, "users", "public.users"),
+                ("obj_orders", source_id, "orders", "public.orders"),
+                ("obj_empty", source_id, "empty", "public.empty"),
+            ],
+        )
+        conn.executemany(
+            """
+            INSERT INTO columns(object_id, column_name, data_type, is_nullable, ordinal_position)
+            VALUES(?, ?, ?, ?, ?)
+            """,
+            [
+                ("obj_orders", "user_id", "bigint", 0, 2),
+                ("obj_orders", "id", "bigint", 0, 1),
+                ("obj_users", "id", "bigint", 0, 1),
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO contexts(target_uri, body) VALUES(?, ?)",
+            [("qpg://datadb/public.users", "first"), ("qpg://datadb/public.users", "second")],
+        )
+        conn.commit()
+
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        candidates = list_table_context_candidates(conn, include_with_existing=True)
+        conn.set_trace_callback(None)
+
+        assert len(statements) == 2
+        assert [c.fqname for c in candidates] == ["public.empty", "public.orders", "public.users"]
+        assert [c.has_existing_context for c in candidates] == [False, False, True]
+        assert [col.name for col in candidates[1].columns] == ["id", "user_id"]
+        assert candidates[0].columns == []
+
+        pending = list_table_context_candidates(conn)
+        assert [c.fqname for c in pending] == ["public.empty", "public.orders"]
+
+        conn.execute("INSERT INTO contexts(target_uri, body) VALUES('qpg://datadb/public.empty', 'done')")
+        conn.commit()
+        assert [c.fqname for c in list_table_context_candidates(conn, limit=1)] == ["public.orders"]
+    finally:
+        conn.close()
+
+
+def test_candidate_target_uri_is_computed_once() -> None:
+    candidate = TableContextCandidate(
+        source_name="datadb",
+        object_id="obj_users",
+        fqname="public.users",
+        schema_name="public",
+        object_name="users",
+        definition=None,
+        comment=None,
+        columns=[],
+        has_existing_context=False,
+    )
+
+    assert candidate.target_uri == "qpg://datadb/public.users"
+    assert candidate.target_uri is candidate.target_uri
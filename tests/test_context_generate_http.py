@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar
+
+import pytest
+
+import qpg.context_generate as context_generate_mod
+from qpg.context_generate import ContextGenerationError
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections: ClassVar[list[tuple[str, int]]] = []
+    paths: ClassVar[list[str]] = []
+    throttle_responses: ClassVar[int] = 0
+
+    def setup(self) -> None:
+        super().setup()
+        type(self).connections.append(self.client_address)
+
+    def do_POST(self) -> None:
+        length = int(self.headers["Content-Length"])
+        request_body = json.loads(self.rfile.read(length))
+        type(self).paths.append(self.path)
+        retry_after = None
+        if request_body["model"] == "broken":
+            status, payload = 400, {"error": "bad model"}
+        elif type(self).throttle_responses:
+            type(self).throttle_responses -= 1
+            status, payload, retry_after = 429, {"error": "slow down"}, "1.5"
+        else:
+            status, payload = 200, {"choices": [{"message": {"content": "ok"}}]}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        if retry_after is not None:
+            self.send_header("Retry-After", retry_after)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        return
+
+
+def _start_server(monkeypatch) -> tuple[ThreadingHTTPServer, str]:
+    monkeypatch.setattr(context_generate_mod, "_HTTP_CONNECTIONS", threading.local())
+    _ChatHandler.connections = []
+    _ChatHandler.paths = []
+    _ChatHandler.throttle_responses = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_openai_calls_reuse_one_keepalive_connection(monkeypatch) -> None:
+    server, base_url = _start_server(monkeypatch)
+    try:
+        for _ in range(3):
+            text = context_generate_mod._call_openai_chat(
+                api_key="sk-test",
+                model="gpt-test",
+                base_url=base_url,
+                prompt="describe",
+            )
+            assert text == "ok"
+
+        with pytest.raises(ContextGenerationError, match=r"OpenAI API error \(400\)"):
+            context_generate_mod._call_openai_chat(
+                api_key="sk-test",
+                model="broken",
+                base_url=base_url,
+                prompt="describe",
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(_ChatHandler.connections) == 1
+    assert _ChatHandler.paths == ["/v1/chat/completions"] * 4
+
+
+def test_openai_calls_back_off_on_throttling(monkeypatch) -> None:
+    server, base_url = _start_server(monkeypatch)
+    _ChatHandler.throttle_responses = 2
+    delays: list[float] = []
+    monkeypatch.setattr(context_generate_mod.time, "sleep", delays.append)
+    try:
+        text = context_generate_mod._call_openai_chat(
+            api_key="sk-test",
+            model="gpt-test",
+            base_url=base_url,
+            prompt="describe",
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert text == "ok"
+    assert delays == [1.5, 1.5]
+    assert len(_ChatHandler.paths) == 3
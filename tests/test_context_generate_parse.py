@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+from qpg.context_generate import ContextGenerationError, _parse_generation_output
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"decision": "generate", "context": "Customer orders."}',
+        '```json\n{"decision": "generate",\n "context": "Customer orders."}\n```',
+        '  ```\n{"decision": "generate", "context": "Customer orders."}\n```  ',
+    ],
+)
+def test_parse_generation_output_accepts_plain_and_fenced_json(text: str) -> None:
+    result = _parse_generation_output(text)
+    assert result.context_text == "Customer orders."
+
+
+def test_parse_generation_output_falls_back_to_raw_text() -> None:
+    assert _parse_generation_output("```\nnot json\n```").context_text == "```\nnot json\n```"
+    assert _parse_generation_output('{"decision": "skip"}').context_text is None
+    with pytest.raises(ContextGenerationError):
+        _parse_generation_output('["not", "an", "object"]')
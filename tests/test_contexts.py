@@ -1,13 +1,21 @@
 import sqlite3
 
+import pytest
+
+import qpg.contexts as contexts_mod
 from qpg.contexts import (
     ContextRecord,
+    ContextScope,
     ContextSourceNotFoundError,
+    InvalidContextTarget,
     ObjectRef,
     add_context,
+    build_context_index,
     list_contexts,
     parse_context_target,
+    replace_contexts,
     resolve_effective_context,
+    resolve_indexed_context,
 )
 from qpg.db_sqlite import ensure_schema
 from qpg.sources import add_source, delete_source
@@ -30,6 +38,25 @@ def test_parse_context_target_levels() -> None:
     assert object_scope.object_name == "orders"
 
 
+def test_parse_context_target_matches_url_split_rules() -> None:
+    assert parse_context_target("QPG://work/public.orders?x=1") == ContextScope(
+        source="work", schema="public", object_name="orders"
+    )
+    assert parse_context_target("qpg://work/public/orders.id") == ContextScope(
+        source="work", schema="public", object_name="orders.id"
+    )
+    assert parse_context_target("qpg://work/public#obj_1") == ContextScope(source="work", object_id="obj_1")
+    assert parse_context_target("qpg://work?x=1#") == ContextScope(source="work")
+
+    for target_uri, message in (
+        ("postgres://work", "must begin with qpg://"),
+        ("qpg:/work", "must begin with qpg://"),
+        ("qpg:///public", "must include a source name"),
+    ):
+        with pytest.raises(InvalidContextTarget, match=message):
+            parse_context_target(target_uri)
+
+
 def test_context_inheritance_resolution() -> None:
     contexts = [
         ContextRecord(id=1, target_uri="qpg://work", body="global context", created_at=""),
@@ -58,6 +85,54 @@ def test_object_context_inherits_to_child_object_names() -> None:
     assert resolve_effective_context(contexts, other_obj) == ""
 
 
+def test_indexed_resolution_keeps_order_and_dedupes() -> None:
+    contexts = [
+        ContextRecord(id=1, target_uri="qpg://work/public.orders", body="orders context", created_at=""),
+        ContextRecord(id=2, target_uri="qpg://work", body="global context", created_at=""),
+        ContextRecord(id=3, target_uri="qpg://work/public.orders.id", body="id context", created_at=""),
+        ContextRecord(id=4, target_uri="qpg://work/public", body="orders context", created_at=""),
+        ContextRecord(id=5, target_uri="qpg://other", body="other source", created_at=""),
+        ContextRecord(id=6, target_uri="not-a-target", body="ignored", created_at=""),
+        ContextRecord(id=7, target_uri="qpg://work/sales.orders", body="sales orders", created_at=""),
+        ContextRecord(id=8, target_uri="qpg://work#col", body="column by id", created_at=""),
+    ]
+    index = build_context_index(contexts)
+
+    column_obj = ObjectRef(source="work", schema="public", object_name="orders.id", object_id="col")
+    other_obj = ObjectRef(source="work", schema="public", object_name="order_items.id", object_id="col2")
+
+    assert resolve_indexed_context(index, column_obj).split("\n") == [
+        "orders context",
+        "global context",
+        "id context",
+        "column by id",
+    ]
+    assert resolve_indexed_context(index, other_obj).split("\n") == ["global context", "orders context"]
+    for obj in (column_obj, other_obj):
+        assert resolve_indexed_context(index, obj) == resolve_effective_context(contexts, obj)
+
+
+def test_indexed_resolution_memoizes_per_bucket_set() -> None:
+    contexts = [
+        ContextRecord(id=1, target_uri="qpg://work/public.orders", body="orders context", created_at=""),
+        ContextRecord(id=2, target_uri="qpg://prod#col", body="prod column", created_at=""),
+    ]
+    index = build_context_index(contexts)
+
+    columns = [
+        ObjectRef(source="work", schema="public", object_name=f"orders.{name}", object_id=name)
+        for name in ("id", "total", "status")
+    ]
+    assert [resolve_indexed_context(index, obj) for obj in columns] == ["orders context"] * 3
+    assert len(index.resolved) == 1
+
+    prod_objects = [
+        ObjectRef(source="prod", schema="public", object_name="orders.id", object_id=object_id)
+        for object_id in ("col", "other")
+    ]
+    assert [resolve_indexed_context(index, obj) for obj in prod_objects] == ["prod column", ""]
+
+
 def test_add_context_rejects_unknown_source() -> None:
     conn = sqlite3.connect(":memory:")
     conn.row_factory = sqlite3.Row
@@ -92,3 +167,45 @@ def test_delete_source_removes_contexts_for_that_source_only() -> None:
         assert remaining[0].target_uri == "qpg://prod"
     finally:
         conn.close()
+
+
+@pytest.mark.parametrize("has_returning", [True, False])
+def test_add_context_returns_inserted_row_and_commits(monkeypatch, has_returning: bool) -> None:
+    monkeypatch.setattr(contexts_mod, "_HAS_RETURNING", has_returning)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    ensure_schema(conn)
+    try:
+        add_source(conn, "work", "postgresql://u@h/work")
+        first = add_context(conn, "qpg://work", "work source context")
+        second = add_context(conn, "qpg://work/public.orders", "orders context")
+
+        assert not conn.in_transaction
+        assert (second.id, second.target_uri, second.body) == (first.id + 1, "qpg://work/public.orders", "orders context")
+        assert second.created_at
+        assert list_contexts(conn) == [first, second]
+    finally:
+        conn.close()
+
+
+def test_replace_contexts_clears_and_inserts_in_one_commit() -> None:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    ensure_schema(conn)
+    try:
+        add_source(conn, "work", "postgresql://u@h/work")
+        add_context(conn, "qpg://work/public.orders", "old orders context")
+        add_context(conn, "qpg://work/public.users", "old users context")
+
+        replace_contexts(
+            conn,
+            [("qpg://work/public.orders", "new orders context")],
+            clear_uris=["qpg://work/public.orders", "qpg://work/public.users"],
+        )
+
+        assert not conn.in_transaction
+        assert [(row.target_uri, row.body) for row in list_contexts(conn)] == [
+            ("qpg://work/public.orders", "new orders context"),
+        ]
+    finally:
+        conn.close()
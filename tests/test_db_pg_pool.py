@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import psycopg
+import pytest
+from psycopg.pq import TransactionStatus
+
+import qpg.db_pg as db_pg_mod
+
+
+class _FakePgConnection:
+    def __init__(self) -> None:
+        self.closed = False
+        self.statements: list[str] = []
+        self.info = SimpleNamespace(transaction_status=TransactionStatus.IDLE)
+
+    def execute(self, sql: str, params: object = None) -> None:
+        self.statements.append(sql)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_connect_pg_reuses_guarded_connections(monkeypatch) -> None:
+    monkeypatch.setattr(db_pg_mod, "_IDLE_CONNECTIONS", {})
+    opened: list[_FakePgConnection] = []
+
+    def fake_connect(dsn: str, **kwargs: object) -> _FakePgConnection:
+        assert "default_transaction_read_only" in dsn
+        opened.append(_FakePgConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(psycopg, "connect", fake_connect)
+    dsn = "postgresql://u@h/db"
+
+    with db_pg_mod.connect_pg(dsn) as first:
+        pass
+    with db_pg_mod.connect_pg(dsn) as second:
+        assert second is first
+    assert len(opened) == 1
+    assert len(first.statements) == 1
+    assert "idle_in_transaction_session_timeout" in first.statements[0]
+
+    with pytest.raises(RuntimeError), db_pg_mod.connect_pg(dsn):
+        raise RuntimeError("introspection failed")
+    assert first.closed
+
+    with db_pg_mod.connect_pg(dsn) as third:
+        assert third is not first
+    db_pg_mod.close_pg_connections()
+    assert third.closed
+    assert len(opened) == 2
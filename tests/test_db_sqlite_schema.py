@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import gc
+import re
+from pathlib import Path
+
+import qpg.db_sqlite as db_sqlite_mod
+from qpg.db_sqlite import connect_sqlite, ensure_schema, has_vec_functions, now_expr, now_timestamp
+
+
+def test_ensure_schema_skips_ddl_until_schema_version_changes(tmp_path: Path) -> None:
+    db_path = tmp_path / "index.sqlite"
+    first = connect_sqlite(db_path)
+    ensure_schema(first)
+    first.close()
+
+    conn = connect_sqlite(db_path)
+    try:
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        ensure_schema(conn)
+        assert not any("CREATE TABLE" in statement for statement in statements)
+
+        conn.execute("DROP TABLE llm_cache")
+        conn.commit()
+        statements.clear()
+        ensure_schema(conn)
+        assert any("CREATE TABLE IF NOT EXISTS llm_cache" in statement for statement in statements)
+        assert conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_connect_sqlite_applies_read_heavy_pragmas(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_context_existence_probe_uses_target_uri_index(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    try:
+        ensure_schema(conn)
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT EXISTS(SELECT 1 FROM contexts WHERE target_uri = ?)",
+            ("qpg://datadb/public.users",),
+        ).fetchall()
+        assert any("idx_contexts_target_uri" in str(row["detail"]) for row in plan)
+    finally:
+        conn.close()
+
+
+def test_now_timestamp_matches_sql_now_format(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    try:
+        sql_now = conn.execute(f"SELECT {now_expr()}").fetchone()[0]
+    finally:
+        conn.close()
+    pattern = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z")
+    assert pattern.fullmatch(sql_now)
+    assert pattern.fullmatch(now_timestamp())
+
+
+
+def test_vec_function_probe_is_cached_per_connection(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    try:
+        available = has_vec_functions(conn)
+        assert db_sqlite_mod._VEC_FUNCTIONS[conn] is available
+        db_sqlite_mod._VEC_FUNCTIONS[conn] = not available
+        assert has_vec_functions(conn) is not available
+        cached = len(db_sqlite_mod._VEC_FUNCTIONS)
+    finally:
+        conn.close()
+    del conn
+    gc.collect()
+    assert len(db_sqlite_mod._VEC_FUNCTIONS) == cached - 1
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from qpg.query.expand import expand_query
+
+
+def test_expand_query_keeps_token_order_and_adds_inflections() -> None:
+    assert expand_query("Payment status") == [
+        "Payment status",
+        "payment payments billing charge status statu state lifecycle",
+    ]
+    assert expand_query("categories bus") == ["categories bus", "categories category bus buss"]
+    assert expand_query("orders order") == ["orders order", "orders order purchase"]
+
+
+def test_expand_query_without_tokens_returns_query() -> None:
+    assert expand_query("  --  ") == ["  --  "]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from qpg.db_sqlite import connect_sqlite, ensure_schema
+from qpg.index.fts import rebuild_fts, search_fts
+
+
+def _seed(conn) -> None:
+    conn.executemany(
+        "INSERT INTO sources(id, name, dsn) VALUES(?, ?, 'postgresql://u@h/db')",
+        [(1, "appdb"), (2, "billingdb")],
+    )
+    conn.executemany(
+        """
+        INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+        VALUES(?, ?, 'public', ?, 'table', ?)
+        """,
+        [("obj_users", 1, "users", "public.users"), ("obj_invoices", 2, "invoices", "public.invoices")],
+    )
+    conn.executemany(
+        """
+        INSERT INTO lexical_docs(object_id, source_id, name_col, comment_col, defs_col, context_col)
+        VALUES(?, ?, ?, ?, '', '')
+        """,
+        [("obj_users", 1, "public.users", "people"), ("obj_invoices", 2, "public.invoices", "billing")],
+    )
+
+
+def test_rebuild_fts_recreates_table_and_copies_rows_in_one_statement(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        _seed(conn)
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        rebuild_fts(conn)
+        conn.set_trace_callback(None)
+
+        assert sum("SELECT ld.object_id" in statement for statement in statements) == 1
+        assert not any(statement.lstrip().startswith("DELETE") for statement in statements)
+        rows = conn.execute("SELECT object_id, source_name, kind FROM objects_fts ORDER BY object_id").fetchall()
+        assert [tuple(row) for row in rows] == [("obj_invoices", "billingdb", "table"), ("obj_users", "appdb", "table")]
+
+        conn.execute("UPDATE lexical_docs SET comment_col = 'customers' WHERE object_id = 'obj_users'")
+        conn.execute("UPDATE lexical_docs SET comment_col = 'payments' WHERE object_id = 'obj_invoices'")
+        rebuild_fts(conn, source_id=1)
+
+        assert [row["object_id"] for row in search_fts(conn, query="customers")] == ["obj_users"]
+        assert search_fts(conn, query="people") == []
+        # Only the rebuilt source is refreshed.
+        assert [row["object_id"] for row in search_fts(conn, query="billing")] == ["obj_invoices"]
+        assert conn.execute("SELECT COUNT(*) FROM objects_fts").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+def test_search_fts_scores_and_filters_in_sql(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        _seed(conn)
+        rebuild_fts(conn)
+
+        rows = search_fts(conn, query="people")
+        assert list(rows[0]) == [
+            "object_id",
+            "fqname",
+            "object_type",
+            "source_name",
+            "score",
+            "bm25",
+            "name_snippet",
+            "context_snippet",
+        ]
+        assert rows[0]["score"] == 1.0 / (1.0 + max(rows[0]["bm25"], 0.0))
+        assert search_fts(conn, query="people", min_score=rows[0]["score"]) == rows
+        assert search_fts(conn, query="people", min_score=1.01) == []
+        assert search_fts(conn, query="people", source="appdb", kind="table") == rows
+        assert search_fts(conn, query="people", source="billingdb") == []
+    finally:
+        conn.close()
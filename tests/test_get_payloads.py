@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from qpg.db_sqlite import connect_sqlite, ensure_schema
+from qpg.get import get_object_payload, get_object_payloads
+
+
+def test_batched_payloads_match_single_object_payloads(tmp_path: Path) -> None:
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES(?, ?)", ("datadb", "postgresql://u@h/db"))
+        source_id = conn.execute("SELECT id FROM sources WHERE name = ?", ("datadb",)).fetchone()["id"]
+        conn.executemany(
+            """
+            INSERT INTO db_objects(
+                id, source_id, schema_name, object_name, object_type, fqname, definition, comment, signature, owner, is_system
+            ) VALUES(?, ?, 'public', ?, ?, ?, '', ?, NULL, NULL, 0)
+            """,
+            [
+                ("obj_users", source_id, "users", "table", "public.users", "App users"),
+                ("obj_orders", source_id, "orders", "table", "public.orders", None),
+            ],
+        )
+        conn.executemany(
+            """
+            INSERT INTO columns(object_id, column_name, data_type, is_nullable, ordinal_position)
+            VALUES(?, ?, ?, ?, ?)
+            """,
+            [
+                ("obj_users", "id", "bigint", 0, 1),
+                ("obj_users", "email", "text", 1, 2),
+                ("obj_orders", "user_id", "bigint", 0, 2),
+                ("obj_orders", "id", "bigint", 0, 1),
+            ],
+        )
+        conn.execute(
+            """
+            INSERT INTO constraints(object_id, constraint_name, constraint_type, definition, columns_json)
+            VALUES('obj_orders', 'orders_user_fk', 'f', 'FOREIGN KEY (user_id) REFERENCES users(id)', '["user_id"]')
+            """
+        )
+        conn.executemany(
+            """
+            INSERT INTO indexes(object_id, index_name, definition, is_unique, is_primary, columns_json)
+            VALUES('obj_orders', ?, ?, ?, ?, ?)
+            """,
+            [
+                ("orders_pkey", "CREATE UNIQUE INDEX orders_pkey ON orders(id)", 1, 1, '["id"]'),
+                ("orders_broken_idx", None, 0, 0, "not json"),
+            ],
+        )
+        conn.execute(
+            """
+            INSERT INTO dependencies(object_id, depends_on_object_id, dependency_type)
+            VALUES('obj_orders', 'obj_users', 'fk')
+            """
+        )
+        conn.execute(
+            "INSERT INTO object_context_effective(object_id, context_text) VALUES('obj_orders', 'Customer orders.')"
+        )
+        conn.commit()
+
+        payloads = get_object_payloads(conn, ["obj_orders", "obj_users", "obj_orders", "obj_missing"])
+
+        assert set(payloads) == {"obj_orders", "obj_users"}
+        assert payloads["obj_users"] == get_object_payload(conn, "public.users", source="datadb")
+        assert payloads["obj_orders"] == get_object_payload(conn, "public.orders", source="datadb")
+        assert [col["name"] for col in payloads["obj_orders"]["columns"]] == ["id", "user_id"]
+        assert payloads["obj_orders"]["indexes"][0] == {
+            "name": "orders_broken_idx",
+            "definition": "",
+            "is_unique": False,
+            "is_primary": False,
+            "columns": [],
+        }
+        assert payloads["obj_users"]["columns"][1]["nullable"] is True
+
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        payload = get_object_payload(conn, "#obj_ord")
+        conn.set_trace_callback(None)
+        assert len(statements) == 1
+        assert payload == payloads["obj_orders"]
+        assert payload["context"] == "Customer orders."
+    finally:
+        conn.close()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import qpg.index.build as build_mod
+import qpg.index.vec as vec_mod
+from qpg.contexts import ContextRecord
+from qpg.db_sqlite import connect_sqlite, ensure_schema
+from qpg.schema.introspect import (
+    ColumnMeta,
+    ConstraintMeta,
+    DependencyMeta,
+    IndexMeta,
+    IntrospectedObject,
+    IntrospectionBundle,
+)
+from qpg.sources import get_source
+
+
+def test_update_source_index_writes_every_table_in_one_pass(monkeypatch, tmp_path: Path) -> None:
+    embedded: list[str] = []
+
+    def fake_embed_texts(texts: list[str]) -> list[list[float]]:
+        embedded.extend(texts)
+        return [[0.0, 1.0] for _ in texts]
+
+    monkeypatch.setattr(vec_mod, "embed_texts", fake_embed_texts)
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES(?, ?)", ("datadb", "postgresql://u@h/db"))
+        conn.commit()
+        source = get_source(conn, "datadb")
+        bundle = IntrospectionBundle(
+            objects=[
+                IntrospectedObject("public", "users", "table", None, "App users"),
+                IntrospectedObject("public", "orders", "table", None, None),
+            ],
+            columns=[
+                ColumnMeta("public.users", "id", "bigint", False, 1, None, None),
+                ColumnMeta("public.orders", "user_id", "bigint", False, 1, None, "buyer"),
+            ],
+            constraints=[
+                ConstraintMeta("public.orders", "orders_user_fk", "f", "FOREIGN KEY (user_id)", ["user_id"]),
+            ],
+            indexes=[
+                IndexMeta("public.orders", "orders_user_idx", "CREATE INDEX ...", False, False, ["user_id"]),
+            ],
+            dependencies=[DependencyMeta("public.orders", "public.users", "fk")],
+        )
+        contexts = [ContextRecord(id=1, target_uri="qpg://datadb/public.users", body="People.", created_at="")]
+
+        stats = build_mod.update_source_index(conn, source=source, bundle=bundle, contexts=contexts)
+
+        assert (stats.objects, stats.columns, stats.constraints, stats.indexes, stats.dependencies) == (6, 2, 1, 1, 1)
+        assert stats.vectors == 6 == len(embedded)
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("db_objects", "columns", "constraints", "indexes", "dependencies", "lexical_docs")
+        }
+        assert counts == {
+            "db_objects": 6,
+            "columns": 2,
+            "constraints": 1,
+            "indexes": 1,
+            "dependencies": 1,
+            "lexical_docs": 6,
+        }
+        assert len({row[0] for row in conn.execute("SELECT updated_at FROM db_objects")}) == 1
+        contexted = conn.execute(
+            """
+            SELECT o.fqname FROM object_context_effective e JOIN db_objects o ON o.id = e.object_id
+            ORDER BY o.fqname
+            """
+        ).fetchall()
+        assert [row[0] for row in contexted] == ["public.users", "public.users.id"]
+        defs = conn.execute(
+            "SELECT defs_col FROM lexical_docs l JOIN db_objects o ON o.id = l.object_id WHERE o.fqname = 'public.orders'"
+        ).fetchone()[0]
+        assert "constraint orders_user_fk FOREIGN KEY (user_id)" in defs
+        stamps = {
+            row[0]
+            for table in ("object_context_effective", "lexical_docs")
+            for row in conn.execute(f"SELECT updated_at FROM {table}")
+        }
+        assert stamps == {conn.execute("SELECT updated_at FROM db_objects LIMIT 1").fetchone()[0]}
+        assert conn.execute("SELECT COUNT(*) FROM temp.sqlite_master WHERE type = 'table'").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_failed_rebuild_keeps_previous_index(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(vec_mod, "embed_texts", lambda texts: [[0.0, 1.0] for _ in texts])
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES(?, ?)", ("datadb", "postgresql://u@h/db"))
+        conn.commit()
+        source = get_source(conn, "datadb")
+        first = IntrospectionBundle(objects=[IntrospectedObject("public", "users", "table", None, None)])
+        build_mod.update_source_index(conn, source=source, bundle=first, contexts=[])
+
+        def fail_embed_texts(texts: list[str]) -> list[list[float]]:
+            raise RuntimeError("embedding failed")
+
+        monkeypatch.setattr(vec_mod, "embed_texts", fail_embed_texts)
+        second = IntrospectionBundle(objects=[IntrospectedObject("public", "orders", "table", None, None)])
+        with pytest.raises(RuntimeError, match="embedding failed"):
+            build_mod.update_source_index(conn, source=source, bundle=second, contexts=[])
+
+        assert not conn.in_transaction
+        assert [row[0] for row in conn.execute("SELECT fqname FROM db_objects")] == ["public.users"]
+    finally:
+        conn.close()
+
+
+def test_rebuild_keeps_vectors_of_unchanged_objects(monkeypatch, tmp_path: Path) -> None:
+    embedded: list[str] = []
+
+    def fake_embed_texts(texts: list[str]) -> list[list[float]]:
+        embedded.extend(text.splitlines()[0] for text in texts)
+        return [[0.0, 1.0] for _ in texts]
+
+    monkeypatch.setattr(vec_mod, "embed_texts", fake_embed_texts)
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES(?, ?)", ("datadb", "postgresql://u@h/db"))
+        conn.commit()
+        source = get_source(conn, "datadb")
+        first = IntrospectionBundle(
+            objects=[
+                IntrospectedObject("public", "users", "table", None, "App users"),
+                IntrospectedObject("public", "orders", "table", None, None),
+                IntrospectedObject("public", "legacy", "table", None, None),
+            ],
+        )
+        build_mod.update_source_index(conn, source=source, bundle=first, contexts=[])
+        assert sorted(embedded) == ["public.legacy", "public.orders", "public.users"]
+
+        embedded.clear()
+        second = IntrospectionBundle(
+            objects=[
+                IntrospectedObject("public", "users", "table", None, "Registered app users"),
+                IntrospectedObject("public", "orders", "table", None, None),
+            ],
+            columns=[ColumnMeta("public.orders", "id", "bigint", False, 1, None, None)],
+        )
+        stats = build_mod.update_source_index(conn, source=source, bundle=second, contexts=[])
+
+        # orders gained a column, so its definition text changed as well.
+        assert sorted(embedded) == ["public.orders", "public.orders.id", "public.users"]
+        assert stats.vectors == 3
+        fqnames = [row[0] for row in conn.execute("SELECT fqname FROM db_objects ORDER BY fqname")]
+        assert fqnames == ["public.orders", "public.orders.id", "public.users"]
+        assert conn.execute("SELECT COUNT(*) FROM object_vectors").fetchone()[0] == 3
+        assert conn.execute("SELECT COUNT(*) FROM columns").fetchone()[0] == 1
+
+        embedded.clear()
+        build_mod.update_source_index(conn, source=source, bundle=second, contexts=[])
+        assert embedded == []
+    finally:
+        conn.close()
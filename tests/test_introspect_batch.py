@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import qpg.schema.introspect as introspect_mod
+
+
+class _BatchCursor:
+    def __init__(self, conn: _BatchConn) -> None:
+        self._conn = conn
+        self._sets: list[list[tuple[Any, ...]]] = []
+        self.row_factory: Any = None
+
+    def __enter__(self) -> _BatchCursor:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def execute(self, sql: str) -> None:
+        self._conn.executed.append(sql)
+        statements = sql.split(";\n")
+        self._sets = [self._conn.rows_for(statement) for statement in statements]
+
+    def fetchall(self) -> list[Any]:
+        make_row = self.row_factory(self)
+        return [make_row(values) for values in self._sets[0]]
+
+    def nextset(self) -> bool | None:
+        self._sets.pop(0)
+        return True if self._sets else None
+
+
+class _BatchConn:
+    def __init__(self) -> None:
+        self.executed: list[str] = []
+
+    def cursor(self) -> _BatchCursor:
+        return _BatchCursor(self)
+
+    def rows_for(self, sql: str) -> list[tuple[Any, ...]]:
+        compact = " ".join(sql.split())
+        if "FROM pg_namespace n WHERE" in compact:
+            return [("public", "public", "schema", None, None, None, None, False)]
+        if "FROM pg_attribute a" in compact:
+            return [("public.orders", "id", "bigint", False, 1, None, None)]
+        return []
+
+
+def test_introspect_schema_fuses_object_queries_into_one_round_trip(monkeypatch) -> None:
+    def unexpected_fetch_iter(_: Any, sql: str, *, maker: Callable[..., Any]) -> Iterator[Any]:
+        raise AssertionError("sections should not be fetched one by one")
+
+    monkeypatch.setattr(introspect_mod, "fetch_iter", unexpected_fetch_iter)
+    conn = _BatchConn()
+
+    bundle = introspect_mod.introspect_schema(conn, include_functions=False)
+
+    assert len(conn.executed) == 1
+    statements = conn.executed[0].split(";\n")
+    assert len(statements) == 5
+    assert statements[0].count("UNION ALL") == 2
+    assert "FROM pg_proc" not in conn.executed[0]
+    assert [obj.fqname for obj in bundle.objects] == ["public.public"]
+    assert [(col.parent_fqname, col.column_name) for col in bundle.columns] == [("public.orders", "id")]
+    assert bundle.warnings == []
+
+
+def test_introspect_schema_falls_back_to_per_section_fetches(monkeypatch) -> None:
+    def failing_fetch_many(_: Any, sqls: list[str], *, makers: list[Callable[..., Any]]) -> list[list[Any]]:
+        raise RuntimeError("canceling statement due to statement timeout")
+
+    fetched: list[str] = []
+
+    def fake_fetch_iter(_: Any, sql: str, *, maker: Callable[..., Any]) -> Iterator[Any]:
+        fetched.append(sql)
+        yield from ()
+
+    monkeypatch.setattr(introspect_mod, "fetch_many", failing_fetch_many)
+    monkeypatch.setattr(introspect_mod, "fetch_iter", fake_fetch_iter)
+
+    bundle = introspect_mod.introspect_schema(object(), include_functions=True)
+
+    assert len(fetched) == 8
+    assert bundle.objects == []
+    assert bundle.warnings == []
+
+
+def test_introspect_schema_pushes_schema_filter_into_every_query(monkeypatch) -> None:
+    fetched: list[str] = []
+
+    def fake_fetch_many(_: Any, sqls: list[str], *, makers: list[Callable[..., Any]]) -> list[list[Any]]:
+        fetched.extend(sqls)
+        return [[] for _ in sqls]
+
+    monkeypatch.setattr(introspect_mod, "fetch_many", fake_fetch_many)
+
+    introspect_mod.introspect_schema(object(), include_schemas=["public", "o'neil\\x", " "])
+
+    assert len(fetched) == 5
+    for sql in fetched:
+        assert "{schemas}" not in sql
+        assert "ANY(ARRAY[E'o''neil\\\\x', E'public']::text[])" in sql
+
+    fetched.clear()
+    introspect_mod.introspect_schema(object())
+    assert all("NULL::text[] IS NULL" in sql for sql in fetched)
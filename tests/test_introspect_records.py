@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from qpg.schema.introspect import ConstraintMeta, IndexMeta, IntrospectedObject
+
+
+def test_introspected_object_fqname_is_set_at_construction() -> None:
+    obj = IntrospectedObject("public", "orders", "table", None, None)
+
+    assert obj.fqname == "public.orders"
+    assert IntrospectedObject(None, "plpgsql", "extension", None, None).fqname == "plpgsql"
+    assert obj == IntrospectedObject("public", "orders", "table", None, None)
+    assert "fqname" not in repr(obj)
+
+
+def test_index_and_constraint_columns_are_interned_tuples() -> None:
+    index = IndexMeta("public.orders", "orders_pkey", "CREATE UNIQUE INDEX ...", True, True, ["id", "tenant_id"])
+    constraint = ConstraintMeta("public.orders", "orders_pkey", "primary_key", "PRIMARY KEY (id)", ["".join(["i", "d"])])
+
+    assert index.columns == ("id", "tenant_id")
+    assert constraint.columns[0] is index.columns[0]
@@ -1,18 +1,19 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterator
 from typing import Any
 
 import qpg.schema.introspect as introspect_mod
 
 
 def test_introspect_schema_skips_failed_section_and_collects_warning(monkeypatch) -> None:
-    def fake_fetch_all(_: Any, sql: str) -> list[dict[str, Any]]:
+    def fake_fetch_iter(_: Any, sql: str, *, maker: Callable[..., Any]) -> Iterator[Any]:
         compact = " ".join(sql.split())
         if "FROM pg_proc" in compact:
             raise RuntimeError('"array_concat_agg" is an aggregate function')
-        return []
+        yield from ()
 
-    monkeypatch.setattr(introspect_mod, "fetch_all", fake_fetch_all)
+    monkeypatch.setattr(introspect_mod, "fetch_iter", fake_fetch_iter)
 
     bundle = introspect_mod.introspect_schema(object(), include_functions=True)
 
@@ -23,3 +24,21 @@ def test_introspect_schema_skips_failed_section_and_collects_warning(monkeypatch
     assert bundle.dependencies == []
     assert any("functions:" in warning for warning in bundle.warnings)
     assert any("aggregate function" in warning for warning in bundle.warnings)
+
+
+def test_introspect_schema_drops_section_that_fails_mid_stream(monkeypatch) -> None:
+    def fake_fetch_iter(_: Any, sql: str, *, maker: Callable[..., Any]) -> Iterator[Any]:
+        compact = " ".join(sql.split())
+        if "FROM pg_attribute a" in compact:
+            yield maker("public.orders", "id", "bigint", False, 1, None, None)
+            raise RuntimeError("canceling statement due to statement timeout")
+        if "FROM pg_namespace n WHERE" in compact:
+            yield maker("public", "public", "schema", None, None, None, None, False)
+
+    monkeypatch.setattr(introspect_mod, "fetch_iter", fake_fetch_iter)
+
+    bundle = introspect_mod.introspect_schema(object(), include_functions=False)
+
+    assert [obj.fqname for obj in bundle.objects] == ["public.public"]
+    assert bundle.columns == []
+    assert bundle.warnings == ["columns: canceling statement due to statement timeout"]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+import sqlite3
+import threading
+from http.server import ThreadingHTTPServer
+
+from qpg.db_sqlite import ensure_schema
+from qpg.mcp.server_http import MCPHTTPHandler
+
+
+def test_mcp_http_serves_many_requests_on_one_connection() -> None:
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    ensure_schema(conn)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MCPHTTPHandler)
+    server.sqlite_conn = conn  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    try:
+        client.request("GET", "/health")
+        health = client.getresponse()
+        assert json.loads(health.read()) == {"status": "ok"}
+        sock = client.sock
+
+        for request_id in range(3):
+            body = json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "ping"})
+            client.request("POST", "/mcp", body=body, headers={"Content-Type": "application/json"})
+            response = client.getresponse()
+            assert response.status == 200
+            assert json.loads(response.read()) == {"jsonrpc": "2.0", "id": request_id, "result": {}}
+            assert not response.will_close
+
+        client.request("POST", "/mcp", body=b"{oops")
+        rejected = client.getresponse()
+        assert rejected.status == 400
+        rejected.read()
+        assert client.sock is sock
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+        conn.close()
+
+
+class _ShortTimeoutHandler(MCPHTTPHandler):
+    timeout = 0.2
+
+
+def _start_server(handler: type[MCPHTTPHandler]) -> tuple[ThreadingHTTPServer, sqlite3.Connection]:
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    ensure_schema(conn)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.sqlite_conn = conn  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, conn
+
+
+def _read_until_closed(sock: socket.socket) -> bytes:
+    data = b""
+    while chunk := sock.recv(4096):
+        data += chunk
+    return data
+
+
+def test_mcp_http_closes_idle_keepalive_connections() -> None:
+    assert MCPHTTPHandler.timeout == 30
+    server, conn = _start_server(_ShortTimeoutHandler)
+    try:
+        with socket.create_connection(server.server_address, timeout=5) as sock:
+            assert _read_until_closed(sock) == b""
+    finally:
+        server.shutdown()
+        server.server_close()
+        conn.close()
+
+
+def test_mcp_http_closes_connection_when_body_length_is_unknown() -> None:
+    server, conn = _start_server(MCPHTTPHandler)
+    ping = b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}'
+    try:
+        with socket.create_connection(server.server_address, timeout=5) as sock:
+            sock.sendall(
+                b"POST /mcp HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+                + f"{len(ping):x}\r\n".encode()
+                + ping
+                + b"\r\n0\r\n\r\n"
+            )
+            response = _read_until_closed(sock)
+        assert response.startswith(b"HTTP/1.1 411")
+        assert b"Connection: close" in response
+        assert response.count(b"HTTP/1.1") == 1
+
+        with socket.create_connection(server.server_address, timeout=5) as sock:
+            sock.sendall(b"POST /mcp HTTP/1.1\r\nHost: x\r\n\r\n" + ping)
+            response = _read_until_closed(sock)
+        assert response.startswith(b"HTTP/1.1 400")
+        assert b"Connection: close" in response
+        assert response.count(b"HTTP/1.1") == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        conn.close()
+
+
+def test_mcp_http_rejects_non_ascii_content_length() -> None:
+    server, conn = _start_server(MCPHTTPHandler)
+    try:
+        with socket.create_connection(server.server_address, timeout=5) as sock:
+            # "²" passes str.isdigit() but int() rejects it.
+            sock.sendall(b"POST /mcp HTTP/1.1\r\nHost: x\r\nContent-Length: \xb2\r\n\r\n{}")
+            response = _read_until_closed(sock)
+        assert response.startswith(b"HTTP/1.1 400")
+        assert b"Connection: close" in response
+    finally:
+        server.shutdown()
+        server.server_close()
+        conn.close()
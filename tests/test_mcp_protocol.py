@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
 
+import qpg.mcp.protocol as protocol_mod
 from qpg.db_sqlite import ensure_schema
 from qpg.mcp.protocol import handle_request
 
@@ -89,3 +91,40 @@ def test_legacy_tool_payload_still_supported() -> None:
         assert response == {"id": 9, "result": {"sources": 0, "objects": 0, "by_kind": []}}
     finally:
         conn.close()
+
+
+def test_deep_search_embeds_query_off_thread_and_reuses_vector(monkeypatch) -> None:
+    embed_threads: list[threading.Thread] = []
+    vector_calls: list[tuple[sqlite3.Connection, list[float] | None]] = []
+
+    def fake_embed_text(text: str) -> list[float]:
+        embed_threads.append(threading.current_thread())
+        return [1.0, 0.0]
+
+    def fake_vector_search(conn, *, query: str, limit: int, query_vec=None):
+        vector_calls.append((conn, query_vec))
+        return [{"object_id": "obj_users", "fqname": "public.users"}]
+
+    monkeypatch.setattr(protocol_mod, "embed_text", fake_embed_text)
+    monkeypatch.setattr(protocol_mod, "vector_search", fake_vector_search)
+    conn = _db()
+    try:
+        result = protocol_mod.handle_tool_call(conn, "qpg_deep_search", {"query": "users", "limit": 5})
+    finally:
+        conn.close()
+
+    assert [row["object_id"] for row in result] == ["obj_users"]
+    assert embed_threads and embed_threads[0] is not threading.current_thread()
+    assert vector_calls == [(conn, [1.0, 0.0])]
+
+
+def test_deep_search_skips_embedding_for_blank_query(monkeypatch) -> None:
+    def fail_embed_text(text: str) -> list[float]:
+        raise AssertionError("blank queries must not be embedded")
+
+    monkeypatch.setattr(protocol_mod, "embed_text", fail_embed_text)
+    conn = _db()
+    try:
+        assert protocol_mod.handle_tool_call(conn, "qpg_deep_search", {"query": "   "}) == []
+    finally:
+        conn.close()
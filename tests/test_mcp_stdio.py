@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import io
+import json
+import sqlite3
+import sys
+
+import qpg.mcp.server_stdio as server_stdio_mod
+from qpg.db_sqlite import ensure_schema
+
+
+def test_serve_stdio_answers_each_line_with_compact_utf8(monkeypatch) -> None:
+    monkeypatch.setattr(server_stdio_mod, "start_model_warmup", lambda: None)
+    requests = [
+        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "qpg_status"}}),
+        "",
+        "{not json",
+        "[1, 2]",
+        json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}),
+        json.dumps({"jsonrpc": "2.0", "id": "é", "method": "ping"}),
+    ]
+    stdin = io.TextIOWrapper(io.BytesIO("\n".join(requests).encode("utf-8") + b"\n"), encoding="utf-8")
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    monkeypatch.setattr(sys, "stdin", stdin)
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    ensure_schema(conn)
+    try:
+        assert server_stdio_mod.serve_stdio(conn) == 0
+    finally:
+        conn.close()
+
+    lines = stdout.buffer.getvalue().splitlines()
+    responses = [json.loads(line) for line in lines]
+    assert len(responses) == 4
+    assert responses[0]["result"]["structuredContent"] == {"sources": 0, "objects": 0, "by_kind": []}
+    assert responses[0]["result"]["content"][0]["text"] == '{"sources": 0, "objects": 0, "by_kind": []}'
+    assert [response.get("error", {}).get("code") for response in responses[1:3]] == [-32700, -32600]
+    assert b", " not in lines[1]
+    assert lines[3] == '{"jsonrpc":"2.0","id":"é","result":{}}'.encode()
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import hashlib
+
+from qpg.schema.normalize import make_object_id
+
+
+def test_object_id_matches_full_string_sha256() -> None:
+    expected = hashlib.sha256(b"work:table:public.orders").hexdigest()[:12]
+
+    assert make_object_id("work", "table", "public.orders") == expected
+    assert make_object_id("work", "table", "public.orders") == expected
+    assert make_object_id("prod", "table", "public.orders") != expected
@@ -1,3 +1,4 @@
+import qpg.schema.privilege_check as privilege_check_mod
 from qpg.schema.privilege_check import build_report_from_rows
 
 
@@ -33,3 +34,43 @@ def test_privilege_report_fails_with_violation_rows() -> None:
     assert violation.scope == "table"
     assert violation.object_name == "public.orders"
     assert violation.privilege == "INSERT"
+
+
+def test_table_privileges_are_prefiltered_with_one_combined_check(monkeypatch) -> None:
+    captured: list[str] = []
+
+    def fake_fetch_all(_: object, sql: str) -> list[dict[str, str]]:
+        captured.append(sql)
+        return []
+
+    monkeypatch.setattr(privilege_check_mod, "fetch_all", fake_fetch_all)
+
+    assert privilege_check_mod.collect_prohibited_privileges(object()) == []
+    sql = " ".join(captured[0].split())
+    assert "has_table_privilege(rt.rolname, c.oid, 'INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER')" in sql
+    assert "CROSS JOIN LATERAL" in sql
+
+
+def test_session_roles_are_read_in_one_query_on_every_check(monkeypatch) -> None:
+    queries: list[str] = []
+    memberships = [["readonly"], ["readonly", "writer"]]
+
+    def fake_fetch_one(_: object, sql: str) -> dict[str, object]:
+        queries.append(sql)
+        return {"username": "readonly", "roles": memberships[len(queries) - 1]}
+
+    monkeypatch.setattr(privilege_check_mod, "fetch_one", fake_fetch_one)
+    monkeypatch.setattr(privilege_check_mod, "fetch_all", lambda _, sql: [])
+
+    conn = object()
+    first = privilege_check_mod.check_privileges(conn)
+    second = privilege_check_mod.check_privileges(conn)
+
+    assert len(queries) == 2
+    assert "current_user AS username" in queries[0] and "array_agg" in queries[0]
+    # Aggregate on the name type so roles sort in its "C" collation, not the database default.
+    assert "array_agg(DISTINCT rolname ORDER BY rolname)::text[]" in queries[0]
+    assert first.current_user == "readonly"
+    assert first.inherited_roles == ["readonly"]
+    # A role granted between checks on a pooled connection is reported.
+    assert second.inherited_roles == ["readonly", "writer"]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import stat
+from pathlib import Path
+
+import pytest
+
+from qpg.query.rerank import RerankHookError, rerank_with_hook
+
+
+def _hook(tmp_path: Path, body: str) -> str:
+    path = tmp_path / "hook.py"
+    path.write_text(f"#!/usr/bin/env python3\nimport json, sys\n{body}\n", encoding="utf-8")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def test_rerank_hook_orders_rows_by_returned_ids(monkeypatch, tmp_path: Path) -> None:
+    hook = _hook(
+        tmp_path,
+        "payload = json.load(sys.stdin)\n"
+        "assert payload['query'] == 'users'\n"
+        "print(json.dumps([3, 'b', 'missing', 3]))",
+    )
+    monkeypatch.setenv("QPG_RERANK_HOOK", hook)
+    rows = [{"object_id": "a"}, {"object_id": "b"}, {"object_id": 3}]
+
+    reranked = rerank_with_hook("users", rows)
+
+    assert [row["object_id"] for row in reranked] == [3, "b", "a"]
+
+
+def test_rerank_hook_failures_raise(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("QPG_RERANK_HOOK", _hook(tmp_path, "sys.stderr.write('boom'); sys.exit(2)"))
+    with pytest.raises(RerankHookError, match="boom"):
+        rerank_with_hook("q", [{"object_id": "a"}])
+
+    monkeypatch.setenv("QPG_RERANK_HOOK", _hook(tmp_path, "sys.stdout.buffer.write(b'\\xff')"))
+    with pytest.raises(RerankHookError, match="invalid JSON"):
+        rerank_with_hook("q", [{"object_id": "a"}])
+
+    monkeypatch.setenv("QPG_RERANK_HOOK", _hook(tmp_path, "print(json.dumps(dict(a=1)))"))
+    with pytest.raises(RerankHookError, match="must be a JSON list"):
+        rerank_with_hook("q", [{"object_id": "a"}])
@@ -1,4 +1,4 @@
-from qpg.query.rrf import reciprocal_rank_fusion
+from qpg.query.rrf import apply_position_bonus, reciprocal_rank_fusion
 
 
 def test_rrf_prefers_items_present_in_multiple_lists() -> None:
@@ -27,3 +27,37 @@ def test_rrf_rejects_invalid_k() -> None:
         assert "positive" in str(exc)
     else:
         raise AssertionError("expected ValueError")
+
+
+def test_position_bonus_matches_scalar_scoring() -> None:
+    fused = reciprocal_rank_fusion(
+        [
+            [{"object_id": "a"}, {"object_id": "b"}, {"object_id": "c"}],
+            [{"object_id": "c"}, {"object_id": "b"}],
+        ],
+        k=60,
+    )
+    expected = []
+    for idx, row in enumerate(fused, start=1):
+        bonus = 1.0 / (idx + 1)
+        expected.append((row["object_id"], bonus, row["rrf_score"] + 0.1 * bonus))
+    expected.sort(key=lambda item: item[2], reverse=True)
+
+    ranked = apply_position_bonus(fused)
+
+    assert [(row["object_id"], row["position_bonus"], row["score"]) for row in ranked] == expected
+    assert apply_position_bonus([]) == []
+
+
+def test_rrf_keeps_first_seen_row_and_sums_scores() -> None:
+    first = {"object_id": "a", "score": 0.9}
+    fused = reciprocal_rank_fusion(
+        [[first, {"object_id": "b"}], [{"object_id": "b"}, {"object_id": "a", "score": 0.1}]],
+        k=60,
+        top_rank_bonus=0.0,
+    )
+
+    assert [row["object_id"] for row in fused] == ["a", "b"]
+    assert fused[0]["score"] == 0.9
+    assert fused[0]["rrf_score"] == fused[1]["rrf_score"] == 1.0 / 61 + 1.0 / 62
+    assert "rrf_score" not in first
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import qpg.settings as settings_mod
+from qpg.settings import clear_settings_cache, resolve_openai_settings
+
+
+def test_settings_are_reparsed_only_when_config_changes(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    for name in settings_mod._SETTINGS_ENV_NAMES:
+        monkeypatch.delenv(name, raising=False)
+    cfg = tmp_path / "config" / "qpg" / "config.yaml"
+    cfg.parent.mkdir(parents=True)
+    cfg.write_text("openai_model: first-model\n")
+    clear_settings_cache()
+
+    assert resolve_openai_settings().model == "first-model"
+    assert resolve_openai_settings().model == "first-model"
+    assert settings_mod._load_settings.cache_info().misses == 1
+    assert settings_mod._looks_like_dotenv.cache_info().misses == 1
+
+    cfg.write_text("OPENAI_MODEL=dotenv-model\n")
+    os.utime(cfg, ns=(0, 1))
+    assert resolve_openai_settings().model == "dotenv-model"
+
+    clear_settings_cache()
+    assert settings_mod._load_settings.cache_info().currsize == 0
+    assert settings_mod._looks_like_dotenv.cache_info().currsize == 0
+
+
+def test_dotenv_sniff_tolerates_undecodable_bytes(tmp_path: Path) -> None:
+    cfg = tmp_path / "config.yaml"
+    cfg.write_bytes(b"# \xff\xfe comment\nOPENAI_MODEL=m\n\xff")
+
+    assert settings_mod._looks_like_dotenv(cfg, settings_mod._config_stamp(cfg)) is True
@@ -44,3 +44,18 @@ def test_apply_filters_limits_schema_and_skip_patterns() -> None:
 
     names = [obj.fqname for obj in filtered.objects]
     assert names == ["public.orders"]
+
+
+def test_apply_filters_matches_any_skip_pattern_on_fqname_or_name() -> None:
+    bundle = IntrospectionBundle(
+        objects=[
+            IntrospectedObject("public", "orders", "table", None, None),
+            IntrospectedObject("public", "orders_bak", "table", None, None),
+            IntrospectedObject("audit", "log_2024", "table", None, None),
+            IntrospectedObject("audit", "log[1]", "table", None, None),
+        ]
+    )
+
+    filtered = apply_filters(bundle, skip_patterns=["*_bak", "audit.log_????", "log[[]1]"])
+
+    assert [obj.fqname for obj in filtered.objects] == ["public.orders"]
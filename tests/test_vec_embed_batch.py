@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import qpg.db_sqlite as db_sqlite_mod
+import qpg.index.vec as vec_mod
+from qpg.db_sqlite import connect_sqlite, ensure_schema
+
+
+class _FakeEmbedder:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_batch([text])[0]
+
+
+def test_upsert_embeddings_embeds_in_batches(monkeypatch, tmp_path: Path) -> None:
+    embedder = _FakeEmbedder()
+    monkeypatch.setattr(vec_mod, "_EMBEDDER", embedder)
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES('datadb', 'postgresql://u@h/db')")
+        conn.executemany(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            VALUES(?, 1, 'public', ?, 'table', ?)
+            """,
+            [(f"obj_{i}", f"t{i}", f"public.t{i}") for i in range(5)],
+        )
+        items = [(f"obj_{i}", "x" * i, f"hash_{i}") for i in range(5)]
+
+        vec_mod.upsert_embeddings(conn, items, updated_at="2024-01-01T00:00:00.000Z", batch_size=2)
+
+        # The blank text for obj_0 never reaches the model.
+        assert embedder.batches == [["x"], ["xx", "xxx"], ["xxxx"]]
+        rows = conn.execute(
+            "SELECT object_id, embedding, model, scale, content_hash, updated_at FROM object_vectors ORDER BY object_id"
+        ).fetchall()
+        assert [row["object_id"] for row in rows] == [f"obj_{i}" for i in range(5)]
+        assert (rows[0]["embedding"], rows[0]["scale"]) == (bytes(768), 1.0)
+        assert list(rows[3]["embedding"]) == [127, 42]
+        assert rows[3]["scale"] == pytest.approx(3.0 / 127)
+        assert {row["model"] for row in rows} == {"codebert-base-v1:int8"}
+        assert {row["updated_at"] for row in rows} == {"2024-01-01T00:00:00.000Z"}
+        assert rows[4]["content_hash"] == "hash_4"
+    finally:
+        conn.close()
+
+
+def test_upsert_embeddings_batches_texts_of_similar_length(monkeypatch, tmp_path: Path) -> None:
+    embedder = _FakeEmbedder()
+    monkeypatch.setattr(vec_mod, "_EMBEDDER", embedder)
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES('datadb', 'postgresql://u@h/db')")
+        lengths = [40, 3, 41, 2, 39, 1]
+        conn.executemany(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            VALUES(?, 1, 'public', ?, 'table', ?)
+            """,
+            [(f"obj_{n}", f"t{n}", f"public.t{n}") for n in lengths],
+        )
+        items = [(f"obj_{n}", "x" * n, f"hash_{n}") for n in lengths]
+
+        vec_mod.upsert_embeddings(conn, items, batch_size=3)
+
+        assert [[len(text) for text in batch] for batch in embedder.batches] == [[1, 2, 3], [39, 40, 41]]
+        rows = conn.execute("SELECT object_id, embedding FROM object_vectors").fetchall()
+        assert {row["object_id"]: list(row["embedding"])[1] for row in rows} == {
+            "obj_1": 127,
+            "obj_2": 64,
+            "obj_3": 42,
+            "obj_39": 3,
+            "obj_40": 3,
+            "obj_41": 3,
+        }
+    finally:
+        conn.close()
+
+
+def test_duplicate_and_repeated_texts_are_embedded_once(monkeypatch) -> None:
+    embedder = _FakeEmbedder()
+    monkeypatch.setattr(vec_mod, "_EMBEDDER", embedder)
+
+    vectors = vec_mod.embed_texts(["id bigint", "", "id bigint", "name text"])
+
+    assert embedder.batches == [["id bigint", "name text"]]
+    assert vectors[0] == vectors[2] == [9.0, 1.0]
+    assert vectors[1] == [0.0] * 768
+
+    embedder.batches.clear()
+    assert vec_mod.embed_text("orders") == vec_mod.embed_text("orders") == [6.0, 1.0]
+    assert embedder.batches == [["orders"]]
+
+    other = _FakeEmbedder()
+    monkeypatch.setattr(vec_mod, "_EMBEDDER", other)
+    vec_mod.embed_text("orders")
+    assert other.batches == [["orders"]]
+
+
+def test_vector_search_scores_int8_and_legacy_json_rows(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(vec_mod, "_EMBEDDER", _FakeEmbedder())
+    monkeypatch.setattr(vec_mod, "embed_text", lambda text: [1.0, 0.0])
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES('datadb', 'postgresql://u@h/db')")
+        conn.executemany(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            VALUES(?, 1, 'public', ?, 'table', ?)
+            """,
+            [
+                ("obj_near", "near", "public.near"),
+                ("obj_far", "far", "public.far"),
+                ("obj_old", "old", "public.old"),
+                ("obj_wide", "wide", "public.wide"),
+                ("obj_f32", "f32", "public.f32"),
+            ],
+        )
+        # Fake vectors are [len(text), 1.0]: "x" * 9 points almost along the query, "x" far less so.
+        vec_mod.upsert_embeddings(conn, [("obj_near", "x" * 9, "h1"), ("obj_far", "x", "h2")])
+        conn.execute(
+            "INSERT INTO object_vectors(object_id, embedding, content_hash) VALUES('obj_old', ?, 'h3')",
+            (json.dumps([0.0, 1.0]).encode("utf-8"),),
+        )
+        conn.execute(
+            "INSERT INTO object_vectors(object_id, embedding, content_hash, scale) VALUES('obj_wide', ?, 'h4', 1.0)",
+            (bytes([127, 0, 0]),),
+        )
+        # Unscaled float32 blobs are what an index built with sqlite-vec holds.
+        conn.execute(
+            "INSERT INTO object_vectors(object_id, embedding, content_hash) VALUES('obj_f32', ?, 'h5')",
+            (struct.pack("<2f", 3.0, 0.0),),
+        )
+
+        assert vec_mod.vector_search(conn, query="  ", limit=5) == []
+        results = vec_mod.vector_search(conn, query="orders", limit=5)
+
+        assert [row["object_id"] for row in results] == ["obj_f32", "obj_near", "obj_far", "obj_old", "obj_wide"]
+        assert results.pop(0)["score"] == pytest.approx(1.0)
+        assert results[0]["score"] == pytest.approx(9 / (82**0.5), abs=1e-3)
+        assert results[1]["score"] == pytest.approx(1 / (2**0.5), abs=1e-2)
+        assert results[2]["score"] == results[3]["score"] == 0.0
+    finally:
+        conn.close()
+
+
+def test_local_vector_search_reuses_matrix_until_vectors_change(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(vec_mod, "_EMBEDDER", _FakeEmbedder())
+    monkeypatch.setattr(vec_mod, "_MATRIX_CACHE", {})
+    monkeypatch.setattr(vec_mod, "embed_text", lambda text: [1.0, 0.0])
+    loads: list[int] = []
+    real_load = vec_mod._load_vector_matrix
+
+    def counting_load(conn, dim: int):
+        loads.append(dim)
+        return real_load(conn, dim)
+
+    monkeypatch.setattr(vec_mod, "_load_vector_matrix", counting_load)
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES('datadb', 'postgresql://u@h/db')")
+        conn.executemany(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            VALUES(?, 1, ?, ?, ?, ?)
+            """,
+            [
+                ("obj_a", "public", "a", "table", "public.a"),
+                ("obj_b", "public", "b", "view", "public.b"),
+                ("obj_c", "audit", "c", "table", "audit.c"),
+            ],
+        )
+        vec_mod.upsert_embeddings(
+            conn,
+            [("obj_a", "x" * 2, "h1"), ("obj_b", "x" * 9, "h2"), ("obj_c", "x" * 5, "h3")],
+            updated_at="2024-01-01T00:00:00.000Z",
+        )
+
+        assert [row["object_id"] for row in vec_mod.vector_search(conn, query="q", limit=2)] == ["obj_b", "obj_c"]
+        assert [row["object_id"] for row in vec_mod.vector_search(conn, query="q", kind="table")] == ["obj_c", "obj_a"]
+        assert [row["fqname"] for row in vec_mod.vector_search(conn, query="q", schema="public")] == [
+            "public.b",
+            "public.a",
+        ]
+        assert loads == [2]
+
+        vec_mod.upsert_embeddings(conn, [("obj_a", "x" * 20, "h4")], updated_at="2024-01-02T00:00:00.000Z")
+        assert vec_mod.vector_search(conn, query="q", limit=1)[0]["object_id"] == "obj_a"
+        assert loads == [2, 2]
+    finally:
+        conn.close()
+
+
+def test_only_query_embedding_uses_bf16_autocast(monkeypatch) -> None:
+    torch = pytest.importorskip("torch")
+
+    class _Encoded(dict):
+        def to(self, device: object) -> _Encoded:
+            return self
+
+    class _Model:
+        device = SimpleNamespace(type="cuda")
+
+        def __call__(self, **encoded: object) -> SimpleNamespace:
+            return SimpleNamespace(last_hidden_state=torch.ones(1, 2, 3))
+
+    autocast_flags: list[bool] = []
+
+    @contextmanager
+    def fake_autocast(device_type: str, *, dtype: object, enabled: bool):
+        autocast_flags.append(enabled)
+        yield
+
+    monkeypatch.setattr(torch, "autocast", fake_autocast)
+    embedder = vec_mod._CodeLabelEmbedder()
+    embedder._tokenizer = lambda texts, **kwargs: _Encoded(attention_mask=torch.ones(len(texts), 2))
+    embedder._model = _Model()
+
+    embedder.embed_batch(["public.orders"])
+    embedder.embed("orders")
+
+    assert autocast_flags == [False, True]
+
+
+def test_vec_search_scores_mixed_int8_and_float32_rows_locally(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(vec_mod, "_MATRIX_CACHE", {})
+
+    def vec_distance_cosine(left: bytes, right: bytes) -> float:
+        # Mirrors sqlite-vec, which reads both blobs as float32 and rejects mismatches.
+        if len(left) != len(right):
+            raise ValueError("Vector dimension mistmatch")
+        a = struct.unpack(f"<{len(left) // 4}f", left)
+        b = struct.unpack(f"<{len(right) // 4}f", right)
+        dot = sum(x * y for x, y in zip(a, b, strict=True))
+        return 1.0 - dot / ((sum(x * x for x in a) ** 0.5) * (sum(y * y for y in b) ** 0.5))
+
+    conn = connect_sqlite(tmp_path / "index.sqlite")
+    ensure_schema(conn)
+    conn.create_function("vec_f32", 1, lambda blob: blob)
+    conn.create_function("vec_distance_cosine", 2, vec_distance_cosine)
+    monkeypatch.setitem(db_sqlite_mod._VEC_FUNCTIONS, conn, True)
+    try:
+        conn.execute("INSERT INTO sources(name, dsn) VALUES('datadb', 'postgresql://u@h/db')")
+        conn.executemany(
+            """
+            INSERT INTO db_objects(id, source_id, schema_name, object_name, object_type, fqname)
+            VALUES(?, 1, 'public', ?, 'table', ?)
+            """,
+            [("obj_f32", "f32", "public.f32"), ("obj_int8", "int8", "public.int8")],
+        )
+        conn.execute(
+            "INSERT INTO object_vectors(object_id, embedding, content_hash) VALUES('obj_f32', ?, 'h1')",
+            (struct.pack("<2f", 1.0, 0.0),),
+        )
+        assert [row["object_id"] for row in vec_mod.vector_search(conn, query="q", query_vec=[1.0, 0.0])] == [
+            "obj_f32"
+        ]
+
+        conn.execute(
+            "INSERT INTO object_vectors(object_id, embedding, content_hash, scale) VALUES('obj_int8', ?, 'h2', 0.01)",
+            (bytes([0, 127]),),
+        )
+        results = vec_mod.vector_search(conn, query="q", query_vec=[1.0, 1.0])
+
+        assert [row["object_id"] for row in results] == ["obj_f32", "obj_int8"]
+        assert results[0]["score"] == pytest.approx(results[1]["score"], abs=1e-6)
+    finally:
+        conn.close()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import qpg.index.vec as vec_mod
@@ -34,3 +35,27 @@ def test_embed_text_requires_initialized_model(monkeypatch, tmp_path: Path) -> N
         assert "qpg init" in str(exc)
     else:
         raise AssertionError("expected VectorModelNotInitializedError")
+
+
+def test_model_weights_load_once_across_threads(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    monkeypatch.setattr(vec_mod, "_EMBEDDER", None)
+
+    assert vec_mod.warm_vector_model() is False
+
+    model_dir = tmp_path / "cache" / "qpg" / "models" / vec_mod.CODE_MODEL_DIRNAME
+    model_dir.mkdir(parents=True)
+    (model_dir / "config.json").write_text("{}", encoding="utf-8")
+
+    loads: list[Path] = []
+
+    def fake_load_pretrained(path: Path) -> tuple[object, object]:
+        loads.append(path)
+        return object(), object()
+
+    monkeypatch.setattr(vec_mod, "_load_pretrained", fake_load_pretrained)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert all(pool.map(lambda _: vec_mod.warm_vector_model(), range(8)))
+    assert loads == [model_dir]